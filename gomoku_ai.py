@@ -0,0 +1,459 @@
+"""
+Gomoku AI Engine
+Negamax alpha-beta search with iterative deepening over GomokuGame
+"""
+
+import time
+
+from gomoku_eval import PatternEvaluator
+from gomoku_game import INVERSE_SYMMETRY, GomokuGame, Player, symmetry_tables
+from gomoku_stats import instrument_ai
+from gomoku_tt import EXACT, LOWER, UPPER, TranspositionTable
+from gomoku_vcf import ThreatSolver
+
+
+WIN_SCORE = 1000000
+# Scores beyond this are forced wins/losses, stored relative to the node in the TT
+MATE_BOUND = WIN_SCORE - 1000
+
+# Move ordering value of a 5-cell window holding k stones of one player
+# and none of the other
+WINDOW_WEIGHTS = (0, 1, 10, 100, 1000, WIN_SCORE)
+
+# Lazy SMP depth schedule: helper i skips the iterations where
+# ((depth + phase) // size) is odd, so parallel workers spread over depths
+_SKIP_SIZES = (1, 1, 2, 2, 2, 2, 3, 3, 3, 3, 3, 3, 4, 4, 4, 4, 4, 4, 4, 4)
+_SKIP_PHASES = (0, 1, 0, 1, 2, 3, 0, 1, 2, 3, 4, 5, 0, 1, 2, 3, 4, 5, 6, 7)
+
+_window_cache = {}
+
+
+def _window_tables(board_size):
+    """
+    Precompute the 5-cell windows of a board
+
+    Returns:
+        tuple: (windows, cell_windows)
+            - windows: list of 5-tuples of flat cell indices
+            - cell_windows: for every flat cell index, ids of windows containing it
+    """
+    if board_size not in _window_cache:
+        windows = []
+        cell_windows = [[] for _ in range(board_size * board_size)]
+        for row in range(board_size):
+            for col in range(board_size):
+                for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_r, end_c = row + 4 * dr, col + 4 * dc
+                    if not (0 <= end_r < board_size and 0 <= end_c < board_size):
+                        continue
+                    cells = tuple((row + k * dr) * board_size + col + k * dc for k in range(5))
+                    for idx in cells:
+                        cell_windows[idx].append(len(windows))
+                    windows.append(cells)
+        _window_cache[board_size] = (windows, [tuple(ids) for ids in cell_windows])
+    return _window_cache[board_size]
+
+
+class SearchResult:
+    """Outcome of one search iteration"""
+
+    def __init__(self, move, score, depth, nodes, elapsed, pv):
+        self.move = move
+        self.score = score
+        self.depth = depth
+        self.nodes = nodes
+        self.elapsed = elapsed
+        self.pv = pv
+
+    def __repr__(self):
+        return (f"SearchResult(move={self.move}, score={self.score}, depth={self.depth}, "
+                f"nodes={self.nodes}, elapsed={self.elapsed:.3f})")
+
+
+def _score_to_tt(score, ply):
+    """Make a mate score relative to the node before storing it"""
+    if score > MATE_BOUND:
+        return score + ply
+    if score < -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def _score_from_tt(score, ply):
+    """Make a stored mate score relative to the root again"""
+    if score > MATE_BOUND:
+        return score - ply
+    if score < -MATE_BOUND:
+        return score + ply
+    return score
+
+
+class _SearchTimeout(Exception):
+    """Raised inside the search when the time budget is used up"""
+
+
+class GomokuAI:
+    """
+    Computer opponent
+    - Negamax with alpha-beta pruning and iterative deepening
+    - Plays moves on the given game with make_move/undo_move, never copies it
+    - Stays within a hard time budget per move
+    - Caches results in a bounded transposition table kept between moves;
+      killer moves and history scores also carry over to the next search
+    - Can ponder: search without a time limit until ponder_hit() starts the clock
+    - Scores leaves with a PatternEvaluator that follows the game's moves
+    """
+
+    def __init__(self, game, time_limit=1.0, max_depth=20, max_moves=12, on_iteration=None,
+                 tt=None, tt_size_mb=16, vcf_nodes=1000, book=None, stats=None, profile=None,
+                 helper=0):
+        """
+        Initialize the AI
+
+        Args:
+            game: GomokuGame to search (left unchanged after each search)
+            time_limit: Seconds allowed per move
+            max_depth: Deepest iteration to run
+            max_moves: Number of best-ordered moves searched at each node
+            on_iteration: Optional callback receiving a SearchResult after each depth
+            tt: TranspositionTable to use (e.g. shared between engines)
+            tt_size_mb: Size of the table created when tt is not given
+            vcf_nodes: Node budget of the forced-win (VCF) check run before
+                each search, 0 to skip it
+            book: Optional OpeningBook consulted before searching
+            stats: Collect search statistics (True, or an output as for
+                GOMOKU_STATS); None follows the GOMOKU_STATS variable
+            profile: Profile output file; None follows the GOMOKU_PROFILE variable
+            helper: Index of this search among parallel workers sharing `tt`;
+                helpers (> 0) skip some iteration depths (see gomoku_parallel)
+        """
+        self.game = game
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.max_moves = max_moves
+        self.on_iteration = on_iteration
+        self.tt = tt if tt is not None else TranspositionTable(tt_size_mb)
+        self.evaluator = PatternEvaluator(game)
+        self.vcf_solver = ThreatSolver(game.board_size, vcf_nodes) if vcf_nodes else None
+        self.book = book
+        self.helper = helper
+        # While True the search ignores the time limit (see ponder_hit)
+        self.pondering = False
+        self._stopped = False
+        self._start = self._deadline = 0.0
+        self._killers = None
+        self._history = None
+        self._root_ply = None
+        # SearchStats with the reports of past searches, or None when disabled
+        self.stats = instrument_ai(self, stats, profile)
+
+    def close(self):
+        """Stop following the game (call before discarding the AI)"""
+        self.evaluator.detach()
+
+    def stop(self):
+        """Ask a running search to return its best move so far"""
+        self._stopped = True
+
+    def ponder_hit(self, time_limit=None):
+        """
+        Turn a search started with pondering set into a normal one (may be
+        called from another thread)
+
+        The time already spent pondering counts towards the time limit, so
+        after a long enough ponder the search ends at once with its
+        deepest completed iteration.
+
+        Args:
+            time_limit: Seconds allowed for the whole search, None to keep time_limit
+        """
+        if time_limit is not None:
+            self.time_limit = time_limit
+        self._deadline = self._start + self.time_limit
+        self.pondering = False
+
+    def get_best_move(self):
+        """
+        Choose a move for the current player
+
+        Returns:
+            tuple: (row, col), or None if the game is over or the board is full
+        """
+        return self.search().move
+
+    def search(self):
+        """
+        Run an iterative deepening search from the current position
+
+        Returns:
+            SearchResult - Result of the deepest completed iteration
+        """
+        game = self.game
+        self._setup()
+        self._start = time.perf_counter()
+        self._deadline = self._start + self.time_limit
+        self._stopped = False
+        self.nodes = 0
+        self.tt.new_search()
+
+        result = SearchResult(None, 0, 0, 0, 0.0, [])
+        if game.game_over:
+            return result
+
+        if self.book is not None:
+            move = self.book.choose(game)
+            if move is not None:
+                return SearchResult(move, 0, 0, 0, time.perf_counter() - self._start, [move])
+
+        root_moves = self._ordered_moves()
+        if not root_moves:
+            return result
+        result.move = self._to_move(root_moves[0])
+        if len(root_moves) == 1:
+            return result
+
+        # A forced win by continuous fours needs no search
+        if self.vcf_solver is not None:
+            threat = self.vcf_solver.solve(game)
+            if threat.found:
+                return SearchResult(threat.moves[0], WIN_SCORE, len(threat.moves), threat.nodes,
+                                    time.perf_counter() - self._start, threat.moves)
+
+        for depth in range(1, self.max_depth + 1):
+            if self._skip_depth(depth):
+                continue
+            try:
+                score, best, pv = self._search_root(root_moves, depth)
+            except _SearchTimeout:
+                # Every _play is paired with an _unplay in a finally block,
+                # so the game is already back at the root position
+                break
+
+            elapsed = time.perf_counter() - self._start
+            result = SearchResult(self._to_move(best), score, depth, self.nodes, elapsed,
+                                  [self._to_move(idx) for idx in pv])
+            if self.on_iteration is not None:
+                self.on_iteration(result)
+
+            # Search the previous best move first in the next iteration
+            root_moves.remove(best)
+            root_moves.insert(0, best)
+
+            # A proven result will not change with more depth, and the next
+            # iteration would not finish in the remaining time anyway
+            if abs(score) > MATE_BOUND:
+                break
+            if not self.pondering and time.perf_counter() - self._start > self.time_limit / 2:
+                break
+        return result
+
+    def _skip_depth(self, depth):
+        """True if a parallel helper leaves this iteration to the other workers"""
+        if not self.helper or depth == self.max_depth:
+            return False
+        i = (self.helper - 1) % len(_SKIP_SIZES)
+        return (depth + _SKIP_PHASES[i]) // _SKIP_SIZES[i] % 2 == 1
+
+    def _setup(self):
+        """Build the search tables from the game position"""
+        game = self.game
+        size = game.board_size
+        self._size = size
+        self._symmetries = symmetry_tables(size)
+        self._windows, self._cell_windows = _window_tables(size)
+        self._grid = [int(v) for v in game.get_board().ravel()]
+        self._counts = [None, [0] * len(self._windows), [0] * len(self._windows)]
+        plies = -1 if self._root_ply is None else len(game.move_history) - self._root_ply
+        if self._history is not None and len(self._history) == size * size and plies >= 0:
+            # The game moved on by `plies`: killers of ply p of the last
+            # search belong to ply p - plies now, and old history scores
+            # are halved so the new position soon outweighs them
+            self._killers = self._killers[plies:] + [[None, None] for _ in range(plies)]
+            self._history = [score >> 1 for score in self._history]
+        else:
+            self._killers = [[None, None] for _ in range(size * size + 1)]
+            self._history = [0] * (size * size)
+        self._root_ply = len(game.move_history)
+
+        for wid, cells in enumerate(self._windows):
+            for idx in cells:
+                if self._grid[idx]:
+                    self._counts[self._grid[idx]][wid] += 1
+
+    def _to_move(self, idx):
+        """Convert a flat cell index to (row, col)"""
+        return divmod(idx, self._size)
+
+    def _play(self, idx):
+        """
+        Make a move on the game and update the search tables
+
+        Returns:
+            bool - True if the move won the game
+        """
+        value = 1 if self.game.current_player is Player.BLACK else 2
+        success, result = self.game.make_move(*divmod(idx, self._size))
+        self._grid[idx] = value
+
+        own = self._counts[value]
+        for wid in self._cell_windows[idx]:
+            own[wid] += 1
+        return result == "WIN"
+
+    def _unplay(self, idx):
+        """Undo the last move on the game and in the search tables"""
+        value = self._grid[idx]
+        self.game.undo_move(1)
+        self._grid[idx] = 0
+
+        own = self._counts[value]
+        for wid in self._cell_windows[idx]:
+            own[wid] -= 1
+
+    def _evaluate(self):
+        """Static evaluation from the point of view of the player to move"""
+        value = 1 if self.game.current_player is Player.BLACK else 2
+        return self.evaluator.evaluate(value)
+
+    def _ordered_moves(self, ply=0, tt_move=None):
+        """
+        Generate moves for the player to move, best first
+
+        Immediate wins and forced blocks of the opponent's four are returned
+        alone, since no other move needs to be searched. The best move stored
+        in the transposition table is tried first.
+        """
+        value = 1 if self.game.current_player is Player.BLACK else 2
+        own, other = self._counts[value], self._counts[3 - value]
+        cell_windows = self._cell_windows
+        killers = self._killers[ply]
+        history = self._history
+
+        scored = []
+        blocks = set()
+        size = self._size
+        for row, col in self.game.candidate_moves(ordered=False):
+            idx = row * size + col
+            attack = defense = 0
+            for wid in cell_windows[idx]:
+                mine, theirs = own[wid], other[wid]
+                if not theirs:
+                    if mine == 4:
+                        return [idx]
+                    attack += WINDOW_WEIGHTS[mine + 1] - WINDOW_WEIGHTS[mine]
+                elif not mine:
+                    if theirs == 4:
+                        blocks.add(idx)
+                    defense += WINDOW_WEIGHTS[theirs]
+            score = attack + defense + history[idx]
+            if idx == tt_move:
+                score += WIN_SCORE
+            elif idx in killers:
+                score += WINDOW_WEIGHTS[4]
+            scored.append((score, idx))
+
+        if blocks:
+            return sorted(blocks)
+        scored.sort(reverse=True)
+        return [idx for _, idx in scored[:self.max_moves]]
+
+    def _search_root(self, moves, depth):
+        """Search all root moves to the given depth"""
+        alpha, beta = -WIN_SCORE - 1, WIN_SCORE + 1
+        best, best_pv = moves[0], []
+        for idx in moves:
+            if self._play(idx):
+                self._unplay(idx)
+                return WIN_SCORE, idx, [idx]
+            try:
+                score, pv = self._negamax(depth - 1, -beta, -alpha, 1)
+            finally:
+                self._unplay(idx)
+            score = -score
+            if score > alpha:
+                alpha, best, best_pv = score, idx, pv
+        return alpha, best, [best] + best_pv
+
+    def _negamax(self, depth, alpha, beta, ply):
+        """
+        Negamax alpha-beta search
+
+        Returns:
+            tuple: (score, pv) - score for the player to move and the best line
+        """
+        self.nodes += 1
+        if self.nodes & 63 == 0:
+            if self._stopped or (not self.pondering and time.perf_counter() > self._deadline):
+                raise _SearchTimeout()
+
+        if depth <= 0:
+            return self._evaluate(), []
+
+        # Symmetric positions share one entry; its move is kept in the canonical frame
+        key, transform = self.game.canonical()
+        entry = self.tt.probe(key)
+        tt_move = None
+        if entry is not None:
+            tt_depth, flag, score, tt_move = entry
+            if tt_move is not None:
+                tt_move = self._symmetries[INVERSE_SYMMETRY[transform]][tt_move]
+            if tt_depth >= depth:
+                score = _score_from_tt(score, ply)
+                if (flag == EXACT or (flag == LOWER and score >= beta)
+                        or (flag == UPPER and score <= alpha)):
+                    return score, [] if tt_move is None else [tt_move]
+
+        moves = self._ordered_moves(ply, tt_move)
+        if not moves:
+            return 0, []  # Board full: draw
+
+        alpha_start = alpha
+        best_score, best_pv = -WIN_SCORE - 1, []
+        for idx in moves:
+            if self._play(idx):
+                self._unplay(idx)
+                return WIN_SCORE - ply, [idx]
+            try:
+                score, pv = self._negamax(depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                self._unplay(idx)
+            score = -score
+
+            if score > best_score:
+                best_score, best_pv = score, [idx] + pv
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        # Remember quiet moves that caused a cutoff
+                        killers = self._killers[ply]
+                        if idx != killers[0]:
+                            killers[1] = killers[0]
+                            killers[0] = idx
+                        self._history[idx] += depth * depth
+                        break
+
+        if best_score <= alpha_start:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt.store(key, depth, flag, _score_to_tt(best_score, ply),
+                      self._symmetries[transform][best_pv[0]])
+        return best_score, best_pv
+
+
+def main():
+    """Let the AI play a game against itself and print the moves"""
+    game = GomokuGame(backend="bitboard")
+    ai = GomokuAI(game, time_limit=1.0)
+    while not game.game_over and len(game.move_history) < game.board_size ** 2:
+        result = ai.search()
+        game.make_move(*result.move)
+        print(f"{len(game.move_history):3d}. {result.move} depth={result.depth} "
+              f"nodes={result.nodes} score={result.score} time={result.elapsed:.2f}s")
+    print(f"Winner: {game.winner.name if game.winner else 'none'}")
+
+
+if __name__ == "__main__":
+    main()
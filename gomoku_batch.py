@@ -0,0 +1,276 @@
+"""
+Gomoku Batch Engine
+Many games played in lockstep on one NumPy array, for self-play and playouts
+"""
+
+import time
+
+import numpy as np
+
+from gomoku_game import RULES, Player
+from gomoku_renju import FIVE, OVERLINE, RenjuRules, black_counts, line_codes, line_info_array
+
+
+_PAD = 5  # Enough border for an 11-cell line centred on any cell
+
+# Offsets -5..5 along each of the four line directions
+_STEPS = np.arange(-_PAD, _PAD + 1)
+_DIRECTION_ROWS = np.array([0, 1, 1, 1])[:, None] * _STEPS
+_DIRECTION_COLS = np.array([1, 0, 1, -1])[:, None] * _STEPS
+
+
+def five_mask(boards, value):
+    """
+    Find games where a player has 5 or more in a row anywhere
+
+    Uses shifted-array comparisons over all four directions.
+
+    Args:
+        boards: (N, size, size) array of Player values
+        value: Player value to look for
+
+    Returns:
+        np.ndarray - (N,) bool
+    """
+    stones = boards == value
+    found = np.zeros(len(boards), dtype=bool)
+    for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+        size = boards.shape[1]
+        rows = size - 4 * dr
+        col_start = 4 if dc < 0 else 0
+        cols = size - 4 * abs(dc)
+        run = np.ones((len(boards), rows, cols), dtype=bool)
+        for k in range(5):
+            r, c = k * dr, col_start + k * dc
+            run &= stones[:, r:r + rows, c:c + cols]
+        found |= run.any(axis=(1, 2))
+    return found
+
+
+class BatchGomoku:
+    """
+    Vectorized Gomoku engine
+    - Holds N games as one (N, size, size) int8 array
+    - Applies one move per game, detects wins and draws in a single call
+    - Reports legal-move masks for all games at once, without Black's
+      forbidden moves under Renju
+    """
+
+    def __init__(self, n_games, board_size=15, rule="freestyle"):
+        """
+        Initialize N empty games
+
+        Args:
+            n_games: Number of games played in parallel
+            board_size: Number of rows and columns of every board
+            rule: "freestyle" or "renju", as for GomokuGame
+        """
+        if rule not in RULES:
+            raise ValueError(f"Unknown rule: {rule!r} (expected one of {', '.join(RULES)})")
+        self.n_games = n_games
+        self.board_size = board_size
+        self.rule = rule
+        # Boards live inside a border of -1 so line lookups never go out of range
+        self._padded = np.full((n_games, board_size + 2 * _PAD, board_size + 2 * _PAD),
+                               -1, dtype=np.int8)
+        self.boards = self._padded[:, _PAD:-_PAD, _PAD:-_PAD]
+        self.current = np.empty(n_games, dtype=np.int8)
+        self.done = np.empty(n_games, dtype=bool)
+        self.winners = np.empty(n_games, dtype=np.int8)
+        self.move_counts = np.empty(n_games, dtype=np.int32)
+        self._games = np.arange(n_games)
+        self.reset()
+
+    def reset(self, mask=None):
+        """
+        Reset games to the empty board
+
+        Args:
+            mask: Optional (N,) bool array selecting the games to reset (default all)
+        """
+        if mask is None:
+            mask = np.ones(self.n_games, dtype=bool)
+        self.boards[mask] = Player.EMPTY.value
+        self.current[mask] = Player.BLACK.value
+        self.done[mask] = False
+        self.winners[mask] = Player.EMPTY.value
+        self.move_counts[mask] = 0
+
+    def load_game(self, index, game):
+        """
+        Copy the position of a GomokuGame into one slot of the batch
+
+        Args:
+            index: Slot to overwrite
+            game: GomokuGame with the same board size
+        """
+        self.boards[index] = game.get_board()
+        self.current[index] = game.current_player.value
+        self.done[index] = game.game_over or len(game.move_history) == self.board_size ** 2
+        self.winners[index] = game.winner.value if game.winner else Player.EMPTY.value
+        self.move_counts[index] = len(game.move_history)
+
+    def legal_mask(self):
+        """
+        Get the legal moves of every game
+
+        Returns:
+            np.ndarray - (N, size * size) bool, all False for finished games
+        """
+        flat = self.boards.reshape(self.n_games, -1)
+        legal = (flat == Player.EMPTY.value) & ~self.done[:, None]
+        if self.rule == "renju":
+            black = np.flatnonzero(self.current == Player.BLACK.value)
+            if len(black):
+                legal[black] &= ~self._forbidden_mask(black)
+        return legal
+
+    def _forbidden_mask(self, games):
+        """
+        Forbidden moves of Black in the given games
+
+        The line codes of all cells are built with shifted slices of the
+        boards and classified through the Renju line table. Only cells that
+        may be double-threes are checked one by one, since whether a three
+        counts depends on the rest of the board.
+
+        Returns:
+            np.ndarray - (len(games), size * size) bool
+        """
+        size = self.board_size
+        boards = self.boards[games]
+        # A forbidden move needs black stones along two lines, or many along one
+        counts = black_counts(boards)
+        empty = boards == Player.EMPTY.value
+        candidates = empty & (((counts >= 2).sum(axis=1) >= 2) | (counts >= 3).any(axis=1))
+        forbidden = np.zeros(boards.shape, dtype=bool)
+        where = np.nonzero(candidates)
+        if not len(where[0]):
+            return forbidden.reshape(len(games), -1)
+
+        # Codes of the candidate cells with a black stone in the empty centre
+        # (digit 5 of 0..10): (K, 4)
+        all_codes = line_codes(boards)
+        codes = all_codes[where[0], :, where[1], where[2]] + 3 ** 5
+        infos = line_info_array(codes)
+        kind, fours, threes = infos[..., 0], infos[..., 1], infos[..., 2]
+
+        five = (kind == FIVE).any(axis=1)
+        found = ~five & ((kind == OVERLINE).any(axis=1) | (fours.sum(axis=1) >= 2))
+        forbidden[where] = found
+        maybe_three = ~five & ~found & (threes.sum(axis=1) >= 2)
+
+        rules = RenjuRules(size)
+        loaded = None
+        for i, row, col in zip(*(axis[maybe_three] for axis in where)):
+            if loaded != i:
+                rules.codes = all_codes[i].ravel().tolist()
+                loaded = i
+            forbidden[i, row, col] = rules.forbidden(row * size + col) is not None
+        return forbidden.reshape(len(games), -1)
+
+    def step(self, moves):
+        """
+        Play one move in every unfinished game
+
+        Args:
+            moves: (N,) int array of flat cell indices (row * size + col);
+                entries for finished games are ignored
+
+        Returns:
+            np.ndarray - (N,) bool, True for games won by this move
+        """
+        moves = np.asarray(moves)
+        active = ~self.done
+        games = self._games[active]
+        rows, cols = np.divmod(moves[active], self.board_size)
+        players = self.current[active]
+
+        if np.any(self.boards[games, rows, cols] != Player.EMPTY.value):
+            raise ValueError("Illegal move: position already occupied")
+
+        self.boards[games, rows, cols] = players
+        self.move_counts[games] += 1
+
+        # Gather the 11 cells of every line through the move: (games, 4, 11)
+        line_rows = rows[:, None, None] + _PAD + _DIRECTION_ROWS
+        line_cols = cols[:, None, None] + _PAD + _DIRECTION_COLS
+        lines = self._padded[games[:, None, None], line_rows, line_cols] == players[:, None, None]
+        forward = np.cumprod(lines[:, :, _PAD + 1:], axis=2).sum(axis=2)
+        backward = np.cumprod(lines[:, :, _PAD - 1::-1], axis=2).sum(axis=2)
+        runs = forward + backward + 1
+        if self.rule == "renju":
+            # Black needs exactly five; the 11-cell lines see any overline
+            exact = (runs == 5).any(axis=1)
+            won_active = np.where(players == Player.BLACK.value, exact, (runs >= 5).any(axis=1))
+        else:
+            won_active = (runs >= 5).any(axis=1)
+
+        won = np.zeros(self.n_games, dtype=bool)
+        won[games] = won_active
+        self.winners[won] = self.current[won]
+        full = self.move_counts == self.board_size ** 2
+        self.done |= won | full
+
+        # Switch player in games that go on
+        switch = active & ~self.done
+        self.current[switch] = 3 - self.current[switch]
+        return won
+
+    def random_moves(self, rng):
+        """
+        Pick a uniformly random legal move in every game
+
+        A game whose empty cells are all forbidden for Black ends as a draw.
+
+        Args:
+            rng: np.random.Generator
+
+        Returns:
+            np.ndarray - (N,) flat cell indices, -1 for finished games
+        """
+        legal = self.legal_mask()
+        stuck = ~legal.any(axis=1) & ~self.done
+        self.done |= stuck
+        noise = rng.random(legal.shape)
+        noise[~legal] = -1.0
+        moves = noise.argmax(axis=1)
+        moves[self.done] = -1
+        return moves
+
+    def playout(self, rng=None, max_moves=None):
+        """
+        Finish every game with random moves
+
+        Args:
+            rng: np.random.Generator (a new unseeded one if None)
+            max_moves: Optional cap on the number of steps
+
+        Returns:
+            np.ndarray - (N,) winner Player values, 0 for draws and unfinished games
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+        steps = 0
+        while not self.done.all() and (max_moves is None or steps < max_moves):
+            self.step(self.random_moves(rng))
+            steps += 1
+        return self.winners.copy()
+
+
+def main():
+    """Measure random playout speed"""
+    batch = BatchGomoku(1024)
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    batch.playout(rng)
+    elapsed = time.perf_counter() - start
+    moves = int(batch.move_counts.sum())
+    black = int((batch.winners == Player.BLACK.value).sum())
+    white = int((batch.winners == Player.WHITE.value).sum())
+    print(f"{batch.n_games} games, {moves} moves in {elapsed:.2f}s "
+          f"({moves / elapsed:,.0f} moves/s) - black {black}, white {white}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+Gomoku Benchmarks
+Reproducible timings of the game primitives, playouts and the AI search
+
+Usage:
+    python gomoku_bench.py -o baseline.json
+    python gomoku_bench.py --compare baseline.json [--threshold 0.10]
+    python gomoku_bench.py --filter ai --quick
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+import numpy as np
+
+from gomoku_ai import GomokuAI
+from gomoku_batch import BatchGomoku
+from gomoku_board import BACKENDS
+from gomoku_game import GomokuGame, Player
+
+
+# A 40-ply game without a winner, for the make/undo timings
+MOVE_SEQUENCE = [
+    (7, 7), (8, 9), (5, 9), (6, 5), (4, 5), (10, 9), (9, 8), (10, 6), (8, 5), (5, 7),
+    (3, 10), (8, 10), (1, 11), (6, 4), (6, 9), (9, 4), (11, 5), (11, 7), (0, 9), (10, 4),
+    (6, 10), (4, 3), (10, 2), (6, 2), (3, 2), (7, 9), (1, 1), (0, 8), (0, 10), (12, 11),
+    (0, 2), (9, 0), (4, 11), (9, 12), (0, 12), (11, 10), (4, 10), (9, 11), (11, 1), (12, 5),
+]
+
+# A game played by the AI; the search positions are taken from it
+_AI_GAME = [
+    (7, 7), (6, 8), (7, 9), (7, 8), (8, 8), (5, 8), (9, 9), (6, 6), (9, 7), (6, 10),
+    (6, 9), (4, 8), (3, 8), (5, 9), (8, 9), (10, 9), (10, 10), (11, 11), (10, 6), (11, 5),
+]
+
+AI_POSITIONS = {
+    'opening': _AI_GAME[:6],
+    'middlegame': _AI_GAME[:14],
+    'tactical': _AI_GAME[:20],
+}
+
+
+def measure(func, operations=1, repeat=5, min_time=0.2):
+    """
+    Time a function like timeit: calls are batched until one batch takes at
+    least min_time / repeat, and the best of `repeat` batches is kept
+
+    Args:
+        func: Callable without arguments
+        operations: Number of operations one call performs
+
+    Returns:
+        float - Seconds per operation
+    """
+    number = 1
+    while True:
+        elapsed = _run_batch(func, number)
+        if elapsed >= min_time / repeat or number >= 1 << 20:
+            break
+        number *= 10
+    best = elapsed
+    for _ in range(repeat - 1):
+        best = min(best, _run_batch(func, number))
+    return best / (number * operations)
+
+
+def _run_batch(func, number):
+    start = time.perf_counter()
+    for _ in range(number):
+        func()
+    return time.perf_counter() - start
+
+
+def _game_at(moves, backend="bitboard"):
+    game = GomokuGame(backend=backend)
+    for move in moves:
+        game.make_move(*move)
+    return game
+
+
+def bench_primitives(backend):
+    """make_move, undo_move, check_win, get_game_state and snapshot on one backend"""
+    results = {}
+    game = GomokuGame(backend=backend)
+    plies = len(MOVE_SEQUENCE)
+
+    def play_all():
+        for move in MOVE_SEQUENCE:
+            game.make_move(*move)
+        game.undo_move(plies)
+
+    def undo_all():
+        # Replaying costs as much as play_all; only the undo half is kept
+        for move in MOVE_SEQUENCE:
+            game.make_move(*move)
+        start = time.perf_counter()
+        for _ in range(plies):
+            game.undo_move(1)
+        return time.perf_counter() - start
+
+    pair = measure(play_all, plies)
+    undo_times = [undo_all() / plies for _ in range(200)]
+    undo = min(undo_times)
+    results[f'{backend}.make_move'] = (max(pair - undo, 0.0), 'us/op')
+    results[f'{backend}.undo_move'] = (undo, 'us/op')
+
+    game = _game_at(MOVE_SEQUENCE, backend)
+    stones = [(row, col, Player.BLACK if i % 2 == 0 else Player.WHITE)
+              for i, (row, col) in enumerate(MOVE_SEQUENCE)]
+
+    def check_all():
+        for row, col, player in stones:
+            game.check_win(row, col, player)
+
+    results[f'{backend}.check_win'] = (measure(check_all, len(stones)), 'us/op')
+    results[f'{backend}.get_game_state'] = (measure(game.get_game_state), 'us/op')
+    results[f'{backend}.snapshot'] = (measure(game.snapshot), 'us/op')
+    return {name: (value * 1e6, unit) for name, (value, unit) in results.items()}
+
+
+def bench_playouts(seconds=1.0):
+    """Random games to the end: GomokuGame one at a time and BatchGomoku"""
+    rng = random.Random(0)
+    start = time.perf_counter()
+    games = 0
+    while time.perf_counter() - start < seconds:
+        game = GomokuGame(backend="bitboard")
+        while not game.game_over and len(game.move_history) < 225:
+            game.make_move(*rng.choice(game.candidate_moves(ordered=False)))
+        games += 1
+    single = games / (time.perf_counter() - start)
+
+    batch = BatchGomoku(256)
+    np_rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    games = 0
+    while time.perf_counter() - start < seconds:
+        batch.reset()
+        batch.playout(np_rng)
+        games += batch.n_games
+    batched = games / (time.perf_counter() - start)
+    return {
+        'playouts.game': (single, 'games/s'),
+        'playouts.batch': (batched, 'games/s'),
+    }
+
+
+def bench_ai(depth):
+    """Nodes per second and time to reach each depth on the fixed positions"""
+    results = {}
+    for name, moves in AI_POSITIONS.items():
+        game = _game_at(moves)
+        reached = {}
+        ai = GomokuAI(game, time_limit=3600, max_depth=depth, vcf_nodes=0,
+                      on_iteration=lambda result: reached.__setitem__(result.depth, result.elapsed))
+        result = ai.search()
+        ai.close()
+        results[f'ai.{name}.nps'] = (result.nodes / result.elapsed, 'nodes/s')
+        for d, elapsed in sorted(reached.items()):
+            if d >= 2:
+                results[f'ai.{name}.depth{d}'] = (elapsed * 1000, 'ms')
+    return results
+
+
+# Units where a larger value is an improvement
+_HIGHER_IS_BETTER = {'games/s', 'nodes/s'}
+
+
+def run(filter_text=None, quick=False):
+    """
+    Run all benchmarks whose name starts with filter_text
+
+    Returns:
+        dict - {"meta": {...}, "results": {name: {"value": ..., "unit": ...}}}
+    """
+    suites = [(f'{backend}.', lambda backend=backend: bench_primitives(backend))
+              for backend in BACKENDS]
+    suites.append(('playouts.', lambda: bench_playouts(0.3 if quick else 1.0)))
+    suites.append(('ai.', lambda: bench_ai(4 if quick else 6)))
+
+    results = {}
+    for prefix, suite in suites:
+        if filter_text and not prefix.startswith(filter_text):
+            continue
+        for name, (value, unit) in suite().items():
+            results[name] = {'value': round(value, 4), 'unit': unit}
+            print(f"{name:32s} {value:14,.3f} {unit}", file=sys.stderr)
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'quick': quick,
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold=0.10):
+    """
+    Compare two runs
+
+    Returns:
+        tuple: (lines, regressions) - report lines and names slower than threshold
+
+    Raises:
+        ValueError - One run is quick and the other is not, so the numbers differ in kind
+    """
+    if _mode(current) != _mode(baseline):
+        raise ValueError(f"Cannot compare a {_mode(current)} run with a {_mode(baseline)} baseline")
+    lines = [f"{'benchmark':32s} {'baseline':>12s} {'current':>12s} {'change':>8s}"]
+    regressions = []
+    for name, now in current['results'].items():
+        old = baseline['results'].get(name)
+        if old is None or not old['value']:
+            continue
+        change = now['value'] / old['value'] - 1
+        worse = -change if now['unit'] in _HIGHER_IS_BETTER else change
+        flag = ""
+        if worse > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif worse < -threshold:
+            flag = "  faster"
+        lines.append(f"{name:32s} {old['value']:12,.3f} {now['value']:12,.3f} "
+                     f"{change:+8.1%}{flag}")
+    return lines, regressions
+
+
+def _mode(run_result):
+    """'quick' or 'full' (runs saved without the flag were full runs)"""
+    return 'quick' if run_result['meta'].get('quick') else 'full'
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Gomoku performance benchmarks")
+    parser.add_argument('-o', '--output', help='Write the results to this JSON file')
+    parser.add_argument('--compare', help='Baseline JSON file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Relative slowdown reported as a regression (default 0.10)')
+    parser.add_argument('--filter', help='Only run benchmarks with this prefix, e.g. "ai" or "numpy"')
+    parser.add_argument('--quick', action='store_true', help='Shorter runs, shallower search')
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            baseline = json.load(file)
+        # Check before spending minutes on the benchmarks
+        if _mode(baseline) != ('quick' if args.quick else 'full'):
+            parser.error(f"{args.compare} is a {_mode(baseline)} run; "
+                         f"{'drop' if args.quick else 'add'} --quick to compare with it")
+
+    current = run(args.filter, args.quick)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(current, file, indent=2)
+    if baseline is not None:
+        lines, regressions = compare(current, baseline, args.threshold)
+        print("\n".join(lines))
+        if regressions:
+            print(f"{len(regressions)} regression(s) over {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
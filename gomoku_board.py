@@ -0,0 +1,372 @@
+"""
+Gomoku Board Backends
+Storage for stones on the board, used by GomokuGame
+"""
+
+from itertools import combinations
+
+import numpy as np
+
+
+# Line directions as (row step, col step)
+DIRECTIONS = (
+    (0, 1),   # Horizontal
+    (1, 0),   # Vertical
+    (1, 1),   # Diagonal \
+    (1, -1)   # Diagonal /
+)
+
+
+class Board:
+    """
+    Common interface of all board backends
+    - Cell values are the integer values of Player (0 empty, 1 black, 2 white)
+    - Callers validate coordinates and occupancy before place/remove
+    """
+
+    name = None
+
+    def __init__(self, size):
+        """Initialize an empty board"""
+        self.size = size
+
+    def get(self, row, col):
+        """Get the value stored at a cell"""
+        raise NotImplementedError
+
+    def place(self, row, col, value):
+        """Put a stone of the given value on an empty cell"""
+        raise NotImplementedError
+
+    def remove(self, row, col):
+        """Remove the stone from a cell"""
+        raise NotImplementedError
+
+    def clear(self):
+        """Remove all stones"""
+        raise NotImplementedError
+
+    def to_array(self):
+        """Get a dense np.int8 copy of the board"""
+        raise NotImplementedError
+
+    def has_five(self, row, col, value):
+        """
+        Check if the stone at (row, col) is part of 5 or more in a row
+
+        Args:
+            row: Row index of the stone
+            col: Column index of the stone
+            value: Player value the line must consist of
+
+        Returns:
+            bool - True if there are 5 or more in a row through the cell
+        """
+        return any(self.run_length(row, col, dr, dc, value) >= 5 for dr, dc in DIRECTIONS)
+
+    def run_length(self, row, col, dr, dc, value):
+        """Length of the run of `value` through (row, col) along (dr, dc)"""
+        size = self.size
+        count = 1
+
+        # Count in positive direction
+        r, c = row + dr, col + dc
+        while 0 <= r < size and 0 <= c < size and self.get(r, c) == value:
+            count += 1
+            r += dr
+            c += dc
+
+        # Count in negative direction
+        r, c = row - dr, col - dc
+        while 0 <= r < size and 0 <= c < size and self.get(r, c) == value:
+            count += 1
+            r -= dr
+            c -= dc
+
+        return count
+
+
+class ArrayBoard(Board):
+    """Dense NumPy board (the original storage)"""
+
+    name = "numpy"
+
+    def __init__(self, size):
+        super().__init__(size)
+        self.array = np.zeros((size, size), dtype=np.int8)
+
+    def get(self, row, col):
+        return self.array[row, col]
+
+    def place(self, row, col, value):
+        self.array[row, col] = value
+
+    def remove(self, row, col):
+        self.array[row, col] = 0
+
+    def clear(self):
+        self.array = np.zeros((self.size, self.size), dtype=np.int8)
+
+    def to_array(self):
+        return self.array.copy()
+
+
+_window_mask_cache = {}
+
+# For each stone count of a 5-window: (empty positions, stone positions) pairs
+_GAP_SETS = [
+    [(gaps, tuple(k for k in range(5) if k not in gaps))
+     for gaps in combinations(range(5), 5 - stones)]
+    for stones in range(5)
+]
+
+
+def _bitboard_window_masks(size):
+    """
+    For every bit index and direction of a BitBoard: the start bits of all
+    5-windows along that direction which contain the cell
+    """
+    if size not in _window_mask_cache:
+        stride = size + 1
+        table = []
+        for row in range(size):
+            for col in range(size):
+                masks = []
+                for dr, dc in DIRECTIONS:
+                    mask = 0
+                    for k in range(5):
+                        r, c = row - k * dr, col - k * dc
+                        end_r, end_c = r + 4 * dr, c + 4 * dc
+                        if (0 <= r < size and 0 <= c < size
+                                and 0 <= end_r < size and 0 <= end_c < size):
+                            mask |= 1 << (r * stride + c)
+                    masks.append(mask)
+                table.append(tuple(masks))
+            table.append(None)  # Padding column
+        _window_mask_cache[size] = table
+    return _window_mask_cache[size]
+
+
+class BitBoard(Board):
+    """
+    Bitboard storage - one Python int per player
+
+    Cell (row, col) is bit row * stride + col, where stride = size + 1.
+    The extra column is always empty, so shifting along a row or a
+    diagonal never wraps onto the next row.
+    """
+
+    name = "bitboard"
+
+    def __init__(self, size):
+        super().__init__(size)
+        self.stride = size + 1
+        self.bits = [0, 0, 0]  # Indexed by player value, slot 0 unused
+        stride = self.stride
+        self.shifts = (1, stride, stride + 1, stride - 1)
+        self.full_mask = 0
+        for row in range(size):
+            self.full_mask |= ((1 << size) - 1) << (row * stride)
+
+        self._window_masks = _bitboard_window_masks(size)
+
+    def index(self, row, col):
+        """Bit index of a cell"""
+        return row * self.stride + col
+
+    def get(self, row, col):
+        i = row * self.stride + col
+        bits = self.bits
+        if bits[1] >> i & 1:
+            return 1
+        if bits[2] >> i & 1:
+            return 2
+        return 0
+
+    def place(self, row, col, value):
+        self.bits[value] |= 1 << (row * self.stride + col)
+
+    def remove(self, row, col):
+        mask = ~(1 << (row * self.stride + col))
+        self.bits[1] &= mask
+        self.bits[2] &= mask
+
+    def clear(self):
+        self.bits = [0, 0, 0]
+
+    def to_array(self):
+        array = np.zeros((self.size, self.size), dtype=np.int8)
+        stride = self.stride
+        for value in (1, 2):
+            bits = self.bits[value]
+            while bits:
+                low = bits & -bits
+                i = low.bit_length() - 1
+                array[i // stride, i % stride] = value
+                bits ^= low
+        return array
+
+    def empty_bits(self):
+        """Bitmask of the empty cells"""
+        return self.full_mask & ~(self.bits[1] | self.bits[2])
+
+    def window_points(self, own, empty, stones):
+        """
+        Find the empty cells of 5-windows holding `stones` of the player and
+        nothing else
+
+        Args:
+            own: Bitmask of the player's stones
+            empty: Bitmask of the empty cells
+            stones: Number of the player's stones a window must hold (0-4)
+
+        Returns:
+            int - Bitmask of the empty cells of all such windows
+        """
+        points = 0
+        gap_sets = _GAP_SETS[stones]
+        for shift in self.shifts:
+            own_at = [own >> (k * shift) for k in range(5)]
+            empty_at = [empty >> (k * shift) for k in range(5)]
+            for gaps, filled in gap_sets:
+                windows = empty_at[gaps[0]]
+                for k in gaps[1:]:
+                    windows &= empty_at[k]
+                for k in filled:
+                    windows &= own_at[k]
+                if windows:
+                    for k in gaps:
+                        points |= windows << (k * shift)
+        return points
+
+    def five_points(self, own, empty):
+        """Bitmask of the empty cells where the player would complete five"""
+        return self.window_points(own, empty, 4)
+
+    def four_points(self, own, empty):
+        """Bitmask of the empty cells where the player would make a four"""
+        return self.window_points(own, empty, 3)
+
+    @staticmethod
+    def bit_indices(mask):
+        """Yield the indices of the set bits of a mask, lowest first"""
+        while mask:
+            low = mask & -mask
+            yield low.bit_length() - 1
+            mask ^= low
+
+    def has_five(self, row, col, value):
+        bits = self.bits[value]
+        masks = self._window_masks[row * self.stride + col]
+        for shift, mask in zip(self.shifts, masks):
+            # Bit i survives if cells i, i+s, ..., i+4s all hold a stone
+            run = bits & (bits >> shift)
+            run &= run >> (2 * shift)
+            run &= bits >> (4 * shift)
+            if run & mask:
+                return True
+        return False
+
+
+class SparseBoard(Board):
+    """
+    Sparse storage - a dict of stones and their bounding box
+
+    Memory and every operation except to_array() cost O(stones), so very
+    large boards are cheap. The size may be None for an unbounded board on
+    which any integer coordinates are allowed.
+    """
+
+    name = "sparse"
+
+    def __init__(self, size):
+        super().__init__(size)
+        self.stones = {}        # (row, col) -> player value
+        self._bounds = None
+        self._bounds_stale = False
+
+    def get(self, row, col):
+        return self.stones.get((row, col), 0)
+
+    def place(self, row, col, value):
+        self.stones[(row, col)] = value
+        if self._bounds_stale:
+            return
+        if self._bounds is None:
+            self._bounds = (row, col, row, col)
+        else:
+            min_row, min_col, max_row, max_col = self._bounds
+            self._bounds = (min(min_row, row), min(min_col, col),
+                            max(max_row, row), max(max_col, col))
+
+    def remove(self, row, col):
+        del self.stones[(row, col)]
+        bounds = self._bounds
+        # Only a stone on the edge of the box can shrink it; recompute when asked
+        if bounds is not None and (row in (bounds[0], bounds[2]) or col in (bounds[1], bounds[3])):
+            self._bounds_stale = True
+
+    def clear(self):
+        self.stones = {}
+        self._bounds = None
+        self._bounds_stale = False
+
+    @property
+    def bounds(self):
+        """(min_row, min_col, max_row, max_col) of the stones, or None if there are none"""
+        if self._bounds_stale:
+            self._bounds_stale = False
+            self._bounds = None
+            if self.stones:
+                rows = [row for row, _ in self.stones]
+                cols = [col for _, col in self.stones]
+                self._bounds = (min(rows), min(cols), max(rows), max(cols))
+        return self._bounds
+
+    def to_array(self):
+        if self.size is None:
+            raise ValueError("An unbounded board has no dense array; use stones and bounds")
+        array = np.zeros((self.size, self.size), dtype=np.int8)
+        for (row, col), value in self.stones.items():
+            array[row, col] = value
+        return array
+
+    def run_length(self, row, col, dr, dc, value):
+        # Cells off the board are never in the dict, so no bounds checks are needed
+        stones = self.stones
+        count = 1
+        r, c = row + dr, col + dc
+        while stones.get((r, c)) == value:
+            count += 1
+            r += dr
+            c += dc
+        r, c = row - dr, col - dc
+        while stones.get((r, c)) == value:
+            count += 1
+            r -= dr
+            c -= dc
+        return count
+
+
+BACKENDS = {
+    ArrayBoard.name: ArrayBoard,
+    BitBoard.name: BitBoard,
+    SparseBoard.name: SparseBoard,
+}
+
+
+def create_board(backend, size):
+    """
+    Create a board backend by name
+
+    Args:
+        backend: One of the names in BACKENDS ("numpy", "bitboard", "sparse")
+        size: Board size (None for an unbounded "sparse" board)
+
+    Returns:
+        Board - New empty board
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown board backend: {backend!r} "
+                         f"(expected one of {', '.join(BACKENDS)})")
+    return BACKENDS[backend](size)
@@ -0,0 +1,307 @@
+"""
+Gomoku Opening Book
+Move statistics of early positions, normalized over the 8 board symmetries
+
+File layout (little endian, columns sorted by position key, then move):
+    header  32 bytes: magic "GMKB", version u16, board size u8, max ply u8,
+                      entry count u64, reserved
+    keys    u64[count]  canonical position hash
+    games   u32[count]  games in which the move was played
+    points  u32[count]  half points scored by the player making the move
+    moves   u16[count]  move in the canonical frame (row * board_size + col)
+
+Usage:
+    python gomoku_book.py build games.gmkr [more.gmkr ...] -o book.gmkb [--max-ply 10]
+    python gomoku_book.py probe book.gmkb 7,7 8,8
+"""
+
+import argparse
+import heapq
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+
+import numpy as np
+
+from gomoku_game import INVERSE_SYMMETRY, GomokuGame, symmetric_zobrist_keys, symmetry_tables
+from gomoku_record import GameRecordReader
+
+
+MAGIC = b"GMKB"
+VERSION = 2  # 2: position hashes from cell_key(), shared by all board backends
+HEADER = struct.Struct("<4sHBBQ16x")
+
+_RUN_DTYPE = np.dtype([('key', '<u8'), ('move', '<u2'), ('games', '<u4'), ('points', '<u4')])
+
+
+def _canonical_move(board_size, hashes, cell):
+    """
+    Canonical key of a position and the canonical form of a move played there
+
+    Among symmetries that give the same (minimal) hash, the move image with
+    the lowest index is used, so equivalent moves are counted together.
+    """
+    forward = symmetry_tables(board_size)
+    key = min(hashes)
+    return key, min(forward[t][cell] for t in range(8) if hashes[t] == key)
+
+
+class OpeningBook:
+    """
+    Memory-mapped opening book
+    - Lookups are binary searches over the sorted key column
+    - Positions are matched in any of their 8 symmetric orientations
+    """
+
+    def __init__(self, path):
+        """
+        Open a book file
+
+        Args:
+            path: File written by build_book()
+        """
+        self.path = path
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.board_size, self.max_ply, count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an opening book")
+        if version != VERSION:
+            raise ValueError(f"Unsupported book version: {version}")
+        offset = HEADER.size
+        self.keys = np.frombuffer(self._map, dtype='<u8', count=count, offset=offset)
+        offset += 8 * count
+        self.games = np.frombuffer(self._map, dtype='<u4', count=count, offset=offset)
+        offset += 4 * count
+        self.points = np.frombuffer(self._map, dtype='<u4', count=count, offset=offset)
+        offset += 4 * count
+        self.moves = np.frombuffer(self._map, dtype='<u2', count=count, offset=offset)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, game):
+        """
+        Book moves of the current position
+
+        Args:
+            game: GomokuGame on the board size of the book
+
+        Returns:
+            list - (move, games, score) with move as (row, col) on the game's
+                   board and score the mean result for the mover (0-1), most
+                   played first; empty when the position is not in the book
+        """
+        size = self.board_size
+        if game.board_size != size or game.game_over or len(game.move_history) >= self.max_ply:
+            return []
+        key, transform = game.canonical()
+        target = np.uint64(key)
+        lo = int(np.searchsorted(self.keys, target, 'left'))
+        hi = int(np.searchsorted(self.keys, target, 'right'))
+        if lo == hi:
+            return []
+
+        back = symmetry_tables(size)[INVERSE_SYMMETRY[transform]]
+        occupied = {row * size + col for row, col in game.move_history}
+        entries = []
+        for j in range(lo, hi):
+            cell = back[int(self.moves[j])]
+            if cell in occupied:
+                continue  # Hash collision with another position
+            games = int(self.games[j])
+            entries.append((divmod(cell, size), games, int(self.points[j]) / (2 * games)))
+        entries.sort(key=lambda entry: -entry[1])
+        return entries
+
+    def choose(self, game, min_games=2, rng=None):
+        """
+        Pick a book move
+
+        Args:
+            game: GomokuGame at the position to play
+            min_games: Ignore moves played in fewer games
+            rng: random.Random for a choice weighted by popularity; without
+                it the move with the best smoothed score is played
+
+        Returns:
+            tuple: (row, col), or None when the book has no move
+        """
+        entries = [entry for entry in self.lookup(game) if entry[1] >= min_games]
+        if not entries:
+            return None
+        if rng is not None:
+            return rng.choices([move for move, _, _ in entries],
+                               weights=[games for _, games, _ in entries])[0]
+        # Laplace smoothing: rarely played moves are not trusted on a few lucky wins
+        return max(entries, key=lambda e: (e[2] * e[1] + 1) / (e[1] + 2))[0]
+
+    def close(self):
+        """Release the memory map"""
+        self.keys = self.games = self.points = self.moves = None
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _write_run(counts, directory, number):
+    """Save aggregated counts as a sorted run file"""
+    run = np.empty(len(counts), dtype=_RUN_DTYPE)
+    for i, ((key, move), (games, points)) in enumerate(counts.items()):
+        run[i] = (key, move, games, points)
+    run.sort(order=('key', 'move'))
+    path = os.path.join(directory, f"run{number}.npy")
+    np.save(path, run)
+    return path
+
+
+def _iter_run(path, block=1 << 16):
+    """Yield the rows of a run file in order without loading it whole"""
+    run = np.load(path, mmap_mode='r')
+    for start in range(0, len(run), block):
+        yield from np.array(run[start:start + block]).tolist()
+
+
+def build_book(record_paths, output, max_ply=10, min_games=2, chunk_entries=2000000):
+    """
+    Build an opening book from game record files in one streaming pass
+
+    Statistics are aggregated in memory up to chunk_entries distinct
+    (position, move) pairs, spilled to sorted run files and merged at the end.
+
+    Args:
+        record_paths: .gmkr files written by gomoku_record
+        output: Book file to write
+        max_ply: Positions with fewer stones than this are included
+        min_games: Drop moves played in fewer games
+        chunk_entries: Distinct entries held in memory before spilling
+
+    Returns:
+        int - Number of entries in the book
+    """
+    if not 1 <= max_ply <= 255:
+        raise ValueError("max_ply must be between 1 and 255")
+    board_size = None
+    directory = tempfile.mkdtemp(prefix="gomoku_book_")
+    runs = []
+    counts = {}
+    try:
+        for path in record_paths:
+            with GameRecordReader(path) as reader:
+                if board_size is None:
+                    board_size = reader.board_size
+                elif reader.board_size != board_size:
+                    raise ValueError(f"{path}: board size differs from the other files")
+                winners = reader.index['winner'].copy()
+                for i in range(len(reader)):
+                    cells = reader.move_codes(i)[:max_ply].tolist()
+                    winner = int(winners[i])
+                    _count_game(board_size, cells, winner, counts)
+                    if len(counts) >= chunk_entries:
+                        runs.append(_write_run(counts, directory, len(runs)))
+                        counts = {}
+        if board_size is None:
+            raise ValueError("No record files given")
+        if counts:
+            runs.append(_write_run(counts, directory, len(runs)))
+        return _write_book(output, board_size, max_ply, min_games, runs, directory)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def _count_game(board_size, cells, winner, counts):
+    """Add the early moves of one game to the counts"""
+    # Same incremental hashes as GomokuGame.symmetric_hashes, without the game
+    keys = symmetric_zobrist_keys(board_size)
+    hashes = [0] * 8
+    for ply, cell in enumerate(cells):
+        mover = 1 + ply % 2
+        key, move = _canonical_move(board_size, hashes, cell)
+        points = 1 if not winner else (2 if winner == mover else 0)
+        entry = counts.get((key, move))
+        if entry is None:
+            counts[(key, move)] = [1, points]
+        else:
+            entry[0] += 1
+            entry[1] += points
+        hashes = [h ^ k for h, k in zip(hashes, keys[mover][cell])]
+
+
+def _write_book(output, board_size, max_ply, min_games, runs, directory):
+    """Merge the sorted runs, sum duplicates and write the book columns"""
+    # Columns are spooled to temporary files, then concatenated after the header
+    columns = [open(os.path.join(directory, name), 'w+b')
+               for name in ('keys', 'games', 'points', 'moves')]
+    formats = ('<Q', '<I', '<I', '<H')
+    count = 0
+
+    def flush(key, move, games, points):
+        nonlocal count
+        if games >= min_games:
+            for column, fmt, value in zip(columns, formats, (key, games, points, move)):
+                column.write(struct.pack(fmt, value))
+            count += 1
+
+    current = None
+    for key, move, games, points in heapq.merge(*(_iter_run(path) for path in runs)):
+        if current is not None and current[0] == key and current[1] == move:
+            current[2] += games
+            current[3] += points
+        else:
+            if current is not None:
+                flush(*current)
+            current = [key, move, games, points]
+    if current is not None:
+        flush(*current)
+
+    with open(output, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, board_size, max_ply, count))
+        for column in columns:
+            column.seek(0)
+            shutil.copyfileobj(column, file)
+            column.close()
+    return count
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Gomoku opening book")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help='Build a book from game record files')
+    build.add_argument('records', nargs='+')
+    build.add_argument('-o', '--output', required=True)
+    build.add_argument('--max-ply', type=int, default=10)
+    build.add_argument('--min-games', type=int, default=2)
+    probe = commands.add_parser('probe', help='Show the book moves of a position')
+    probe.add_argument('book')
+    probe.add_argument('moves', nargs='*', help='Moves played so far as row,col')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        count = build_book(args.records, args.output, args.max_ply, args.min_games)
+        print(f"Wrote {count} entries to {args.output} ({os.path.getsize(args.output)} bytes)")
+        return
+
+    with OpeningBook(args.book) as book:
+        game = GomokuGame(board_size=book.board_size, backend="bitboard")
+        for move in args.moves:
+            row, col = (int(x) for x in move.split(','))
+            success, result = game.make_move(row, col)
+            if not success:
+                parser.error(f"Move {move}: {result}")
+        entries = book.lookup(game)
+        if not entries:
+            print("Position not in the book")
+        for (row, col), games, score in entries:
+            print(f"{row},{col}  games {games:8d}  score {score:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""
+Gomoku Engine Process
+Runs GomokuAI in a long-lived worker process so user interfaces never block
+"""
+
+import multiprocessing
+import queue
+import threading
+from multiprocessing import shared_memory
+
+from gomoku_ai import GomokuAI
+from gomoku_game import GomokuGame
+from gomoku_tt import TranspositionTable
+
+
+def sync_game(game, moves):
+    """
+    Bring a game to the position after `moves` with as few undo/make calls as possible
+
+    Args:
+        game: GomokuGame to update
+        moves: Full move list of the target position as (row, col)
+    """
+    history = game.move_history
+    common = 0
+    limit = min(len(history), len(moves))
+    while common < limit and tuple(history[common]) == tuple(moves[common]):
+        common += 1
+    if common < len(history):
+        game.undo_move(len(history) - common)
+    for row, col in moves[common:]:
+        success, result = game.make_move(row, col)
+        if not success:
+            raise ValueError(f"Illegal move ({row}, {col}): {result}")
+
+
+def attach_shared_table(name, tt_size_mb):
+    """
+    Open a transposition table kept in a shared memory block created by
+    another process
+
+    Returns:
+        tuple: (table, block) - keep the block alive as long as the table is used
+    """
+    # Spawned workers share the resource tracker of the process that created
+    # the block, so attaching registers nothing new and the creator still
+    # decides when to unlink it
+    block = shared_memory.SharedMemory(name=name)
+    return TranspositionTable(tt_size_mb, buffer=block.buf), block
+
+
+def _worker_main(commands, results, board_size, tt_size_mb, shared_tt=None, helper=0):
+    """
+    Body of the engine process
+
+    A listener thread reads the command queue so that "stop" reaches the
+    search while it runs; searches are executed one at a time in order.
+    """
+    game = GomokuGame(board_size=board_size, backend="bitboard")
+    block = None
+    tt = None
+    if shared_tt is not None:
+        tt, block = attach_shared_table(shared_tt, tt_size_mb)
+    ai = GomokuAI(game, tt=tt, tt_size_mb=tt_size_mb, helper=helper)
+    default_depth = ai.max_depth
+    pending = queue.Queue()
+    state = {'current': None, 'stopped': None, 'hit': None}
+
+    def listen():
+        while True:
+            command = commands.get()
+            if command[0] == 'stop':
+                state['stopped'] = command[1]
+                if state['current'] == command[1]:
+                    ai.stop()
+            elif command[0] == 'ponderhit':
+                # Also seen by the main loop if the ponder search has not started
+                state['hit'] = command[1:]
+                if state['current'] == command[1]:
+                    ai.ponder_hit(command[2])
+            else:
+                pending.put(command)
+                if command[0] == 'quit':
+                    return
+
+    threading.Thread(target=listen, daemon=True).start()
+
+    while True:
+        command = pending.get()
+        if command[0] == 'quit':
+            break
+        _, search_id, moves, time_limit, max_depth, ponder = command
+        sync_game(game, moves)
+
+        def report(result, search_id=search_id):
+            # A stop that arrived just before the search started is honoured here
+            if state['stopped'] == search_id:
+                ai.stop()
+            results.put({'type': 'info', 'id': search_id, 'depth': result.depth,
+                         'nodes': result.nodes, 'score': result.score,
+                         'pv': result.pv, 'elapsed': result.elapsed})
+
+        ai.time_limit = time_limit
+        ai.max_depth = default_depth if max_depth is None else max_depth
+        ai.on_iteration = report
+        ai.pondering = ponder
+        state['current'] = search_id
+        if state['hit'] is not None and state['hit'][0] == search_id:
+            ai.ponder_hit(state['hit'][1])
+        result = ai.search()
+        ai.pondering = False
+        state['current'] = None
+        results.put({'type': 'done', 'id': search_id, 'move': result.move,
+                     'depth': result.depth, 'nodes': result.nodes, 'score': result.score,
+                     'pv': result.pv, 'elapsed': result.elapsed})
+    ai.close()
+    if block is not None:
+        tt.release()
+        block.close()
+
+
+class EngineProcess:
+    """
+    Client side of an engine worker process
+    - search() returns at once; progress and the final move arrive via poll()
+    - The worker keeps its game, evaluator, transposition table, killer
+      moves and history scores between searches, so consecutive positions
+      of one game are cheap to set up
+    - ponder() searches the expected next position while the opponent
+      thinks; if search() is then asked for that position, the running
+      search goes on, its time counted from the start of pondering
+      ("ponder hit")
+    """
+
+    def __init__(self, board_size=15, tt_size_mb=64, shared_tt=None, helper=0):
+        """
+        Start the worker process
+
+        Args:
+            board_size: Board size of the games to search
+            tt_size_mb: Transposition table size of the worker
+            shared_tt: Name of a shared memory block holding the transposition
+                table (of tt_size_mb), shared with other workers
+            helper: Lazy SMP helper index of the worker's search (see GomokuAI)
+        """
+        # Spawn: forking a process that runs Tk is not safe
+        context = multiprocessing.get_context('spawn')
+        self._commands = context.Queue()
+        self._results = context.Queue()
+        self._process = context.Process(
+            target=_worker_main,
+            args=(self._commands, self._results, board_size, tt_size_mb, shared_tt, helper),
+            daemon=True)
+        self._process.start()
+        self._next_id = 0
+        self.current = None
+        self._ponder = None     # (id, moves, buffered messages) of the ponder search
+        self._buffered = []     # Messages of a ponder search before its hit, not yet polled
+        self.ponders = 0
+        self.ponder_hits = 0
+        self.last_ponder_hit = False
+
+    def search(self, moves, time_limit=1.0, max_depth=None):
+        """
+        Start searching a position (queued behind a running search)
+
+        Args:
+            moves: Move list of the position as (row, col)
+            time_limit: Seconds allowed for the search
+            max_depth: Deepest iteration, None for the AI's default
+
+        Returns:
+            int - Id of the search, carried by all its messages
+        """
+        moves = [tuple(m) for m in moves]
+        ponder, self._ponder = self._ponder, None
+        self.last_ponder_hit = False
+        if ponder is not None:
+            ponder_id, ponder_moves, buffered = ponder
+            if ponder_moves == moves and max_depth is None:
+                self.ponder_hits += 1
+                self.last_ponder_hit = True
+                self.current = ponder_id
+                self._buffered = buffered
+                self._commands.put(('ponderhit', ponder_id, time_limit))
+                return ponder_id
+            self._commands.put(('stop', ponder_id))
+
+        self._next_id += 1
+        self.current = self._next_id
+        self._commands.put(('search', self._next_id, moves, time_limit, max_depth, False))
+        return self._next_id
+
+    def ponder(self, moves):
+        """
+        Search a position in the background until search() is called
+
+        Usually `moves` is the game after the engine's move plus the reply
+        it expects. The search has no time limit until search() is asked
+        for the same position; its time limit then counts from the start of
+        pondering, so the move often comes at once. Any other search()
+        stops the ponder search.
+
+        Args:
+            moves: Move list of the expected position as (row, col)
+        """
+        self.stop_ponder()
+        self._next_id += 1
+        self.ponders += 1
+        self._ponder = (self._next_id, [tuple(m) for m in moves], [])
+        self._commands.put(('search', self._next_id, self._ponder[1], 0.0, None, True))
+
+    def stop_ponder(self):
+        """Abandon the ponder search, if any"""
+        if self._ponder is not None:
+            self._commands.put(('stop', self._ponder[0]))
+            self._ponder = None
+
+    @property
+    def ponder_hit_rate(self):
+        """Share of ponder searches whose position was asked for next"""
+        return self.ponder_hits / self.ponders if self.ponders else 0.0
+
+    def stop(self, search_id=None):
+        """Make a search (default: the latest) finish now with its best move so far"""
+        search_id = self.current if search_id is None else search_id
+        if search_id is not None:
+            self._commands.put(('stop', search_id))
+
+    def cancel(self):
+        """Stop the latest search and the ponder search and ignore their messages"""
+        self.stop()
+        self.stop_ponder()
+        self.current = None
+
+    def poll(self):
+        """
+        Collect the messages of the current search without blocking
+
+        Returns:
+            list - Dicts with 'type' "info" (one per finished depth) or "done"
+        """
+        messages = []
+        if self._buffered:
+            # Progress of a ponder search made before its ponder hit
+            messages, self._buffered = self._buffered, []
+            if messages[-1]['type'] == 'done':
+                self.current = None
+                return messages
+        while True:
+            try:
+                message = self._results.get_nowait()
+            except queue.Empty:
+                return messages
+            if message['id'] == self.current:
+                if message['type'] == 'done':
+                    self.current = None
+                messages.append(message)
+            elif self._ponder is not None and message['id'] == self._ponder[0]:
+                self._ponder[2].append(message)
+
+    @property
+    def busy(self):
+        """True while the latest search has not reported its move"""
+        return self.current is not None
+
+    def is_alive(self):
+        """True while the worker process is running"""
+        return self._process.is_alive()
+
+    def close(self):
+        """Stop the worker process"""
+        self.cancel()
+        self._commands.put(('quit',))
+        self._process.join(timeout=2)
+        if self._process.is_alive():
+            self._process.terminate()
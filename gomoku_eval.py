@@ -0,0 +1,247 @@
+"""
+Gomoku Position Evaluation
+Pattern-based evaluator updated incrementally from GomokuGame moves
+"""
+
+
+# Shapes a player can have on one line, weakest first
+NONE = 0
+ONE = 1
+TWO = 2          # Can become a three
+OPEN_TWO = 3     # Can become an open three
+THREE = 4        # Can become a four
+OPEN_THREE = 5   # Can become an open four (includes broken threes like X_XX)
+FOUR = 6         # One cell completes five
+OPEN_FOUR = 7    # Two or more cells complete five
+FIVE = 8
+
+SHAPE_SCORES = (0, 2, 20, 120, 250, 2000, 2500, 20000, 100000)
+
+# Stones further apart than this never share a 5-cell window
+_MAX_GAP = 4
+
+# Upper bound on the number of cached line scores
+LINE_CACHE_LIMIT = 200000
+
+_shape_cache = {}
+_line_cache = {}
+_line_tables_cache = {}
+
+
+def _has_five(mask):
+    """Check if a bitmask contains 5 consecutive set bits"""
+    return bool(mask & (mask >> 1) & (mask >> 2) & (mask >> 3) & (mask >> 4))
+
+
+def shape(length, mask):
+    """
+    Classify the stones of one player on an open stretch of a line
+
+    Args:
+        length: Number of cells in the stretch (no opponent stones inside)
+        mask: Bitmask of the player's stones in the stretch
+
+    Returns:
+        int - One of the shape constants NONE .. FIVE
+    """
+    key = (length, mask)
+    if key in _shape_cache:
+        return _shape_cache[key]
+
+    if length < 5 or not mask:
+        result = NONE
+    elif _has_five(mask):
+        result = FIVE
+    else:
+        empties = [1 << i for i in range(length) if not mask >> i & 1]
+        completions = sum(1 for bit in empties if _has_five(mask | bit))
+        if completions >= 2:
+            result = OPEN_FOUR
+        elif completions == 1:
+            result = FOUR
+        else:
+            # A shape is one step below the best shape one more stone can make
+            best = max(shape(length, mask | bit) for bit in empties)
+            result = {OPEN_FOUR: OPEN_THREE, FOUR: THREE, OPEN_THREE: OPEN_TWO,
+                      THREE: TWO, OPEN_TWO: ONE, TWO: ONE}.get(best, NONE)
+
+    _shape_cache[key] = result
+    return result
+
+
+def _segment_score(length, mask):
+    """Score the stones of one player on a stretch without opponent stones"""
+    positions = []
+    bits = mask
+    while bits:
+        low = bits & -bits
+        positions.append(low.bit_length() - 1)
+        bits ^= low
+
+    # Score each group of stones that can share a window separately,
+    # cut down to the cells a five through the group could use
+    score = 0
+    first = positions[0]
+    for i, pos in enumerate(positions):
+        if i + 1 < len(positions) and positions[i + 1] - pos - 1 < _MAX_GAP:
+            continue
+        low = max(0, first - _MAX_GAP)
+        high = min(length - 1, pos + _MAX_GAP)
+        span = high - low + 1
+        score += SHAPE_SCORES[shape(span, (mask >> low) & ((1 << span) - 1))]
+        if i + 1 < len(positions):
+            first = positions[i + 1]
+    return score
+
+
+def _player_line_score(length, own, other):
+    """Score the stones of one player on a whole line"""
+    score = 0
+    start = 0
+    while start < length:
+        rest = other >> start
+        end = start + (rest & -rest).bit_length() - 1 if rest else length
+        span = end - start
+        if span >= 5:
+            segment = (own >> start) & ((1 << span) - 1)
+            if segment:
+                score += _segment_score(span, segment)
+        start = end + 1
+    return score
+
+
+def line_score(length, black, white):
+    """
+    Score a line for both players
+
+    Args:
+        length: Number of cells in the line
+        black: Bitmask of black stones along the line
+        white: Bitmask of white stones along the line
+
+    Returns:
+        tuple: (black_score, white_score)
+    """
+    key = (length, black, white)
+    scores = _line_cache.get(key)
+    if scores is None:
+        if len(_line_cache) >= LINE_CACHE_LIMIT:
+            _line_cache.clear()
+        scores = (_player_line_score(length, black, white),
+                  _player_line_score(length, white, black))
+        _line_cache[key] = scores
+    return scores
+
+
+def line_tables(board_size):
+    """
+    Precompute the lines of a board that are long enough to hold a five
+
+    Returns:
+        tuple: (lines, cell_lines)
+            - lines: list of lists of flat cell indices, in order along the line
+            - cell_lines: for every flat cell index, a tuple of (line id, position)
+    """
+    if board_size not in _line_tables_cache:
+        starts = (
+            ((0, 1), [(r, 0) for r in range(board_size)]),
+            ((1, 0), [(0, c) for c in range(board_size)]),
+            ((1, 1), [(r, 0) for r in range(board_size)] + [(0, c) for c in range(1, board_size)]),
+            ((1, -1), [(0, c) for c in range(board_size)]
+             + [(r, board_size - 1) for r in range(1, board_size)]),
+        )
+        lines = []
+        cell_lines = [[] for _ in range(board_size * board_size)]
+        for (dr, dc), cells in starts:
+            for row, col in cells:
+                line = []
+                while 0 <= row < board_size and 0 <= col < board_size:
+                    line.append(row * board_size + col)
+                    row += dr
+                    col += dc
+                if len(line) < 5:
+                    continue
+                for pos, idx in enumerate(line):
+                    cell_lines[idx].append((len(lines), pos))
+                lines.append(line)
+        _line_tables_cache[board_size] = (lines, [tuple(entry) for entry in cell_lines])
+    return _line_tables_cache[board_size]
+
+
+class PatternEvaluator:
+    """
+    Incremental pattern evaluator
+    - Keeps a bitmask per player for every row, column and diagonal
+    - Listens to the game and rescores only the four lines through a
+      placed or removed stone, using cached line scores
+    """
+
+    def __init__(self, game):
+        """
+        Attach an evaluator to a game
+
+        Args:
+            game: GomokuGame to follow
+        """
+        self.game = game
+        self.board_size = game.board_size
+        self.lines, self.cell_lines = line_tables(self.board_size)
+        self.rescan()
+        game.add_listener(self)
+
+    def detach(self):
+        """Stop following the game"""
+        self.game.remove_listener(self)
+
+    def rescan(self):
+        """Rebuild all line masks and scores from the full board"""
+        count = len(self.lines)
+        self.masks = [None, [0] * count, [0] * count]
+        self.line_scores = [None, [0] * count, [0] * count]
+        self.totals = [0, 0, 0]
+
+        board = self.game.get_board().ravel().tolist()
+        for lid, line in enumerate(self.lines):
+            for pos, idx in enumerate(line):
+                if board[idx]:
+                    self.masks[board[idx]][lid] |= 1 << pos
+            self._rescore(lid)
+
+    def evaluate(self, value):
+        """
+        Score the position for one player
+
+        Args:
+            value: Player value (1 black, 2 white) to score for
+
+        Returns:
+            int - Pattern score of the player minus that of the opponent
+        """
+        return self.totals[value] - self.totals[3 - value]
+
+    def _rescore(self, lid):
+        """Recompute the score of one line and update the totals"""
+        black, white = line_score(len(self.lines[lid]), self.masks[1][lid], self.masks[2][lid])
+        scores, totals = self.line_scores, self.totals
+        totals[1] += black - scores[1][lid]
+        totals[2] += white - scores[2][lid]
+        scores[1][lid] = black
+        scores[2][lid] = white
+
+    def on_move(self, row, col, value):
+        """Game listener: a stone was placed"""
+        masks = self.masks[value]
+        for lid, pos in self.cell_lines[row * self.board_size + col]:
+            masks[lid] |= 1 << pos
+            self._rescore(lid)
+
+    def on_undo(self, row, col, value):
+        """Game listener: a stone was removed"""
+        masks = self.masks[value]
+        for lid, pos in self.cell_lines[row * self.board_size + col]:
+            masks[lid] &= ~(1 << pos)
+            self._rescore(lid)
+
+    def on_reset(self):
+        """Game listener: the board was cleared"""
+        self.rescan()
@@ -3,9 +3,14 @@ Gomoku Game Logic Engine
 Core game mechanics: board, rules, win detection
 """
 
-import numpy as np
+from collections import defaultdict
 from enum import Enum
 
+import numpy as np
+
+from gomoku_board import create_board
+from gomoku_renju import RenjuRules
+
 
 class Player(Enum):
     """Player enumeration"""
@@ -14,22 +19,367 @@ class Player(Enum):
     WHITE = 2
 
 
+# Enum .value lookups are slow on the make_move hot path
+_EMPTY = Player.EMPTY.value
+_VALUES = {player: player.value for player in Player}
+
+# Rule sets: "freestyle" (five or more wins) and "renju" (Black wins with
+# exactly five and may not play overlines, double-fours or double-threes)
+RULES = ("freestyle", "renju")
+
+_zobrist_tables = {}
+
+
+def zobrist_keys(board_size):
+    """
+    Random 64-bit keys for hashing positions
+
+    The table holds the cell_key() of every cell, so hashes are the same in
+    every process, can be stored on disk, and match those of sparse boards
+    of the same size.
+
+    Returns:
+        list - keys[value][row * board_size + col] for value 1 (black) and 2 (white)
+    """
+    if board_size not in _zobrist_tables:
+        cells = range(board_size * board_size)
+        _zobrist_tables[board_size] = [None] + [
+            [cell_key(value, *divmod(idx, board_size)) for idx in cells]
+            for value in (1, 2)
+        ]
+    return _zobrist_tables[board_size]
+
+
+# The 8 symmetries of the board, indexed as in symmetry_tables()
+SYMMETRIES = (
+    "identity",         # (r, c)
+    "rotate90",         # (c, n - r)
+    "rotate180",        # (n - r, n - c)
+    "rotate270",        # (n - c, r)
+    "mirror_lr",        # (r, n - c)
+    "mirror_tb",        # (n - r, c)
+    "transpose",        # (c, r)
+    "anti_transpose",   # (n - c, n - r)
+)
+
+# Index of the symmetry that undoes each symmetry
+INVERSE_SYMMETRY = (0, 3, 2, 1, 4, 5, 6, 7)
+
+def symmetry_transforms(board_size):
+    """
+    Coordinate maps of the 8 board symmetries
+
+    Returns:
+        tuple - 8 functions (row, col) -> (row, col), indexed as SYMMETRIES
+    """
+    n = board_size - 1
+    return (
+        lambda r, c: (r, c),
+        lambda r, c: (c, n - r),
+        lambda r, c: (n - r, n - c),
+        lambda r, c: (n - c, r),
+        lambda r, c: (r, n - c),
+        lambda r, c: (n - r, c),
+        lambda r, c: (c, r),
+        lambda r, c: (n - c, n - r),
+    )
+
+
+_symmetry_tables = {}
+
+
+def symmetry_tables(board_size):
+    """
+    Cell maps of the 8 board symmetries
+
+    Returns:
+        list - tables[t][row * board_size + col] is the flat index of the
+               cell's image under symmetry t
+    """
+    if board_size not in _symmetry_tables:
+        transforms = symmetry_transforms(board_size)
+        _symmetry_tables[board_size] = [
+            tuple(r * board_size + c
+                  for r, c in (transform(row, col)
+                               for row in range(board_size) for col in range(board_size)))
+            for transform in transforms
+        ]
+    return _symmetry_tables[board_size]
+
+
+_symmetric_key_tables = {}
+
+
+def symmetric_zobrist_keys(board_size):
+    """
+    Zobrist keys of a stone seen through each symmetry
+
+    Returns:
+        list - keys[value][idx] is a tuple of 8 keys, one per symmetry,
+               so that XOR-ing them keeps the hash of every transformed board
+    """
+    if board_size not in _symmetric_key_tables:
+        keys = zobrist_keys(board_size)
+        tables = symmetry_tables(board_size)
+        _symmetric_key_tables[board_size] = [None] + [
+            [tuple(keys[value][table[idx]] for table in tables)
+             for idx in range(board_size * board_size)]
+            for value in (1, 2)
+        ]
+    return _symmetric_key_tables[board_size]
+
+
+def _mix64(x):
+    """splitmix64 finalizer: a well-spread 64-bit value from an integer"""
+    x = (x + 0x9E3779B97F4A7C15) & _MASK_64
+    x = (x ^ (x >> 30)) * 0xBF58476D1CE4E5B9 & _MASK_64
+    x = (x ^ (x >> 27)) * 0x94D049BB133111EB & _MASK_64
+    return x ^ (x >> 31)
+
+
+_MASK_64 = (1 << 64) - 1
+_MASK_32 = (1 << 32) - 1
+
+
+def cell_key(value, row, col):
+    """
+    Zobrist key of one stone, computed rather than tabulated
+
+    Used directly by sparse boards, which are too large for zobrist_keys()
+    tables; the tables hold the same keys, so every backend hashes a position
+    alike. The keys are the same in every process.
+    """
+    return _mix64(_mix64((value << 64) | ((row & _MASK_32) << 32) | (col & _MASK_32)))
+
+
+class _LazyTable(dict):
+    """Per-cell table filled on first use, for boards too large to tabulate"""
+
+    def __init__(self, compute):
+        super().__init__()
+        self._compute = compute
+
+    def __missing__(self, key):
+        value = self[key] = self._compute(key)
+        return value
+
+
+# Cell index layout of unbounded boards: idx = (row + _ORIGIN) * _STRIDE + col + _ORIGIN
+_STRIDE = 1 << 32
+_ORIGIN = 1 << 31
+
+_neighbour_tables = {}
+
+
+def neighbour_cells(board_size, radius):
+    """
+    Cells around each cell of the board
+
+    Returns:
+        list - For every flat cell index, a tuple of the flat indices within
+               `radius` rows and columns of it (the cell itself excluded)
+    """
+    key = (board_size, radius)
+    if key not in _neighbour_tables:
+        table = []
+        for row in range(board_size):
+            for col in range(board_size):
+                table.append(tuple(
+                    r * board_size + c
+                    for r in range(max(0, row - radius), min(board_size, row + radius + 1))
+                    for c in range(max(0, col - radius), min(board_size, col + radius + 1))
+                    if (r, c) != (row, col)
+                ))
+        _neighbour_tables[key] = table
+    return _neighbour_tables[key]
+
+
+class GameSnapshot:
+    """
+    Immutable checkpoint of a GomokuGame, taken in O(1) by snapshot()
+    - The move list is a chain of (previous, row, col) links shared with
+      the game and with other snapshots, so nothing is copied
+    - The board is rebuilt from the moves on first use and kept as packed
+      bytes (one byte per cell)
+    - GomokuGame.restore() returns a game to the position
+    """
+
+    __slots__ = ('board_size', 'rule', 'move_count', 'current_player', 'game_over', 'winner',
+                 'position_hash', '_chain', '_packed')
+
+    def __init__(self, game):
+        """Record the current position of a game"""
+        set_field = object.__setattr__
+        set_field(self, 'board_size', game.board_size)
+        set_field(self, 'rule', game.rule)
+        set_field(self, 'move_count', len(game.move_history))
+        set_field(self, 'current_player', game.current_player)
+        set_field(self, 'game_over', game.game_over)
+        set_field(self, 'winner', game.winner)
+        set_field(self, 'position_hash', game.position_hash)
+        set_field(self, '_chain', game._chain)
+        set_field(self, '_packed', None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("GameSnapshot is immutable")
+
+    def __repr__(self):
+        return (f"GameSnapshot(moves={self.move_count}, current_player={self.current_player.name}, "
+                f"game_over={self.game_over})")
+
+    @property
+    def moves(self):
+        """Moves from the start of the game as a tuple of (row, col), O(moves)"""
+        moves = []
+        link = self._chain
+        while link is not None:
+            link, row, col = link
+            moves.append((row, col))
+        moves.reverse()
+        return tuple(moves)
+
+    @property
+    def last_move(self):
+        """Last move played, or None at the start of the game"""
+        return None if self._chain is None else self._chain[1:]
+
+    @property
+    def packed(self):
+        """Board as bytes of Player values, row by row (not on unbounded boards)"""
+        if self._packed is None:
+            if self.board_size is None:
+                raise ValueError("An unbounded board has no dense array; use moves")
+            flat = bytearray(self.board_size * self.board_size)
+            value = 1 if self.move_count % 2 else 2  # Player of the last move
+            link = self._chain
+            while link is not None:
+                link, row, col = link
+                flat[row * self.board_size + col] = value
+                value = 3 - value
+            object.__setattr__(self, '_packed', bytes(flat))
+        return self._packed
+
+    def get_board(self):
+        """Board as a new (size, size) np.int8 array"""
+        board = np.frombuffer(self.packed, dtype=np.int8)
+        return board.reshape(self.board_size, self.board_size).copy()
+
+
 class GomokuGame:
     """
     Core Gomoku Game Logic
     - Manages board state
     - Enforces game rules
     - Detects win conditions
+    - With the "sparse" backend, move making, win checks, candidate
+      generation and get_game_state() cost O(stones), also on huge or
+      unbounded boards
     """
 
-    def __init__(self, board_size=15):
-        """Initialize the game"""
+    def __init__(self, board_size=15, backend="numpy", candidate_radius=2, rule="freestyle"):
+        """
+        Initialize the game
+
+        Args:
+            board_size: Number of rows and columns, or None for an unbounded
+                board (always stored sparse, with any integer coordinates)
+            backend: Board storage - "numpy" (dense array), "bitboard"
+                (one int per player, much faster for search and self-play)
+                or "sparse" (dict of stones, for very large boards)
+            candidate_radius: Empty cells within this many rows/columns of a
+                stone are returned by candidate_moves()
+            rule: "freestyle" or "renju" (see RULES)
+        """
+        if rule not in RULES:
+            raise ValueError(f"Unknown rule: {rule!r} (expected one of {', '.join(RULES)})")
+        if board_size is None:
+            backend = "sparse"
+            if rule != "freestyle":
+                raise ValueError("Renju needs a bounded board")
         self.board_size = board_size
-        self.board = np.zeros((self.board_size, self.board_size), dtype=np.int8)
+        self.backend = backend
+        self.rule = rule
+        # Line codes for the forbidden-move checks, only kept under Renju
+        self._renju = RenjuRules(board_size) if rule == "renju" else None
+        self.candidate_radius = candidate_radius
+        self._board = create_board(backend, board_size)
+        self._hashes = [0] * 8  # Hash of the board under each symmetry
+        self._candidates = set()
+        if backend == "sparse":
+            self._init_sparse_tables()
+        else:
+            # Cell index: row * board_size + col
+            self._stride, self._origin = board_size, 0
+            self._symmetric_keys = symmetric_zobrist_keys(board_size)
+            self._transforms = symmetry_transforms(board_size)
+            self._neighbours = neighbour_cells(board_size, candidate_radius)
+            self._near = [0] * (board_size * board_size)
         self.current_player = Player.BLACK
         self.game_over = False
         self.winner = None
         self.move_history = []
+        self._chain = None  # move_history as (previous, row, col) links, see GameSnapshot
+        self._redo = []     # (position hash, move) taken back by take_back(), latest last
+        self._listeners = []
+
+    def _init_sparse_tables(self):
+        """Per-cell tables filled as cells come into play, so memory follows the stones"""
+        size = self.board_size
+        radius = self.candidate_radius
+        if size is None:
+            self._stride, self._origin = _STRIDE, _ORIGIN
+            # No edges, so no symmetries: all 8 hashes stay equal
+            self._transforms = (lambda r, c: (r, c),) * 8
+        else:
+            self._stride, self._origin = size, 0
+            self._transforms = symmetry_transforms(size)
+        stride, origin = self._stride, self._origin
+        transforms = self._transforms
+
+        def symmetric_keys(value):
+            def compute(idx):
+                row, col = divmod(idx, stride)
+                row -= origin
+                col -= origin
+                if size is None:
+                    return (cell_key(value, row, col),) * 8
+                return tuple(cell_key(value, *transform(row, col)) for transform in transforms)
+            return _LazyTable(compute)
+
+        def neighbours(idx):
+            row, col = divmod(idx, stride)
+            return tuple(
+                idx + dr * stride + dc
+                for dr in range(-radius, radius + 1)
+                for dc in range(-radius, radius + 1)
+                if (dr or dc) and (size is None or (0 <= row - origin + dr < size
+                                                    and 0 <= col - origin + dc < size))
+            )
+
+        self._symmetric_keys = [None, symmetric_keys(1), symmetric_keys(2)]
+        self._neighbours = _LazyTable(neighbours)
+        self._near = defaultdict(int)
+
+    def _in_bounds(self, row, col):
+        """True if (row, col) is a cell of the board"""
+        size = self.board_size
+        if size is None:
+            return -_ORIGIN <= row < _ORIGIN and -_ORIGIN <= col < _ORIGIN
+        return 0 <= row < size and 0 <= col < size
+
+    def add_listener(self, listener):
+        """
+        Register an object to be told about board changes
+
+        The listener must provide on_move(row, col, value),
+        on_undo(row, col, value) and on_reset(), which are called after the
+        game state has been updated. `value` is the Player value of the stone.
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """Unregister a listener added with add_listener()"""
+        self._listeners.remove(listener)
 
     def make_move(self, row, col):
         """
@@ -45,55 +395,215 @@ class GomokuGame:
                 - result: str - Message describing the result
         """
         # Validate coordinates
-        if not (0 <= row < self.board_size and 0 <= col < self.board_size):
+        if not self._in_bounds(row, col):
             return False, "Invalid coordinates"
 
+        board = self._board
+        player = self.current_player
+
         # Check if position is empty
-        if self.board[row, col] != Player.EMPTY.value:
+        if board.get(row, col) != _EMPTY:
             return False, "Position already occupied"
 
         # Place the piece
-        self.board[row, col] = self.current_player.value
+        value = _VALUES[player]
+        origin = self._origin
+        stride = self._stride
+        idx = (row + origin) * stride + col + origin
+        renju = self._renju
+        if renju is not None:
+            if player is Player.BLACK:
+                reason = renju.forbidden(idx)
+                if reason is not None:
+                    return False, f"Forbidden move ({reason})"
+            renju.place(idx, value)
+        board.place(row, col, value)
         self.move_history.append((row, col))
+        self._chain = (self._chain, row, col)
+        self._hashes = [h ^ k for h, k in zip(self._hashes, self._symmetric_keys[value][idx])]
+
+        # Update the neighbourhood index
+        near = self._near
+        candidates = self._candidates
+        candidates.discard(idx)
+        for cell in self._neighbours[idx]:
+            near[cell] += 1
+            if near[cell] == 1 and board.get(cell // stride - origin, cell % stride - origin) == _EMPTY:
+                candidates.add(cell)
 
         # Check for win
-        if self.check_win(row, col, self.current_player):
+        if self.check_win(row, col, player):
             self.game_over = True
-            self.winner = self.current_player
-            return True, "WIN"
+            self.winner = player
+            result = "WIN"
+        else:
+            # Switch player
+            self.current_player = Player.WHITE if player is Player.BLACK else Player.BLACK
+            result = "OK"
 
-        # Switch player
-        self.current_player = Player.WHITE if self.current_player == Player.BLACK else Player.BLACK
-        return True, "OK"
+        for listener in self._listeners:
+            listener.on_move(row, col, value)
+        return True, result
 
-    def undo_move(self):
+    def undo_move(self, plies=2):
         """
-        Undo the last move
+        Undo the last moves
+
+        Args:
+            plies: Number of moves to take back (default 2, one from each player)
 
         Returns:
             tuple: (success, result)
                 - success: bool - True if undo was successful
                 - result: str - Message describing the result
         """
-        if len(self.move_history) < 2:
+        if plies < 1 or len(self.move_history) < plies:
             return False, "Not enough moves to undo"
 
-        if self.game_over:
-            return False, "Cannot undo after game over"
+        for _ in range(plies):
+            last_row, last_col = self.move_history.pop()
+            self._chain = self._chain[0]
+            self._board.remove(last_row, last_col)
+            # Black made the moves at even positions of the history
+            value = 1 if len(self.move_history) % 2 == 0 else 2
+            idx = (last_row + self._origin) * self._stride + last_col + self._origin
+            self._hashes = [h ^ k for h, k in zip(self._hashes, self._symmetric_keys[value][idx])]
+            if self._renju is not None:
+                self._renju.remove(idx, value)
+
+            near = self._near
+            candidates = self._candidates
+            for cell in self._neighbours[idx]:
+                near[cell] -= 1
+                if not near[cell]:
+                    candidates.discard(cell)
+            if near[idx]:
+                candidates.add(idx)
+
+            # Play stops at the first five, so any undo reopens the game
+            self.game_over = False
+            self.winner = None
+            self.current_player = Player.BLACK if value == 1 else Player.WHITE
+
+            for listener in self._listeners:
+                listener.on_undo(last_row, last_col, value)
 
-        # Remove last two moves (one from each player)
-        last_row, last_col = self.move_history.pop()
-        self.board[last_row, last_col] = Player.EMPTY.value
+        return True, "OK"
 
-        last_row, last_col = self.move_history.pop()
-        self.board[last_row, last_col] = Player.EMPTY.value
+    def take_back(self, plies=1):
+        """
+        Undo moves as a player would, so that redo_move() can replay them
 
-        # Reset game over state
-        if len(self.move_history) > 0:
-            self.current_player = Player.BLACK if len(self.move_history) % 2 == 1 else Player.WHITE
-        else:
-            self.current_player = Player.BLACK
+        undo_move() is the primitive used by searches and leaves the redo
+        stack alone. Redo entries remember the position they apply to, so
+        any different move made afterwards makes them stale; stale entries
+        are dropped here before new ones are added.
+
+        Args:
+            plies: Number of moves to take back
+
+        Returns:
+            tuple: (success, result) as for undo_move
+        """
+        if plies < 1 or len(self.move_history) < plies:
+            return False, "Not enough moves to undo"
+        if self._redo and self._redo[-1][0] != self._hashes[0]:
+            self._redo = []
+        for _ in range(plies):
+            move = self.move_history[-1]
+            self.undo_move(1)
+            self._redo.append((self._hashes[0], move))
+        return True, "OK"
+
+    @property
+    def can_redo(self):
+        """True if redo_move() can replay a move taken back at this position"""
+        return bool(self._redo) and self._redo[-1][0] == self._hashes[0]
+
+    @property
+    def redo_depth(self):
+        """Number of moves redo_move() can replay from this position"""
+        return len(self._redo) if self.can_redo else 0
+
+    def redo_move(self, plies=1):
+        """
+        Replay moves taken back with take_back()
+
+        The replayed moves restore game_over and winner through make_move.
+
+        Args:
+            plies: Number of moves to replay
+
+        Returns:
+            tuple: (success, result)
+                - success: bool - True if all moves were replayed
+                - result: str - Result of the last move, or why nothing was done
+        """
+        if not self.can_redo:
+            # A different move was made since: the entries no longer apply
+            self._redo = []
+            return False, "Nothing to redo"
+        if plies < 1 or len(self._redo) < plies:
+            return False, "Not enough moves to redo"
+        result = "OK"
+        for _ in range(plies):
+            if not self.can_redo:
+                self._redo = []
+                return False, "Nothing to redo"
+            _, (row, col) = self._redo.pop()
+            _, result = self.make_move(row, col)
+        return True, result
+
+    def snapshot(self):
+        """
+        Checkpoint the position in O(1)
+
+        Returns:
+            GameSnapshot - Immutable record of the position, for restore()
+        """
+        return GameSnapshot(self)
+
+    def restore(self, snapshot):
+        """
+        Return to a snapshot of this game's line of play (or any game of
+        the same board and rule), undoing back to the last common move and
+        replaying the rest, so listeners follow the change
+
+        Args:
+            snapshot: GameSnapshot from snapshot()
 
+        Returns:
+            tuple: (success, result)
+                - success: bool - True if the position was restored
+                - result: str - Message describing the result
+        """
+        if snapshot.board_size != self.board_size or snapshot.rule != self.rule:
+            return False, "Snapshot of a different board or rule"
+
+        # Walk both chains back to a shared link; links are shared with the
+        # snapshot up to the point where the lines of play split
+        ours, theirs = self._chain, snapshot._chain
+        our_count, their_count = len(self.move_history), snapshot.move_count
+        replay = []
+        while their_count > our_count:
+            replay.append(theirs[1:])
+            theirs = theirs[0]
+            their_count -= 1
+        while our_count > their_count:
+            ours = ours[0]
+            our_count -= 1
+        while ours is not theirs:
+            replay.append(theirs[1:])
+            theirs = theirs[0]
+            ours = ours[0]
+            our_count -= 1
+
+        if our_count < len(self.move_history):
+            self.undo_move(len(self.move_history) - our_count)
+        for row, col in reversed(replay):
+            success, result = self.make_move(row, col)
+            if not success:
+                return False, f"Illegal move ({row}, {col}) in snapshot: {result}"
         return True, "OK"
 
     def check_win(self, row, col, player):
@@ -106,63 +616,203 @@ class GomokuGame:
             player: Player enum who made the move
 
         Returns:
-            bool - True if player has 5 or more in a row
+            bool - True if player has 5 or more in a row (exactly 5 for
+                   Black under Renju)
         """
-        directions = [
-            (0, 1),   # Horizontal
-            (1, 0),   # Vertical
-            (1, 1),   # Diagonal \
-            (1, -1)   # Diagonal /
-        ]
+        if self._renju is not None and player is Player.BLACK:
+            return self._renju.is_five(row * self.board_size + col)
+        return self._board.has_five(row, col, _VALUES[player])
+
+    def forbidden_reason(self, row, col, player=None):
+        """
+        Check whether a player is barred from an empty cell
 
-        for dr, dc in directions:
-            count = 1
-
-            # Count in positive direction
-            r, c = row + dr, col + dc
-            while 0 <= r < self.board_size and 0 <= c < self.board_size:
-                if self.board[r, c] == player.value:
-                    count += 1
-                    r += dr
-                    c += dc
-                else:
-                    break
-
-            # Count in negative direction
-            r, c = row - dr, col - dc
-            while 0 <= r < self.board_size and 0 <= c < self.board_size:
-                if self.board[r, c] == player.value:
-                    count += 1
-                    r -= dr
-                    c -= dc
-                else:
-                    break
-
-            if count >= 5:
-                return True
-
-        return False
+        Only Black has forbidden moves, and only under Renju.
+
+        Args:
+            row: Row index
+            col: Column index
+            player: Player to check (default: the player to move)
+
+        Returns:
+            str - "overline", "double-four" or "double-three", or None if allowed
+        """
+        if self._renju is None or (player or self.current_player) is not Player.BLACK:
+            return None
+        return self._renju.forbidden(row * self.board_size + col)
 
     def reset(self):
         """Reset the game to initial state"""
-        self.board = np.zeros((self.board_size, self.board_size), dtype=np.int8)
+        self._board.clear()
+        self._hashes = [0] * 8
+        if self._renju is not None:
+            self._renju.clear()
+        if self.backend == "sparse":
+            self._near = defaultdict(int)
+        else:
+            self._near = [0] * (self.board_size * self.board_size)
+        self._candidates = set()
         self.current_player = Player.BLACK
         self.game_over = False
         self.winner = None
         self.move_history = []
+        self._chain = None
+        self._redo = []
+
+        for listener in self._listeners:
+            listener.on_reset()
+
+    def candidate_moves(self, ordered=True):
+        """
+        Get the empty cells worth considering for the next move
+
+        The set of empty cells near a stone is maintained by make_move and
+        undo_move, so this costs O(candidates) rather than O(board).
+
+        Args:
+            ordered: Sort by the number of nearby stones, then by distance
+                to the last move (closest first)
+
+        Returns:
+            list - (row, col) tuples; the center on an empty board ((0, 0)
+                   when unbounded). Forbidden moves of Black are left out
+                   under Renju
+        """
+        size = self.board_size
+        if not self.move_history:
+            return [(0, 0)] if size is None else [(size // 2, size // 2)]
+
+        candidates = self._candidates
+        if self._renju is not None and self.current_player is Player.BLACK:
+            forbidden = self._renju.forbidden
+            candidates = [idx for idx in candidates if forbidden(idx) is None]
+
+        stride, origin = self._stride, self._origin
+        if not ordered:
+            if not origin:
+                return [divmod(idx, stride) for idx in candidates]
+            return [(idx // stride - origin, idx % stride - origin) for idx in candidates]
+
+        near = self._near
+        last_row, last_col = self.move_history[-1]
+        moves = []
+        for idx in candidates:
+            row, col = idx // stride - origin, idx % stride - origin
+            distance = max(abs(row - last_row), abs(col - last_col))
+            moves.append((-near[idx], distance, row, col))
+        moves.sort()
+        return [(row, col) for _, _, row, col in moves]
+
+    @property
+    def position_hash(self):
+        """
+        64-bit Zobrist hash of the stones on the board
+
+        Updated incrementally by make_move/undo_move/reset. The player to
+        move is not hashed separately since it follows from the stone count.
+        """
+        return self._hashes[0]
+
+    @property
+    def symmetric_hashes(self):
+        """Hashes of the board under each of the 8 symmetries (index as in SYMMETRIES)"""
+        return tuple(self._hashes)
+
+    def canonical(self):
+        """
+        Canonical form of the position: the smallest of the 8 symmetric hashes
+
+        Symmetric positions share the same canonical hash, so caches and
+        books keyed by it store each position once.
+
+        Returns:
+            tuple: (hash, transform) - the canonical hash and the symmetry
+                   that maps this board onto the canonical board
+        """
+        hashes = self._hashes
+        key = min(hashes)
+        return key, hashes.index(key)
+
+    @property
+    def canonical_hash(self):
+        """Hash shared by all 8 symmetric forms of the position"""
+        return min(self._hashes)
+
+    def transform_move(self, row, col, transform):
+        """
+        Map a move into another frame
+
+        Args:
+            row, col: Cell on this board
+            transform: Symmetry index, e.g. from canonical(); use
+                INVERSE_SYMMETRY[transform] to map back
+
+        Returns:
+            tuple: (row, col) of the image cell (unchanged on an unbounded
+                   board, which has no symmetries)
+        """
+        return self._transforms[transform](row, col)
+
+    def get_canonical_board(self):
+        """Board array seen in the canonical frame (e.g. for training data)"""
+        _, transform = self.canonical()
+        size = self.board_size
+        flat = np.empty(size * size, dtype=np.int8)
+        flat[list(symmetry_tables(size)[transform])] = self.get_board().ravel()
+        return flat.reshape(size, size)
+
+    @property
+    def board(self):
+        """
+        Board as a NumPy array
+
+        With the "numpy" backend this is the live array; other backends
+        return a fresh copy, so use make_move() to change the position.
+        """
+        if self.backend == "numpy":
+            return self._board.array
+        return self._board.to_array()
 
     def get_board(self):
-        """Get current board state"""
-        return self.board.copy()
+        """Get current board state (a dense array, so not on unbounded boards)"""
+        return self._board.to_array()
+
+    def get_stones(self):
+        """
+        Get the stones on the board in O(stones)
+
+        Returns:
+            dict - (row, col) -> Player value
+        """
+        if self.backend == "sparse":
+            return dict(self._board.stones)
+        return {move: 1 if i % 2 == 0 else 2 for i, move in enumerate(self.move_history)}
+
+    @property
+    def bounds(self):
+        """(min_row, min_col, max_row, max_col) of the stones, or None on an empty board"""
+        if self.backend == "sparse":
+            return self._board.bounds
+        if not self.move_history:
+            return None
+        rows = [row for row, _ in self.move_history]
+        cols = [col for _, col in self.move_history]
+        return min(rows), min(cols), max(rows), max(cols)
 
     def get_move_history(self):
         """Get list of all moves made"""
         return self.move_history.copy()
 
     def get_game_state(self):
-        """Get complete game state"""
+        """
+        Get complete game state
+
+        With the "sparse" backend, 'board' is the get_stones() dict instead
+        of a dense array, so the state costs O(stones) on any board size.
+        """
+        sparse = self.backend == "sparse"
         return {
-            'board': self.get_board(),
+            'board': self.get_stones() if sparse else self.get_board(),
             'current_player': self.current_player,
             'game_over': self.game_over,
             'winner': self.winner,
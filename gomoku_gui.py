@@ -3,19 +3,29 @@ Gomoku Game GUI
 Tkinter-based graphical user interface for Gomoku game
 """
 
+import argparse
 import tkinter as tk
-from tkinter import messagebox
+from tkinter import filedialog, messagebox, simpledialog
+from gomoku_ai import WIN_SCORE
+from gomoku_engine import EngineProcess
 from gomoku_game import GomokuGame, Player
+from gomoku_record import GameRecordReader
 
 
 class GomokuGUI:
     """
     Gomoku Game with Tkinter GUI - Premium Modern Design
-    - Beautiful graphical 15x15 board with enhanced visuals
+    - Beautiful graphical board with enhanced visuals; large and unbounded
+      boards are shown through a scrolling, zooming viewport that only
+      draws the visible cells
     - Mouse click to place pieces with smooth animations
     - Real-time win detection with visual effects
     - Modern premium UI with gradient-like effects
     - Dark theme with elegant color scheme
+    - Optional computer opponent searching in a worker process, so the
+      board stays responsive while it thinks
+    - Replay viewer for game record files with an evaluation graph that is
+      filled in the background
     """
 
     # Premium color scheme - Dark theme with gradient
@@ -30,22 +40,61 @@ class GomokuGUI:
     SUCCESS_COLOR = "#4ecca3"      # Green for success
     INFO_COLOR = "#6fa8dc"         # Blue for info
 
-    def __init__(self, root):
-        """Initialize the GUI"""
+    AI_TIME_LIMIT = 2.0            # Seconds per computer move
+    PONDER = True                  # Search the expected reply while the player thinks
+    POLL_MS = 50                   # Interval of checking the engine for news
+    EVAL_TIME_LIMIT = 0.1          # Seconds per position of the replay evaluation graph
+    REPLAY_SPEEDS = (2, 10, 100, 500)  # Autoplay speeds in moves per second
+
+    VIEW_CELLS = 15                # Cells across the viewport at full zoom
+    MAX_CELL_SIZE = 50             # Pixels per cell at full zoom
+    MIN_CELL_SIZE = 6
+    ZOOM_STEP = 1.25
+
+    def __init__(self, root, board_size=15, backend="numpy"):
+        """
+        Initialize the GUI
+
+        Args:
+            root: Tk root window
+            board_size: Number of rows and columns, None for an unbounded board
+            backend: Board storage of the game ("sparse" for very large boards)
+        """
         self.root = root
         self.root.title("⚫ Gomoku Game - Five in a Row Strategy Game")
         self.root.resizable(False, False)
 
         # Game engine
-        self.game = GomokuGame(board_size=15)
-        self.cell_size = 50
-
-        # 计算合适的窗口大小：棋盘大小 + UI 边距
-        canvas_size = self.cell_size * self.game.board_size + 30  # 棋盘大小
-        window_height = 100 + 20 + canvas_size + 80 + 30  # header + margin + canvas + status + padding
+        self.game = GomokuGame(board_size=board_size, backend=backend)
+        self.cell_size = self.MAX_CELL_SIZE
+
+        # Viewport: the cell drawn at the top left corner and the number of
+        # cells across the canvas at full zoom
+        size = self.game.board_size
+        self.view_cells = self.VIEW_CELLS if size is None else min(size, self.VIEW_CELLS)
+        self.view_row = self.view_col = 0
+        self._pan_start = None
+
+        # Computer opponent (started on first use)
+        self.engine = None
+        self.ai_player = None
+        self._spinner = 0
+
+        # Replay viewer (replay_moves is None outside replay mode)
+        self.replay_moves = None
+        self.replay_winner = None
+        self.replay_evals = {}
+        self.replay_speed = self.REPLAY_SPEEDS[0]
+        self._eval_ply = None
+        self._autoplay_id = None
+
+        # 计算合适的窗口大小：视口大小 + UI 边距
+        canvas_size = self.cell_size * self.view_cells + 30  # 视口大小
+        window_height = 100 + 20 + canvas_size + 80 + 70 + 30  # header + margin + canvas + status + engine/replay + padding
         window_width = canvas_size + 30
         self.root.geometry(f"{window_width}x{window_height}")
         self.root.configure(bg=self.BG_COLOR)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
         # Setup UI
         self._create_ui()
@@ -68,8 +117,14 @@ class GomokuGUI:
         # Create status frame
         self._create_status_frame()
 
-        # Draw initial board
-        self.draw_board()
+        # Create engine frame (swapped with the replay frame in replay mode)
+        self._create_engine_frame()
+        self._create_replay_frame()
+
+        # Draw the board once; stones follow the game's move events
+        center = 0 if self.game.board_size is None else self.game.board_size // 2
+        self.center_view(center, center)
+        self.game.add_listener(self)
 
     def _create_header(self):
         """Create header section with premium title design"""
@@ -157,6 +212,57 @@ class GomokuGUI:
         )
         self.undo_button.pack(side=tk.LEFT, padx=5)
 
+        # Redo button
+        self.redo_button = tk.Button(
+            right_buttons,
+            text="↷ Redo",
+            font=("Arial", 10, "bold"),
+            command=self.redo_move,
+            bg="#6fa8dc",
+            fg="white",
+            padx=15,
+            pady=8,
+            relief=tk.FLAT,
+            cursor="hand2",
+            activebackground="#85b9e8",
+            activeforeground="white"
+        )
+        self.redo_button.pack(side=tk.LEFT, padx=5)
+
+        # Computer opponent toggle
+        self.ai_button = tk.Button(
+            right_buttons,
+            text="🤖 vs AI",
+            font=("Arial", 10, "bold"),
+            command=self.toggle_ai,
+            bg=self.SUCCESS_COLOR,
+            fg="white",
+            padx=15,
+            pady=8,
+            relief=tk.FLAT,
+            cursor="hand2",
+            activebackground="#6fdcb8",
+            activeforeground="white"
+        )
+        self.ai_button.pack(side=tk.LEFT, padx=5)
+
+        # Replay viewer
+        self.replay_button = tk.Button(
+            right_buttons,
+            text="📼 Replay",
+            font=("Arial", 10, "bold"),
+            command=self.open_replay,
+            bg=self.INFO_COLOR,
+            fg="white",
+            padx=15,
+            pady=8,
+            relief=tk.FLAT,
+            cursor="hand2",
+            activebackground="#85b9e8",
+            activeforeground="white"
+        )
+        self.replay_button.pack(side=tk.LEFT, padx=5)
+
         # Reset button with enhanced style
         self.reset_button = tk.Button(
             right_buttons,
@@ -175,9 +281,10 @@ class GomokuGUI:
         self.reset_button.pack(side=tk.LEFT, padx=5)
 
     def _create_canvas(self):
-        """Create canvas for the game board"""
-        canvas_width = self.game.board_size * self.cell_size + 20
-        canvas_height = self.game.board_size * self.cell_size + 20
+        """Create canvas for the game board (the viewport)"""
+        canvas_width = self.view_cells * self.cell_size + 20
+        canvas_height = self.view_cells * self.cell_size + 20
+        self.canvas_pixels = canvas_width
 
         self.canvas = tk.Canvas(
             self.main_frame,
@@ -192,6 +299,16 @@ class GomokuGUI:
         self.canvas.bind("<Button-1>", self.on_canvas_click)
         self.canvas.bind("<Motion>", self.on_canvas_motion)
 
+        # Viewport navigation: wheel zooms, right button drags, arrow keys scroll
+        self.canvas.bind("<MouseWheel>", lambda event: self.zoom(event.delta > 0, event.x, event.y))
+        self.canvas.bind("<Button-4>", lambda event: self.zoom(True, event.x, event.y))
+        self.canvas.bind("<Button-5>", lambda event: self.zoom(False, event.x, event.y))
+        self.canvas.bind("<ButtonPress-3>", self.on_pan_start)
+        self.canvas.bind("<B3-Motion>", self.on_pan_motion)
+        for key, (rows, cols) in {"<Left>": (0, -1), "<Right>": (0, 1),
+                                  "<Up>": (-1, 0), "<Down>": (1, 0)}.items():
+            self.root.bind(key, lambda event, rows=rows, cols=cols: self.scroll_view(rows, cols))
+
     def _create_status_frame(self):
         """Create premium status frame for messages"""
         self.status_frame = tk.Frame(self.main_frame, bg=self.ACCENT_COLOR, height=70)
@@ -220,74 +337,268 @@ class GomokuGUI:
         )
         self.last_move_label.pack(fill=tk.BOTH, padx=15, pady=10, side=tk.RIGHT)
 
-    def draw_board(self):
-        """Draw the game board with enhanced visuals"""
+    def _create_engine_frame(self):
+        """Create the thinking indicator with its move-now and cancel buttons"""
+        self.engine_frame = tk.Frame(self.main_frame, bg=self.HEADER_COLOR, height=40)
+        self.engine_frame.pack(fill=tk.X, padx=5, pady=(10, 0))
+        self.engine_frame.pack_propagate(False)
+
+        self.thinking_label = tk.Label(
+            self.engine_frame,
+            text="",
+            font=("Consolas", 10),
+            bg=self.HEADER_COLOR,
+            fg=self.INFO_COLOR,
+            anchor=tk.W
+        )
+        self.thinking_label.pack(fill=tk.BOTH, expand=True, padx=15, side=tk.LEFT)
+
+        self.cancel_button = tk.Button(
+            self.engine_frame,
+            text="✖ Cancel",
+            font=("Arial", 9, "bold"),
+            command=self.cancel_ai,
+            bg=self.ACCENT_COLOR,
+            fg="white",
+            relief=tk.FLAT,
+            state=tk.DISABLED
+        )
+        self.cancel_button.pack(side=tk.RIGHT, padx=5, pady=5)
+
+        self.move_now_button = tk.Button(
+            self.engine_frame,
+            text="⏩ Move now",
+            font=("Arial", 9, "bold"),
+            command=self.force_ai_move,
+            bg=self.ACCENT_COLOR,
+            fg="white",
+            relief=tk.FLAT,
+            state=tk.DISABLED
+        )
+        self.move_now_button.pack(side=tk.RIGHT, padx=5, pady=5)
+
+    def _create_replay_frame(self):
+        """Create the replay controls and the evaluation graph (packed in replay mode)"""
+        self.replay_frame = tk.Frame(self.main_frame, bg=self.HEADER_COLOR, height=60)
+        self.replay_frame.pack_propagate(False)
+
+        buttons = [
+            ("⏮", lambda: self.goto_ply(0)),
+            ("◀", lambda: self.replay_step(-1)),
+            ("⏯", self.toggle_autoplay),
+            ("▶", lambda: self.replay_step(1)),
+            ("⏭", lambda: self.goto_ply(len(self.replay_moves))),
+        ]
+        for text, command in buttons:
+            tk.Button(self.replay_frame, text=text, font=("Arial", 11), command=command,
+                      bg=self.ACCENT_COLOR, fg="white", relief=tk.FLAT,
+                      width=2).pack(side=tk.LEFT, padx=2, pady=12)
+
+        self.speed_button = tk.Button(
+            self.replay_frame, text=f"{self.replay_speed}/s", font=("Arial", 9, "bold"),
+            command=self.cycle_replay_speed, bg=self.ACCENT_COLOR, fg="white",
+            relief=tk.FLAT, width=5)
+        self.speed_button.pack(side=tk.LEFT, padx=(6, 2), pady=12)
+
+        self.ply_label = tk.Label(self.replay_frame, text="", font=("Consolas", 10),
+                                  bg=self.HEADER_COLOR, fg=self.TEXT_COLOR, width=8)
+        self.ply_label.pack(side=tk.LEFT, padx=4)
+
+        tk.Button(self.replay_frame, text="✖", font=("Arial", 11), command=self.close_replay,
+                  bg=self.BUTTON_COLOR, fg="white", relief=tk.FLAT,
+                  width=2).pack(side=tk.RIGHT, padx=6, pady=12)
+
+        # Evaluation graph, doubling as a scrub bar
+        self.graph = tk.Canvas(self.replay_frame, height=48, bg=self.BG_COLOR,
+                               highlightthickness=0, cursor="sb_h_double_arrow")
+        self.graph.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=4, pady=6)
+        self.graph.bind("<Button-1>", self.on_graph_click)
+        self.graph.bind("<B1-Motion>", self.on_graph_click)
+        self.graph.bind("<Configure>", lambda event: self.draw_eval_graph())
+
+    def _span(self):
+        """Number of cells across the viewport at the current zoom"""
+        return (self.canvas_pixels - 20) // self.cell_size + 1
+
+    def _to_pixel(self, row, col):
+        """Canvas position of a cell"""
+        return (10 + (col - self.view_col) * self.cell_size,
+                10 + (row - self.view_row) * self.cell_size)
+
+    def _visible(self, row, col):
+        """True if the cell is inside the viewport"""
+        span = self._span()
+        return (self.view_row <= row < self.view_row + span
+                and self.view_col <= col < self.view_col + span)
+
+    def _star_points(self):
+        """Star points of the board (the origin of an unbounded board)"""
+        size = self.game.board_size
+        if size is None:
+            return [(0, 0)]
+        if size < 9:
+            return []
+        edge = 3 if size < 19 else 4
+        far = size - 1 - edge
+        return [(edge, edge), (edge, far), (size // 2, size // 2), (far, edge), (far, far)]
+
+    def draw_static_board(self):
+        """Draw the background, grid and star points of the visible cells"""
         self.canvas.delete("all")
+        span = self._span()
+        size = self.game.board_size
+        rows = range(self.view_row, self.view_row + span)
+        cols = range(self.view_col, self.view_col + span)
+        if size is not None:
+            rows = range(max(rows.start, 0), min(rows.stop, size))
+            cols = range(max(cols.start, 0), min(cols.stop, size))
+
+        if rows and cols:
+            # Draw board background with shadow
+            board_x1, board_y1 = self._to_pixel(rows[0], cols[0])
+            board_x2, board_y2 = self._to_pixel(rows[-1], cols[-1])
+            board_x1 -= 5
+            board_y1 -= 5
+            board_x2 += 5
+            board_y2 += 5
+
+            self.canvas.create_rectangle(board_x1 + 2, board_y1 + 2, board_x2, board_y2,
+                                         fill="#c9956f", outline="", tags="grid")
+            self.canvas.create_rectangle(board_x1, board_y1, board_x2 - 2, board_y2 - 2,
+                                         fill="#d4a574", outline="", tags="grid")
+
+            # Draw grid lines
+            x1, y1 = self._to_pixel(rows[0], cols[0])
+            x2, y2 = self._to_pixel(rows[-1], cols[-1])
+            for col in cols:
+                x, _ = self._to_pixel(0, col)
+                line_width = 2 if size is not None and col in (0, size - 1) else 1
+                self.canvas.create_line(x, y1, x, y2, fill="#7a6048", width=line_width, tags="grid")
+            for row in rows:
+                _, y = self._to_pixel(row, 0)
+                line_width = 2 if size is not None and row in (0, size - 1) else 1
+                self.canvas.create_line(x1, y, x2, y, fill="#7a6048", width=line_width, tags="grid")
+
+        # Draw star points
+        for row, col in self._star_points():
+            if self._visible(row, col):
+                x, y = self._to_pixel(row, col)
+                self.canvas.create_oval(x - 4, y - 4, x + 4, y + 4,
+                                        fill="#8B7355", outline="#6a5644", width=1, tags="grid")
+
+        # Last move indicator, created once at the top left cell and moved around
+        self._marker_pos = (self.view_row, self.view_col)
+        x = y = 10
+        self.canvas.create_rectangle(x - 6, y - 6, x + 6, y + 6,
+                                    outline="#ff9800", width=2, tags="last_move")
+
+        # Draw corner marks
+        offset = 6
+        for dx, dy in [(-1, -1), (1, -1), (-1, 1), (1, 1)]:
+            self.canvas.create_line(x + dx * offset, y + dy * (offset - 2),
+                                   x + dx * offset, y + dy * offset,
+                                   fill="#ff9800", width=2, tags="last_move")
+            self.canvas.create_line(x + dx * (offset - 2), y + dy * offset,
+                                   x + dx * offset, y + dy * offset,
+                                   fill="#ff9800", width=2, tags="last_move")
+        self.canvas.itemconfigure("last_move", state=tk.HIDDEN)
 
-        # Draw board background with shadow
-        board_x1 = 5
-        board_y1 = 5
-        board_x2 = 10 + (self.game.board_size - 1) * self.cell_size + 5
-        board_y2 = 10 + (self.game.board_size - 1) * self.cell_size + 5
+    def draw_board(self):
+        """Redraw the visible stones from the game state (for changes made without move events)"""
+        self.canvas.delete("stone")
+        for (row, col), value in self.game.get_stones().items():
+            if self._visible(row, col):
+                self.draw_piece(row, col, value)
+        self._update_last_move_marker()
+
+    def _update_last_move_marker(self):
+        """Move the last move indicator to the latest stone, or hide it"""
+        if not self.game.move_history or not self._visible(*self.game.move_history[-1]):
+            self.canvas.itemconfigure("last_move", state=tk.HIDDEN)
+            return
+        row, col = self.game.move_history[-1]
+        old_row, old_col = self._marker_pos
+        self.canvas.move("last_move", (col - old_col) * self.cell_size,
+                         (row - old_row) * self.cell_size)
+        self._marker_pos = (row, col)
+        self.canvas.itemconfigure("last_move", state=tk.NORMAL)
+        self.canvas.tag_raise("last_move")
+
+    def set_view(self, row, col):
+        """Show the cells from (row, col) at the top left and redraw"""
+        size = self.game.board_size
+        if size is not None:
+            span = self._span()
+            if span >= size:
+                # Zoomed out beyond the board: keep it centred
+                row = col = -((span - size) // 2)
+            else:
+                row = max(0, min(row, size - span))
+                col = max(0, min(col, size - span))
+        self.view_row, self.view_col = row, col
+        self.draw_static_board()
+        self.draw_board()
 
-        self.canvas.create_rectangle(board_x1 + 2, board_y1 + 2, board_x2, board_y2,
-                                     fill="#c9956f", outline="")
-        self.canvas.create_rectangle(board_x1, board_y1, board_x2 - 2, board_y2 - 2,
-                                     fill="#d4a574", outline="")
+    def center_view(self, row, col):
+        """Scroll so that a cell is in the middle of the viewport"""
+        half = self._span() // 2
+        self.set_view(row - half, col - half)
 
-        # Draw grid lines
-        for i in range(self.game.board_size):
-            x = 10 + i * self.cell_size
-            y = 10 + i * self.cell_size
-            line_width = 2 if i == 0 or i == self.game.board_size - 1 else 1
+    def scroll_view(self, rows, cols):
+        """Scroll by a number of cells"""
+        self.set_view(self.view_row + rows, self.view_col + cols)
 
-            # Vertical lines
-            self.canvas.create_line(x, 10, x, 10 + (self.game.board_size - 1) * self.cell_size,
-                                   fill="#7a6048", width=line_width)
+    def zoom(self, zoom_in, x, y):
+        """Zoom in or out, keeping the cell under the mouse in place"""
+        old = self.cell_size
+        if zoom_in:
+            size = min(self.MAX_CELL_SIZE, round(old * self.ZOOM_STEP))
+        else:
+            size = max(self.MIN_CELL_SIZE, round(old / self.ZOOM_STEP))
+        if size == old:
+            return
+        row = self.view_row + (y - 10) / old
+        col = self.view_col + (x - 10) / old
+        self.cell_size = size
+        self.set_view(round(row - (y - 10) / size), round(col - (x - 10) / size))
+
+    def on_pan_start(self, event):
+        """Start dragging the viewport"""
+        self._pan_start = (event.x, event.y, self.view_row, self.view_col)
+
+    def on_pan_motion(self, event):
+        """Drag the viewport by whole cells"""
+        if self._pan_start is None:
+            return
+        x, y, row, col = self._pan_start
+        rows = round((y - event.y) / self.cell_size)
+        cols = round((x - event.x) / self.cell_size)
+        if (row + rows, col + cols) != (self.view_row, self.view_col):
+            self.set_view(row + rows, col + cols)
+
+    def on_move(self, row, col, value):
+        """Game listener: add the new stone, scrolling to it if it is out of view"""
+        if not self._visible(row, col):
+            self.center_view(row, col)
+            return
+        self.draw_piece(row, col, value)
+        self._update_last_move_marker()
 
-            # Horizontal lines
-            self.canvas.create_line(10, y, 10 + (self.game.board_size - 1) * self.cell_size, y,
-                                   fill="#7a6048", width=line_width)
+    def on_undo(self, row, col, value):
+        """Game listener: remove the stone taken back"""
+        self.canvas.delete(f"stone_{row}_{col}")
+        self._update_last_move_marker()
 
-        # Draw star points
-        star_positions = [(3, 3), (3, 11), (7, 7), (11, 3), (11, 11)]
-        for row, col in star_positions:
-            x = 10 + col * self.cell_size
-            y = 10 + row * self.cell_size
-            self.canvas.create_oval(x - 4, y - 4, x + 4, y + 4,
-                                   fill="#8B7355", outline="#6a5644", width=1)
-
-        # Draw pieces
-        board = self.game.get_board()
-        for row in range(self.game.board_size):
-            for col in range(self.game.board_size):
-                if board[row, col] != Player.EMPTY.value:
-                    self.draw_piece(row, col, board[row, col])
-
-        # Draw last move indicator
-        if self.game.move_history:
-            last_row, last_col = self.game.move_history[-1]
-            x = 10 + last_col * self.cell_size
-            y = 10 + last_row * self.cell_size
-
-            self.canvas.create_rectangle(x - 6, y - 6, x + 6, y + 6,
-                                        outline="#ff9800", width=2)
-
-            # Draw corner marks
-            offset = 6
-            for dx, dy in [(-1, -1), (1, -1), (-1, 1), (1, 1)]:
-                self.canvas.create_line(x + dx * offset, y + dy * (offset - 2),
-                                       x + dx * offset, y + dy * offset,
-                                       fill="#ff9800", width=2)
-                self.canvas.create_line(x + dx * (offset - 2), y + dy * offset,
-                                       x + dx * offset, y + dy * offset,
-                                       fill="#ff9800", width=2)
+    def on_reset(self):
+        """Game listener: clear all stones"""
+        self.canvas.delete("stone")
+        self.canvas.itemconfigure("last_move", state=tk.HIDDEN)
 
     def draw_piece(self, row, col, player_value):
         """Draw a piece on the board with premium 3D effect"""
-        x = 10 + col * self.cell_size
-        y = 10 + row * self.cell_size
-        radius = self.cell_size // 2 - 3
+        x, y = self._to_pixel(row, col)
+        radius = max(2, self.cell_size // 2 - 3)
+        tags = ("stone", f"stone_{row}_{col}")
 
         if player_value == Player.BLACK.value:
             color = "#0d0d0d"
@@ -304,31 +615,41 @@ class GomokuGUI:
 
         # Draw glow effect (outer shadow)
         self.canvas.create_oval(x - radius - 3, y - radius - 3, x + radius + 3, y + radius + 3,
-                               fill=glow_color, outline="")
+                               fill=glow_color, outline="", tags=tags)
 
         # Draw shadow for depth
         self.canvas.create_oval(x - radius - 1, y - radius + 1, x + radius + 1, y + radius + 3,
-                               fill=shadow_color, outline="")
+                               fill=shadow_color, outline="", tags=tags)
 
         # Draw main piece with border
         self.canvas.create_oval(x - radius, y - radius, x + radius, y + radius,
-                               fill=color, outline=outline, width=3)
+                               fill=color, outline=outline, width=3, tags=tags)
 
         # Draw highlight (glossy effect)
         highlight_radius = radius // 2
         self.canvas.create_oval(x - highlight_radius // 2, y - highlight_radius // 2 - 2,
                                x + highlight_radius // 2, y + highlight_radius // 2 - 2,
-                               fill=highlight_color, outline="")
+                               fill=highlight_color, outline="", tags=tags)
 
     def on_canvas_click(self, event):
         """Handle mouse click on canvas"""
+        if self.replay_moves is not None:
+            self.status_label.config(text="📼 Replay mode - close the replay (✖) to play",
+                                     fg=self.INFO_COLOR)
+            return
+
+        if self.engine is not None and self.engine.busy:
+            self.status_label.config(text="🤔 The computer is thinking... (Move now / Cancel)",
+                                     fg=self.INFO_COLOR)
+            return
+
         if self.game.game_over:
             messagebox.showinfo("Game Over", f"Congratulations! {self.game.winner.name} wins!")
             return
 
         # Convert pixel coordinates to board coordinates
-        col = round((event.x - 10) / self.cell_size)
-        row = round((event.y - 10) / self.cell_size)
+        col = self.view_col + round((event.x - 10) / self.cell_size)
+        row = self.view_row + round((event.y - 10) / self.cell_size)
 
         # Try to make move
         success, result = self.game.make_move(row, col)
@@ -338,8 +659,11 @@ class GomokuGUI:
             self.root.after(2000, self._update_status)
             return
 
-        # Update display
-        self.draw_board()
+        self._after_move()
+
+    def _after_move(self):
+        """Refresh the display after a move and let the computer reply"""
+        # Update display (the stone itself was drawn by on_move)
         self.update_ui()
 
         # Check for win
@@ -352,6 +676,8 @@ class GomokuGUI:
                 f"Total moves: {len(self.game.move_history)}\n\n"
                 f"Click 'Restart' to play again!"
             )
+        else:
+            self._start_ai()
 
     def on_canvas_motion(self, event):
         """Handle mouse motion on canvas"""
@@ -375,10 +701,8 @@ class GomokuGUI:
         # Update last move with enhanced display
         if self.game.move_history:
             last_row, last_col = self.game.move_history[-1]
-            # Convert to letter-number notation (common in board games)
-            col_letter = chr(65 + last_col)  # A, B, C, ...
             self.last_move_label.config(
-                text=f"Last: {col_letter}{last_row + 1}"
+                text=f"Last: {self.format_move(last_row, last_col)}"
             )
         else:
             self.last_move_label.config(text="")
@@ -386,6 +710,13 @@ class GomokuGUI:
         # Update status
         self._update_status()
 
+    def format_move(self, row, col):
+        """Convert to letter-number notation (common in board games)"""
+        size = self.game.board_size
+        if size is None or size > 26:
+            return f"{row},{col}"  # Beyond the letters
+        return f"{chr(65 + col)}{row + 1}"  # A, B, C, ...
+
     def _update_status(self):
         """Update status message"""
         if self.game.game_over:
@@ -403,36 +734,352 @@ class GomokuGUI:
 
     def undo_move(self):
         """Undo the last move"""
+        if self.replay_moves is not None:
+            self.replay_step(-1)
+            return
+
+        self.cancel_ai()
         if not self.game.move_history:
             self.status_label.config(text="❌ No moves to undo!", fg="#ff6b6b")
             self.root.after(2000, self._update_status)
             return
 
-        # Remove last two moves (current player and opponent)
-        if len(self.game.move_history) >= 1:
-            self.game.move_history.pop()
-            # Reset game_over status if it was set
-            if self.game.game_over:
-                self.game.game_over = False
-                self.game.winner = None
-
-        self.draw_board()
+        # Against the computer, take back its reply together with our move.
+        # The last mover is not always the other side: after a win
+        # current_player stays the winner
+        history = self.game.move_history
+        last_mover = Player.BLACK if len(history) % 2 else Player.WHITE
+        plies = 1
+        if self.ai_player is not None and last_mover == self.ai_player:
+            plies = min(2, len(history))
+        # The stones are removed by on_undo
+        self.game.take_back(plies)
         self.update_ui()
         self.status_label.config(text="↶ Move undone!", fg=self.SUCCESS_COLOR)
         self.root.after(1500, self._update_status)
 
+    def redo_move(self):
+        """Replay a move taken back with Undo"""
+        if self.replay_moves is not None:
+            self.replay_step(1)
+            return
+
+        if not self.game.can_redo:
+            self.status_label.config(text="❌ No moves to redo!", fg="#ff6b6b")
+            self.root.after(2000, self._update_status)
+            return
+
+        self.cancel_ai()
+        plies = 1
+        if self.ai_player is not None and self.game.current_player != self.ai_player:
+            plies = min(2, self.game.redo_depth)
+        # The stones are drawn by on_move
+        self.game.redo_move(plies)
+        self._after_move()
+
     def reset_game(self):
         """Reset the game"""
+        if self.replay_moves is not None:
+            self.close_replay()
+        self.cancel_ai()
         self.game.reset()
-        self.draw_board()
         self.update_ui()
         self.status_label.config(text="🔄 Game reset! Click to start playing.", fg=self.TEXT_COLOR)
+        self._start_ai()
+
+    def _get_engine(self):
+        """Get the engine process, starting it on first use"""
+        if self.engine is None:
+            self.engine = EngineProcess(self.game.board_size)
+        return self.engine
+
+    def toggle_ai(self):
+        """Switch the computer opponent on (taking the side not to move) or off"""
+        if self.replay_moves is not None:
+            return
+        if self.ai_player is None:
+            if self.game.board_size is None:
+                self.status_label.config(text="❌ The computer needs a bounded board",
+                                         fg="#ff6b6b")
+                self.root.after(2000, self._update_status)
+                return
+            self._get_engine()
+            self.ai_player = Player.WHITE if self.game.current_player == Player.BLACK else Player.BLACK
+            self.ai_button.config(text="👥 2 Players")
+            self.status_label.config(text=f"🤖 The computer plays {self.ai_player.name.title()}",
+                                     fg=self.SUCCESS_COLOR)
+            self.root.after(2000, self._update_status)
+        else:
+            self.cancel_ai()
+            self.ai_player = None
+            self.ai_button.config(text="🤖 vs AI")
+            self._update_status()
+
+    def _start_ai(self):
+        """Start a search if it is the computer's turn"""
+        game = self.game
+        if (self.ai_player is None or game.game_over or game.current_player != self.ai_player
+                or self.engine.busy):
+            return
+        self.engine.search(game.get_move_history(), self.AI_TIME_LIMIT)
+        self.move_now_button.config(state=tk.NORMAL)
+        self.cancel_button.config(state=tk.NORMAL)
+        self.thinking_label.config(text="🤔 Thinking...")
+        self.root.after(self.POLL_MS, self._poll_ai)
+
+    def _poll_ai(self):
+        """Show the engine's progress and play its move once it arrives"""
+        if self.engine is None or not self.engine.busy or self.replay_moves is not None:
+            return
+        self._spinner = (self._spinner + 1) % 4
+        for message in self.engine.poll():
+            if message['type'] == 'info':
+                pv = " ".join(self.format_move(row, col) for row, col in message['pv'][:8])
+                self.thinking_label.config(
+                    text=f"🤔 Thinking{'.' * self._spinner:<3}  depth {message['depth']}  "
+                         f"{message['nodes']:,} nodes  PV {pv}")
+            else:
+                self._stop_thinking()
+                engine = self.engine
+                ponder = ""
+                if engine.ponders:
+                    ponder = (f"  ⚡ ponder {'hit' if engine.last_ponder_hit else 'miss'} "
+                              f"({engine.ponder_hits}/{engine.ponders})")
+                self.thinking_label.config(
+                    text=f"Depth {message['depth']}, {message['nodes']:,} nodes "
+                         f"in {message['elapsed']:.1f}s{ponder}")
+                if message['move'] is not None:
+                    self.game.make_move(*message['move'])
+                    self._after_move()
+                    self._start_ponder(message['pv'])
+                return
+        self.root.after(self.POLL_MS, self._poll_ai)
+
+    def _start_ponder(self, pv):
+        """Let the engine think about the reply it expects while the player thinks"""
+        game = self.game
+        if not self.PONDER or game.game_over or len(pv) < 2 or self.ai_player is None:
+            return
+        if tuple(pv[0]) != game.move_history[-1]:
+            return
+        self.engine.ponder(game.get_move_history() + [tuple(pv[1])])
+
+    def _stop_thinking(self):
+        """Reset the engine controls"""
+        self.move_now_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.DISABLED)
+
+    def force_ai_move(self):
+        """Make the computer play its best move found so far"""
+        if self.engine is not None and self.engine.busy:
+            self.engine.stop()
+
+    def cancel_ai(self):
+        """Abort the computer's search; the next stone is then placed by hand"""
+        if self.engine is not None:
+            self.engine.stop_ponder()
+        if self.engine is not None and self.engine.busy:
+            self.engine.cancel()
+            self._stop_thinking()
+            self.thinking_label.config(text="Search cancelled - place the computer's stone by hand")
+
+    def open_replay(self):
+        """Load a game from a record file and enter replay mode"""
+        path = filedialog.askopenfilename(
+            title="Open game records",
+            filetypes=[("Gomoku records", "*.gmkr"), ("All files", "*.*")])
+        if not path:
+            return
+        try:
+            with GameRecordReader(path) as reader:
+                if reader.board_size != self.game.board_size:
+                    raise ValueError(f"Board size {reader.board_size} is not supported")
+                if reader.rule != self.game.rule:
+                    raise ValueError(f"The {reader.rule} rule is not supported")
+                if not len(reader):
+                    raise ValueError("The file contains no games")
+                number = 1
+                if len(reader) > 1:
+                    number = simpledialog.askinteger(
+                        "Replay", f"Game number (1-{len(reader)}):",
+                        minvalue=1, maxvalue=len(reader), parent=self.root)
+                    if number is None:
+                        return
+                moves = reader[number - 1]
+                winner = reader.winner(number - 1)
+        except (OSError, ValueError) as error:
+            messagebox.showerror("Replay", f"Cannot load {path}:\n{error}")
+            return
+
+        if self.ai_player is not None:
+            self.toggle_ai()
+        self.cancel_ai()
+        self._stop_autoplay()
+        replaying = self.replay_moves is not None
+        self.replay_moves = moves
+        self.replay_winner = winner
+        self.replay_evals = {}
+        self._eval_ply = None
+        self.game.reset()
+        self._get_engine().cancel()
+        if not replaying:
+            self.engine_frame.pack_forget()
+            self.replay_frame.pack(fill=tk.X, padx=5, pady=(10, 0))
+            self.root.after(self.POLL_MS, self._poll_eval)
+        self.goto_ply(0)
+
+    def close_replay(self):
+        """Leave replay mode and start a new game"""
+        self._stop_autoplay()
+        if self.engine is not None:
+            self.engine.cancel()
+        self.replay_moves = None
+        self.replay_frame.pack_forget()
+        self.engine_frame.pack(fill=tk.X, padx=5, pady=(10, 0))
+        self.game.reset()
+        self.update_ui()
+
+    def goto_ply(self, ply):
+        """Show the position after `ply` moves of the replayed game"""
+        moves = self.replay_moves
+        ply = max(0, min(ply, len(moves)))
+        game = self.game
+        if ply < len(game.move_history):
+            game.undo_move(len(game.move_history) - ply)
+        while len(game.move_history) < ply:
+            index = len(game.move_history)
+            success, result = game.make_move(*moves[index])
+            if not success:
+                self._truncate_replay(index, f"move {index + 1} {moves[index]}: {result}")
+                return
+        self.update_ui()
+        self.ply_label.config(text=f"{ply:3d}/{len(moves)}")
+        self.status_label.config(text=f"📼 Replay: move {ply} of {len(moves)}", fg=self.INFO_COLOR)
+        self.draw_eval_graph()
+
+    def _truncate_replay(self, ply, reason):
+        """Keep only the first `ply` moves of a replayed game whose next move is illegal"""
+        self._stop_autoplay()
+        self.replay_moves = self.replay_moves[:ply]
+        self.replay_winner = None
+        self.replay_evals = {key: value for key, value in self.replay_evals.items() if key <= ply}
+        self.update_ui()
+        self.ply_label.config(text=f"{ply:3d}/{ply}")
+        self.status_label.config(text=f"❌ Broken record, stopped at {reason}", fg="#ff6b6b")
+        self.draw_eval_graph()
+
+    def replay_step(self, plies):
+        """Move forward (positive) or back (negative) in the replayed game"""
+        self.goto_ply(len(self.game.move_history) + plies)
+
+    def toggle_autoplay(self):
+        """Start or pause playing through the game"""
+        if self._autoplay_id is not None:
+            self._stop_autoplay()
+            return
+        if len(self.game.move_history) >= len(self.replay_moves):
+            self.goto_ply(0)
+        self._autoplay()
+
+    def _autoplay(self):
+        interval = max(10, 1000 // self.replay_speed)
+        plies = max(1, self.replay_speed * interval // 1000)
+        self.replay_step(plies)
+        if len(self.game.move_history) < len(self.replay_moves):
+            self._autoplay_id = self.root.after(interval, self._autoplay)
+        else:
+            self._autoplay_id = None
+
+    def _stop_autoplay(self):
+        if self._autoplay_id is not None:
+            self.root.after_cancel(self._autoplay_id)
+            self._autoplay_id = None
+
+    def cycle_replay_speed(self):
+        """Switch to the next autoplay speed"""
+        speeds = self.REPLAY_SPEEDS
+        self.replay_speed = speeds[(speeds.index(self.replay_speed) + 1) % len(speeds)]
+        self.speed_button.config(text=f"{self.replay_speed}/s")
+
+    def on_graph_click(self, event):
+        """Jump to the ply under the mouse on the evaluation graph"""
+        if self.replay_moves:
+            width = max(1, self.graph.winfo_width())
+            self.goto_ply(round(event.x / width * len(self.replay_moves)))
+
+    def _poll_eval(self):
+        """
+        Fill the evaluation graph in the background, one short search per ply,
+        always starting with the unevaluated position nearest to the one shown
+        """
+        if self.replay_moves is None:
+            return
+        engine = self.engine
+        for message in engine.poll():
+            if message['type'] == 'done':
+                score = message['score']
+                # Store from Black's point of view
+                self.replay_evals[self._eval_ply] = score if self._eval_ply % 2 == 0 else -score
+                self.draw_eval_graph()
+
+        if not engine.busy:
+            moves = self.replay_moves
+            current = len(self.game.move_history)
+            missing = [ply for ply in range(len(moves) + 1) if ply not in self.replay_evals]
+            if missing:
+                ply = min(missing, key=lambda p: abs(p - current))
+                if ply == len(moves) and self.replay_winner is not None:
+                    # Finished game: no search needed
+                    black_won = self.replay_winner == Player.BLACK
+                    self.replay_evals[ply] = WIN_SCORE if black_won else -WIN_SCORE
+                    self.draw_eval_graph()
+                else:
+                    self._eval_ply = ply
+                    engine.search(moves[:ply], self.EVAL_TIME_LIMIT)
+        self.root.after(self.POLL_MS, self._poll_eval)
+
+    def draw_eval_graph(self):
+        """Draw the cached evaluations (Black up, White down) and the current ply"""
+        if self.replay_moves is None:
+            return
+        graph = self.graph
+        graph.delete("all")
+        width, height = graph.winfo_width(), graph.winfo_height()
+        count = max(1, len(self.replay_moves))
+        middle = height / 2
+        graph.create_line(0, middle, width, middle, fill=self.ACCENT_COLOR)
+
+        points = []
+        for ply in sorted(self.replay_evals):
+            score = self.replay_evals[ply]
+            value = score / (abs(score) + 1000)
+            points.extend((ply / count * width, middle - value * (middle - 2)))
+        if len(points) >= 4:
+            graph.create_line(*points, fill=self.SUCCESS_COLOR, width=2)
+
+        x = len(self.game.move_history) / count * width
+        graph.create_line(x, 0, x, height, fill=self.BUTTON_COLOR)
+
+    def on_close(self):
+        """Stop the engine process and close the window"""
+        if self.engine is not None:
+            self.engine.close()
+        self.root.destroy()
 
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description="Gomoku game")
+    parser.add_argument('--board-size', type=int, default=15)
+    parser.add_argument('--unbounded', action='store_true', help='Play on an infinite board')
+    parser.add_argument('--sparse', action='store_true',
+                        help='Store the board sparsely (automatic above 50x50 and when unbounded)')
+    args = parser.parse_args()
+    board_size = None if args.unbounded else args.board_size
+    backend = "sparse" if args.sparse or board_size is None or board_size > 50 else "numpy"
+
     root = tk.Tk()
-    gui = GomokuGUI(root)
+    gui = GomokuGUI(root, board_size, backend)
     root.mainloop()
 
 
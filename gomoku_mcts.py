@@ -0,0 +1,434 @@
+"""
+Gomoku Monte Carlo Tree Search
+UCT search whose leaves are scored by random playouts, many at a time
+
+Each round selects a batch of leaves, copies their positions into a
+BatchGomoku and plays them all out with vectorized NumPy moves. Virtual
+loss steers the selections of one round to different leaves. Nodes live in
+a fixed-size pool, so memory never grows beyond the size given at
+construction, and the subtree of the position reached by the following
+moves is kept for the next search.
+
+Usage:
+    python gomoku_mcts.py                        # playouts/s and memory per node
+    python gomoku_mcts.py --time 2 --batch 16 64 256
+"""
+
+import argparse
+import math
+import time
+from array import array
+
+import numpy as np
+
+from gomoku_ai import SearchResult
+from gomoku_batch import BatchGomoku
+
+
+class NodePool:
+    """
+    Tree nodes stored in parallel fixed-size arrays
+    - A node is an index; the children of a node occupy consecutive indices
+    - allocate() hands out blocks until the pool is full, then fails
+    - compact() moves one subtree to the front and frees the rest
+    """
+
+    # (name, array typecode) of the per-node fields
+    FIELDS = (
+        ('parent', 'i'),
+        ('move', 'h'),          # Flat cell index of the move leading to the node
+        ('first_child', 'i'),
+        ('child_count', 'h'),   # 0 until the node is expanded
+        ('visits', 'i'),
+        ('wins', 'f'),          # Results for the player who made the move (draw = 0.5)
+        ('virtual', 'h'),       # Playouts of the current round still in flight
+    )
+
+    NODE_BYTES = sum(array(code).itemsize for _, code in FIELDS)
+
+    def __init__(self, capacity):
+        """
+        Initialize an empty pool
+
+        Args:
+            capacity: Maximum number of nodes
+        """
+        self.capacity = capacity
+        for name, code in self.FIELDS:
+            setattr(self, name, array(code, bytes(array(code).itemsize * capacity)))
+        self.used = 0
+
+    @property
+    def size_bytes(self):
+        """Memory used by the node arrays"""
+        return self.capacity * self.NODE_BYTES
+
+    def clear(self):
+        """Free all nodes (the arrays are reused, not zeroed)"""
+        self.used = 0
+
+    def allocate(self, count, parent, moves):
+        """
+        Create a block of unvisited, unexpanded nodes
+
+        Args:
+            count: Number of nodes
+            parent: Parent node index, -1 for a root
+            moves: Move of each node as a flat cell index
+
+        Returns:
+            int - Index of the first node, or -1 if the pool is full
+        """
+        start = self.used
+        if start + count > self.capacity:
+            return -1
+        self.used = start + count
+        for node, move in zip(range(start, start + count), moves):
+            self.parent[node] = parent
+            self.move[node] = move
+            self.first_child[node] = -1
+            self.child_count[node] = 0
+            self.visits[node] = 0
+            self.wins[node] = 0.0
+            self.virtual[node] = 0
+        return start
+
+    def compact(self, root):
+        """
+        Keep only the subtree of a node, moved to the front of the pool
+
+        Args:
+            root: Node index of the subtree
+
+        Returns:
+            int - New index of the root (always 0)
+        """
+        fields = [getattr(self, name) for name, _ in self.FIELDS]
+        parent, first_child, child_count = self.parent, self.first_child, self.child_count
+        # Breadth-first order keeps every block of children consecutive
+        order = [root]
+        new_index = {root: 0}
+        for node in order:
+            for child in range(first_child[node], first_child[node] + child_count[node]):
+                new_index[child] = len(order)
+                order.append(child)
+        values = [[field[node] for node in order] for field in fields]
+        for field, column in zip(fields, values):
+            field[:len(order)] = array(field.typecode, column)
+        for node in range(len(order)):
+            parent[node] = new_index.get(parent[node], -1)
+            if child_count[node]:
+                first_child[node] = new_index[first_child[node]]
+        parent[0] = -1
+        self.used = len(order)
+        return 0
+
+
+class MCTS:
+    """
+    Monte Carlo Tree Search player
+    - UCT selection with virtual loss, a batch of leaves per round
+    - Leaves are scored by random playouts on a BatchGomoku (Renju aware)
+    - Plays moves on the given game with make_move/undo_move, never copies it
+    - Keeps the tree below the position of the next search
+    """
+
+    def __init__(self, game, time_limit=1.0, batch_size=64, max_nodes=200000,
+                 exploration=1.4, playouts=None, seed=None):
+        """
+        Initialize the search
+
+        Args:
+            game: GomokuGame to search (left unchanged after each search)
+            time_limit: Seconds allowed per move
+            batch_size: Leaves played out together in one round
+            max_nodes: Capacity of the node pool; when it is full the tree
+                stops growing but playouts go on
+            exploration: UCT exploration constant
+            playouts: Optional playout budget per search
+            seed: Seed of the playout generator
+        """
+        if game.board_size is None:
+            raise ValueError("MCTS needs a bounded board")
+        self.game = game
+        self.time_limit = time_limit
+        self.batch_size = batch_size
+        self.exploration = exploration
+        self.playouts = playouts
+        self.pool = NodePool(max_nodes)
+        self.batch = BatchGomoku(batch_size, game.board_size, game.rule)
+        self.rng = np.random.default_rng(seed)
+        self.root = -1
+        self._root_history = None
+        self._stopped = False
+        self.last_stats = {}
+
+    def close(self):
+        """Release the tree (nothing follows the game between searches)"""
+        self.pool.clear()
+        self.root = -1
+        self._root_history = None
+
+    def stop(self):
+        """Ask a running search to return its best move so far"""
+        self._stopped = True
+
+    def get_best_move(self):
+        """
+        Choose a move for the current player
+
+        Returns:
+            tuple: (row, col), or None if the game is over or the board is full
+        """
+        return self.search().move
+
+    def search(self):
+        """
+        Run playouts until the time limit or the playout budget is reached
+
+        Returns:
+            SearchResult - Most visited move; score is the expected result for
+                the player to move in thousandths (1000 win, -1000 loss), depth
+                the length of the principal variation and nodes the number of
+                playouts
+        """
+        game = self.game
+        start = time.perf_counter()
+        deadline = start + self.time_limit
+        self._stopped = False
+        result = SearchResult(None, 0, 0, 0, 0.0, [])
+        if game.game_over or not game.candidate_moves(ordered=False):
+            return result
+
+        reused = self._advance_root()
+        pool = self.pool
+        root = self.root
+        if pool.child_count[root] == 0 and not self._expand(root):
+            # The pool is full: start over with a fresh tree
+            pool.clear()
+            root = self.root = pool.allocate(1, -1, [-1])
+            if not self._expand(root):
+                # Fewer nodes than root moves: no tree fits, play the first candidate
+                move = game.candidate_moves()[0]
+                return SearchResult(move, 0, 1, 0, time.perf_counter() - start, [move])
+
+        playouts = 0
+        # A first small round measures the playout speed (Renju playouts are
+        # much slower), so later rounds can be sized to the time left
+        size = min(self.batch_size, 8)
+        while not self._stopped:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            if playouts:
+                seconds_per_playout = (now - start) / playouts
+                size = min(self.batch_size, max(1, int((deadline - now) / seconds_per_playout)))
+            if self.playouts is not None:
+                size = min(size, self.playouts - playouts)
+                if size <= 0:
+                    break
+            self._round(size)
+            playouts += size
+
+        elapsed = time.perf_counter() - start
+        best = self._best_child(root)
+        pv = self._principal_variation(root)
+        visits = pool.visits[best]
+        score = round((2 * pool.wins[best] / visits - 1) * 1000) if visits else 0
+        self.last_stats = {
+            'playouts': playouts,
+            'playouts_per_s': playouts / elapsed if elapsed else 0.0,
+            'nodes': pool.used,
+            'reused_nodes': reused,
+            'node_bytes': pool.NODE_BYTES,
+            'pool_bytes': pool.size_bytes,
+        }
+        return SearchResult(self._to_move(pool.move[best]), score, len(pv), playouts, elapsed,
+                            [self._to_move(move) for move in pv])
+
+    def _to_move(self, idx):
+        return divmod(idx, self.game.board_size)
+
+    def _advance_root(self):
+        """
+        Move the root to the current position, keeping the subtree of the
+        moves played since the last search
+
+        Returns:
+            int - Number of nodes kept
+        """
+        pool = self.pool
+        history = self.game.move_history
+        known = self._root_history
+        node = -1
+        if known is not None and history[:len(known)] == known:
+            node = self.root
+            size = self.game.board_size
+            for row, col in history[len(known):]:
+                move = row * size + col
+                first = pool.first_child[node]
+                children = range(first, first + pool.child_count[node])
+                node = next((child for child in children if pool.move[child] == move), -1)
+                if node < 0:
+                    break
+
+        self._root_history = list(history)
+        if node < 0:
+            pool.clear()
+            self.root = pool.allocate(1, -1, [-1])
+            return 0
+        # Nodes of the abandoned siblings stay allocated until the pool is
+        # half full, then the kept subtree is moved to the front
+        if pool.used > pool.capacity // 2:
+            node = pool.compact(node)
+        pool.parent[node] = -1
+        self.root = node
+        return self._subtree_size(node)
+
+    def _subtree_size(self, node):
+        pool = self.pool
+        count = 0
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            count += 1
+            first = pool.first_child[node]
+            stack.extend(range(first, first + pool.child_count[node]))
+        return count
+
+    def _expand(self, node):
+        """Create the children of a node for the current position; False if impossible"""
+        size = self.game.board_size
+        moves = [row * size + col for row, col in self.game.candidate_moves()]
+        if not moves:
+            return False
+        first = self.pool.allocate(len(moves), node, moves)
+        if first < 0:
+            return False
+        self.pool.first_child[node] = first
+        self.pool.child_count[node] = len(moves)
+        return True
+
+    def _select(self):
+        """
+        Walk from the root to a leaf, playing the moves on the game, and
+        expand the leaf if it has been played out before
+
+        Returns:
+            list - Node indices of the path, root first
+        """
+        game = self.game
+        pool = self.pool
+        size = game.board_size
+        visits, virtual, wins = pool.visits, pool.virtual, pool.wins
+        first_child, child_count = pool.first_child, pool.child_count
+        c = self.exploration
+        node = self.root
+        path = [node]
+        while True:
+            count = child_count[node]
+            if not count:
+                if game.game_over or not visits[node] or not self._expand(node):
+                    break
+                count = child_count[node]
+            first = first_child[node]
+            log_n = math.log(max(1, visits[node] + virtual[node]))
+            best = first
+            best_score = -1.0
+            for child in range(first, first + count):
+                n = visits[child] + virtual[child]
+                if not n:
+                    best = child
+                    break
+                # Virtual visits count as losses until their playouts return
+                score = wins[child] / n + c * math.sqrt(log_n / n)
+                if score > best_score:
+                    best_score = score
+                    best = child
+            node = best
+            game.make_move(*divmod(pool.move[node], size))
+            path.append(node)
+            if game.game_over:
+                break
+        for node in path:
+            virtual[node] += 1
+        return path
+
+    def _round(self, size):
+        """Select `size` leaves, play them out together and back up the results"""
+        game = self.game
+        batch = self.batch
+        batch.reset()
+        paths = []
+        for slot in range(size):
+            path = self._select()
+            batch.load_game(slot, game)
+            if len(path) > 1:
+                game.undo_move(len(path) - 1)
+            paths.append(path)
+        batch.done[size:] = True
+        winners = batch.playout(self.rng)
+
+        pool = self.pool
+        visits, virtual, wins = pool.visits, pool.virtual, pool.wins
+        # Player value who made the move into the root's children
+        mover = game.current_player.value
+        for path, winner in zip(paths, winners.tolist()):
+            for depth, node in enumerate(path):
+                virtual[node] -= 1
+                visits[node] += 1
+                # Moves alternate; the root itself was entered by the opponent
+                player = mover if depth % 2 else 3 - mover
+                if winner == player:
+                    wins[node] += 1.0
+                elif not winner:
+                    wins[node] += 0.5
+
+    def _best_child(self, node):
+        pool = self.pool
+        first = pool.first_child[node]
+        return max(range(first, first + pool.child_count[node]), key=pool.visits.__getitem__)
+
+    def _principal_variation(self, node):
+        """Moves along the most visited children"""
+        pool = self.pool
+        pv = []
+        while pool.child_count[node]:
+            node = self._best_child(node)
+            if not pool.visits[node]:
+                break
+            pv.append(pool.move[node])
+        return pv
+
+
+def main():
+    """Measure playout speed and tree memory on the benchmark positions"""
+    from gomoku_bench import AI_POSITIONS
+    from gomoku_game import GomokuGame
+
+    parser = argparse.ArgumentParser(description="MCTS playout speed and memory")
+    parser.add_argument('--time', type=float, default=1.0, help='Seconds per search (default 1)')
+    parser.add_argument('--batch', type=int, nargs='+', default=[16, 64, 256],
+                        help='Batch sizes to compare (default 16 64 256)')
+    parser.add_argument('--nodes', type=int, default=200000, help='Node pool capacity')
+    args = parser.parse_args()
+
+    print(f"{MCTS.__name__}: {NodePool.NODE_BYTES} bytes/node, "
+          f"pool of {args.nodes} nodes = {args.nodes * NodePool.NODE_BYTES / 2 ** 20:.1f} MB")
+    print(f"{'position':<12}{'batch':>6}{'playouts/s':>12}{'nodes':>9}{'move':>10}{'score':>7}")
+    for name, moves in AI_POSITIONS.items():
+        for batch_size in args.batch:
+            game = GomokuGame(backend="bitboard")
+            for row, col in moves:
+                game.make_move(row, col)
+            mcts = MCTS(game, time_limit=args.time, batch_size=batch_size,
+                        max_nodes=args.nodes, seed=0)
+            result = mcts.search()
+            stats = mcts.last_stats
+            print(f"{name:<12}{batch_size:>6}{stats['playouts_per_s']:>12,.0f}{stats['nodes']:>9}"
+                  f"{str(result.move):>10}{result.score:>7}")
+            mcts.close()
+
+
+if __name__ == "__main__":
+    main()
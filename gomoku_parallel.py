@@ -0,0 +1,173 @@
+"""
+Gomoku Parallel Search
+Lazy SMP: several engine processes search the same position and share one
+transposition table in a shared memory block
+
+Every worker runs a normal iterative-deepening GomokuAI search. Results one
+worker stores are found by the others, so the workers mostly cut each
+other's trees short instead of repeating them. Helper workers skip some
+iteration depths (see GomokuAI helper) so they run ahead of the main worker
+and fill the table for the deeper iterations. The table is lockless: an
+entry torn by two concurrent writers fails its key check and is ignored.
+
+Usage:
+    python gomoku_parallel.py                    # speedup of 1, 2, 4 and 8 workers
+    python gomoku_parallel.py --workers 1 4 --depth 6
+"""
+
+import argparse
+import os
+import time
+from multiprocessing import shared_memory
+
+from gomoku_ai import SearchResult
+from gomoku_engine import EngineProcess
+from gomoku_tt import TranspositionTable
+
+
+class ParallelSearch:
+    """
+    Search one position with several worker processes at once
+    - Worker 0 searches every depth; workers 1.. are Lazy SMP helpers
+    - The search ends when the first worker finishes; the deepest completed
+      result wins, worker 0 on ties
+    - Workers and the shared table stay alive between searches; call close()
+    """
+
+    # Seconds a worker may take beyond the time limit, and to answer a stop,
+    # before it is given up
+    GRACE = 2.0
+
+    def __init__(self, board_size=15, workers=4, tt_size_mb=64):
+        """
+        Create the shared table and start the workers
+
+        Args:
+            board_size: Board size of the games to search
+            workers: Number of worker processes
+            tt_size_mb: Size of the shared transposition table
+        """
+        self.board_size = board_size
+        self.tt_size_mb = tt_size_mb
+        size = TranspositionTable.bytes_for(tt_size_mb)
+        self._block = shared_memory.SharedMemory(create=True, size=size)
+        self._block.buf[:size] = bytes(size)
+        self.workers = [EngineProcess(board_size, tt_size_mb, shared_tt=self._block.name, helper=i)
+                        for i in range(workers)]
+
+    def search(self, moves, time_limit=1.0, max_depth=None):
+        """
+        Search a position with all workers
+
+        Args:
+            moves: Move list of the position as (row, col)
+            time_limit: Seconds allowed for the search
+            max_depth: Deepest iteration, None for the AI's default
+
+        Returns:
+            SearchResult - Chosen result; nodes are summed over all workers.
+                Workers that died or missed their stop are left out.
+
+        Raises:
+            RuntimeError - No worker finished the search
+        """
+        start = time.perf_counter()
+        ids = [worker.search(moves, time_limit, max_depth) for worker in self.workers]
+        done = {}
+        deadline = start + time_limit + self.GRACE
+        while not done and self._waiting(done, deadline):
+            self._collect(done)
+            time.sleep(0.001)
+        # The first worker to finish ends the search for everyone
+        for worker, search_id in zip(self.workers, ids):
+            worker.stop(search_id)
+        deadline = time.perf_counter() + self.GRACE
+        while len(done) < len(self.workers) and self._waiting(done, deadline):
+            self._collect(done)
+            time.sleep(0.001)
+        if not done:
+            raise RuntimeError("No search worker finished the search")
+
+        best = max(done, key=lambda i: (done[i]['depth'], -i))
+        message = done[best]
+        nodes = sum(result['nodes'] for result in done.values())
+        return SearchResult(message['move'], message['score'], message['depth'], nodes,
+                            time.perf_counter() - start, message['pv'])
+
+    def _waiting(self, done, deadline):
+        """True while a worker that has not finished may still report, before the deadline"""
+        if time.perf_counter() >= deadline:
+            return False
+        self._collect(done)
+        return any(worker.is_alive() for i, worker in enumerate(self.workers) if i not in done)
+
+    def _collect(self, done):
+        """Record the final messages of the workers into done (worker index -> message)"""
+        for i, worker in enumerate(self.workers):
+            for message in worker.poll():
+                if message['type'] == 'done':
+                    done[i] = message
+
+    def clear(self):
+        """Forget all shared table entries, e.g. before an unrelated game"""
+        table = TranspositionTable(self.tt_size_mb, buffer=self._block.buf)
+        table.clear()
+        table.release()
+
+    def close(self):
+        """Stop the workers and free the shared table"""
+        for worker in self.workers:
+            worker.close()
+        self.workers = []
+        if self._block is not None:
+            self._block.close()
+            self._block.unlink()
+            self._block = None
+
+
+def bench(worker_counts, depth, time_limit=3600.0):
+    """
+    Time-to-depth and node rate of each worker count on the benchmark positions
+
+    Returns:
+        list - (position, workers, seconds, nodes) per run
+    """
+    from gomoku_bench import AI_POSITIONS
+
+    rows = []
+    for name, moves in AI_POSITIONS.items():
+        for workers in worker_counts:
+            search = ParallelSearch(workers=workers)
+            try:
+                # Let every worker finish starting up before timing
+                search.search(moves, time_limit, max_depth=1)
+                search.clear()
+                result = search.search(moves, time_limit, max_depth=depth)
+            finally:
+                search.close()
+            rows.append((name, workers, result.elapsed, result.nodes))
+    return rows
+
+
+def main():
+    """Command line entry point: print the speedup table"""
+    parser = argparse.ArgumentParser(description="Lazy SMP speedup over one worker")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8],
+                        help='Worker counts to compare (default 1 2 4 8)')
+    parser.add_argument('--depth', type=int, default=6, help='Search depth (default 6)')
+    args = parser.parse_args()
+
+    counts = sorted(set(args.workers) | {1})
+    print(f"{os.cpu_count()} CPU(s), depth {args.depth}")
+    print(f"{'position':<12}{'workers':>8}{'time s':>9}{'nodes':>10}{'speedup':>9}{'nps x':>7}")
+    baseline = {}
+    for name, workers, elapsed, nodes in bench(counts, args.depth):
+        if workers == 1:
+            baseline[name] = (elapsed, nodes / elapsed)
+        base_time, base_nps = baseline[name]
+        print(f"{name:<12}{workers:>8}{elapsed:>9.2f}{nodes:>10}"
+              f"{base_time / elapsed:>9.2f}{nodes / elapsed / base_nps:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+"""
+Gomoku Proof-Number Search
+Proves or disproves a forced win for offline analysis of openings and puzzles
+
+Usage:
+    python gomoku_pns.py 7,7 7,8 ... [--nodes N] [--time S] [--save tree.pns] [--resume tree.pns]
+"""
+
+import argparse
+import pickle
+import time
+
+from gomoku_ai import WIN_SCORE
+from gomoku_board import BitBoard
+from gomoku_game import GomokuGame, Player
+from gomoku_tt import EXACT, SOLVED_DEPTH, TranspositionTable
+from gomoku_vcf import ThreatSolver
+
+
+INFINITY = 10 ** 9
+
+# Score stored in the transposition table for solved positions (distance unknown)
+SOLVED_SCORE = WIN_SCORE - 500
+
+_FILE_VERSION = 1
+
+
+class PNNode:
+    """Node of the proof tree"""
+
+    __slots__ = ('move', 'parent', 'children', 'proof', 'disproof', 'is_or')
+
+    def __init__(self, move, parent, is_or):
+        self.move = move            # (row, col) leading here, None at the root
+        self.parent = parent
+        self.children = None        # None until expanded
+        self.proof = 1
+        self.disproof = 1
+        self.is_or = is_or          # The attacker is to move
+
+    def set_solved(self, attacker_wins):
+        self.proof, self.disproof = (0, INFINITY) if attacker_wins else (INFINITY, 0)
+
+    def update(self):
+        """Recompute the proof and disproof numbers from the children"""
+        children = self.children
+        if self.is_or:
+            self.proof = min(child.proof for child in children)
+            self.disproof = min(INFINITY, sum(child.disproof for child in children))
+        else:
+            self.proof = min(INFINITY, sum(child.proof for child in children))
+            self.disproof = min(child.disproof for child in children)
+
+
+class PNSResult:
+    """Outcome of a proof-number search"""
+
+    def __init__(self, status, move, proof_size, tree_size, iterations, elapsed):
+        self.status = status            # "win", "no win" or "unknown" for the attacker
+        self.move = move                # Winning move when the attacker is to move and wins
+        self.proof_size = proof_size    # Nodes in the proof (or disproof) tree
+        self.tree_size = tree_size
+        self.iterations = iterations
+        self.elapsed = elapsed
+
+    def __repr__(self):
+        return (f"PNSResult(status={self.status!r}, move={self.move}, "
+                f"proof_size={self.proof_size}, tree_size={self.tree_size})")
+
+
+class ProofNumberSearch:
+    """
+    Proof-number search over GomokuGame
+    - Walks the tree with make_move/undo_move on the given game
+    - The attacker is the player to move at the root unless given
+    - Proved positions (forced wins) are stored in a (possibly shared)
+      bounded transposition table and reused from it
+    - Only moves near the stones (GomokuGame.candidate_moves) are considered,
+      for both sides; proofs assume moves further away never matter
+    """
+
+    def __init__(self, game, attacker=None, tt=None, vcf_nodes=50):
+        """
+        Initialize the search
+
+        Args:
+            game: GomokuGame at the position to solve (restored after every call)
+            attacker: Player trying to win (default: the player to move)
+            tt: TranspositionTable for solved positions, e.g. an AI's table
+            vcf_nodes: Node budget of the VCF check on new nodes, 0 to skip it
+        """
+        self.game = game
+        self.attacker = attacker or game.current_player
+        self.tt = tt if tt is not None else TranspositionTable(16)
+        self.vcf_solver = ThreatSolver(game.board_size, vcf_nodes) if vcf_nodes else None
+        self._bits = BitBoard(game.board_size)
+        self.root_moves = game.get_move_history()
+        self.root = PNNode(None, None, game.current_player is self.attacker)
+        self.tree_size = 1
+        self.iterations = 0
+
+    def solve(self, max_nodes=100000, time_limit=None):
+        """
+        Grow the tree until the root is solved or a limit is reached
+
+        Can be called again (also after load()) to continue the search.
+
+        Args:
+            max_nodes: Maximum number of nodes in the tree, bounds memory
+            time_limit: Optional time limit in seconds for this call
+
+        Returns:
+            PNSResult
+        """
+        game = self.game
+        if game.get_move_history() != self.root_moves:
+            raise ValueError("The game is not at the position of the search tree")
+
+        start = time.perf_counter()
+        root = self.root
+        if root.children is None and not (root.proof == 0 or root.disproof == 0):
+            self._expand(root)
+
+        while root.proof and root.disproof and self.tree_size < max_nodes:
+            if time_limit is not None and time.perf_counter() - start > time_limit:
+                break
+            self.iterations += 1
+
+            # Descend to the most-proving node
+            node = root
+            while node.children is not None:
+                if node.is_or:
+                    node = min(node.children, key=lambda child: child.proof)
+                else:
+                    node = min(node.children, key=lambda child: child.disproof)
+                game.make_move(*node.move)
+
+            self._expand(node)
+
+            # Back up the new numbers
+            while node is not None:
+                if node.children is not None:
+                    node.update()
+                if node.proof == 0 or node.disproof == 0:
+                    self._store_solved(node)
+                    if node.children:
+                        node.children = self._prune(node)
+                if node.parent is not None:
+                    game.undo_move(1)
+                node = node.parent
+
+        if root.proof == 0:
+            status = "win"
+        elif root.disproof == 0:
+            status = "no win"
+        else:
+            status = "unknown"
+        move = None
+        if status == "win" and root.is_or and root.children:
+            move = next(child.move for child in root.children if child.proof == 0)
+        return PNSResult(status, move, self._proof_size(root) if status != "unknown" else 0,
+                         self.tree_size, self.iterations, time.perf_counter() - start)
+
+    def _expand(self, node):
+        """Create the children of a node at the game's current position"""
+        game = self.game
+        size = game.board_size
+        bits = self._bits
+        stride = bits.stride
+        own = other = 0
+        mover = game.current_player.value
+        for i, (row, col) in enumerate(game.move_history):
+            if (i % 2 == 0) == (mover == 1):
+                own |= 1 << (row * stride + col)
+            else:
+                other |= 1 << (row * stride + col)
+        empty = bits.full_mask & ~(own | other)
+
+        # Must win at once, or block the opponent's five point. Under Renju
+        # a five point of Black may be an overline, which is no win for Black
+        wins = [divmod(idx, stride) for idx in bits.bit_indices(bits.five_points(own, empty))]
+        wins = [move for move in wins if game.forbidden_reason(*move) is None]
+        if wins:
+            moves = wins[:1]
+        else:
+            opponent = Player.WHITE if game.current_player is Player.BLACK else Player.BLACK
+            threats = [divmod(idx, stride) for idx in bits.bit_indices(bits.five_points(other, empty))]
+            threats = [move for move in threats if game.forbidden_reason(*move, opponent) is None]
+            if threats:
+                moves = [move for move in threats if game.forbidden_reason(*move) is None]
+                if not moves:
+                    # Black can only block on a forbidden cell: a loss for the mover
+                    node.set_solved(not node.is_or)
+                    return
+            else:
+                moves = game.candidate_moves()
+        if not moves:
+            node.set_solved(False)  # Board full, or only forbidden cells left: draw
+            return
+
+        node.children = []
+        for move in moves:
+            child = PNNode(move, node, not node.is_or)
+            success, result = game.make_move(*move)
+            if not success:
+                continue
+            if result == "WIN":
+                child.set_solved(node.is_or)
+            elif len(game.move_history) == size * size:
+                child.set_solved(False)  # Draw
+            else:
+                self._init_child(child)
+            game.undo_move(1)
+            node.children.append(child)
+            self.tree_size += 1
+
+            # One winning move settles an OR node, one refutation an AND node
+            if child.proof == 0 and node.is_or or child.disproof == 0 and not node.is_or:
+                node.children = [child]
+                break
+        if not node.children:
+            node.children = None
+            node.set_solved(False)
+            return
+        node.update()
+
+    def _init_child(self, child):
+        """Set the numbers of a new node from the table or a quick VCF check"""
+        game = self.game
+        entry = self.tt.probe(game.canonical_hash)
+        if entry is not None and entry[0] == SOLVED_DEPTH and entry[1] == EXACT:
+            # Solved entries are always forced wins, so one for the other side
+            # disproves the attacker's win as well
+            mover_wins = entry[2] > 0
+            child.set_solved(mover_wins == child.is_or)
+        elif self.vcf_solver is not None and self.vcf_solver.solve(game).found:
+            child.set_solved(child.is_or)
+
+    def _store_solved(self, node):
+        """
+        Record a proved node in the transposition table
+
+        Only proofs are stored: a disproof means no forced win for this
+        attacker, which is no mate score for the mover (it may be a draw, or a
+        win for the other side). Disproofs stay in the tree.
+        """
+        if node.proof != 0:
+            return
+        # The attacker wins; that is a win for the mover exactly at OR nodes
+        self.tt.store(self.game.canonical_hash, SOLVED_DEPTH, EXACT,
+                      SOLVED_SCORE if node.is_or else -SOLVED_SCORE, None)
+
+    def _prune(self, node):
+        """Keep only the children that make up the proof of a solved node"""
+        if node.proof == 0 and node.is_or or node.disproof == 0 and not node.is_or:
+            # One child is enough to prove the result
+            key = (lambda child: child.proof) if node.is_or else (lambda child: child.disproof)
+            children = [min(node.children, key=key)]
+        else:
+            children = node.children
+        self.tree_size -= len(node.children) - len(children)
+        return children
+
+    def _proof_size(self, node):
+        """Number of nodes in the proof tree below (and including) a solved node"""
+        if not node.children:
+            return 1
+        return 1 + sum(self._proof_size(child) for child in node.children)
+
+    def save(self, path):
+        """Save the search tree so it can be resumed later"""
+        with open(path, 'wb') as file:
+            pickle.dump({
+                'version': _FILE_VERSION,
+                'board_size': self.game.board_size,
+                'rule': self.game.rule,
+                'moves': self.root_moves,
+                'attacker': self.attacker.value,
+                'root': self.root,
+                'tree_size': self.tree_size,
+                'iterations': self.iterations,
+            }, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path, game=None, tt=None, vcf_nodes=50):
+        """
+        Load a search tree saved with save()
+
+        Args:
+            path: File written by save()
+            game: GomokuGame to search with (a new one at the saved position if None)
+            tt: Optional TranspositionTable to share
+            vcf_nodes: Node budget of the VCF check on new nodes
+
+        Returns:
+            ProofNumberSearch
+        """
+        with open(path, 'rb') as file:
+            data = pickle.load(file)
+        if data.get('version') != _FILE_VERSION:
+            raise ValueError(f"Unsupported search tree version: {data.get('version')}")
+
+        rule = data.get('rule', "freestyle")  # Trees saved before Renju support
+        if game is None:
+            game = GomokuGame(board_size=data['board_size'], backend="bitboard", rule=rule)
+            for move in data['moves']:
+                game.make_move(*move)
+        elif game.rule != rule:
+            raise ValueError(f"The saved tree was searched under the {rule} rule")
+        search = cls(game, tt=tt, vcf_nodes=vcf_nodes)
+        if search.root_moves != data['moves']:
+            raise ValueError("The game is not at the position of the saved tree")
+        search.attacker = Player(data['attacker'])
+        search.root = data['root']
+        search.tree_size = data['tree_size']
+        search.iterations = data['iterations']
+        return search
+
+
+def main():
+    """Solve a position given as a list of moves"""
+    parser = argparse.ArgumentParser(description="Prove a forced win with proof-number search")
+    parser.add_argument('moves', nargs='*', help='Moves played so far as row,col')
+    parser.add_argument('--nodes', type=int, default=200000, help='Maximum tree size')
+    parser.add_argument('--time', type=float, help='Time limit in seconds')
+    parser.add_argument('--save', help='Save the tree to this file afterwards')
+    parser.add_argument('--resume', help='Continue a tree saved with --save')
+    parser.add_argument('--board-size', type=int, default=15)
+    args = parser.parse_args()
+
+    if args.resume:
+        search = ProofNumberSearch.load(args.resume)
+    else:
+        game = GomokuGame(board_size=args.board_size, backend="bitboard")
+        for move in args.moves:
+            row, col = (int(x) for x in move.split(','))
+            success, result = game.make_move(row, col)
+            if not success:
+                parser.error(f"Move {move}: {result}")
+        search = ProofNumberSearch(game)
+
+    result = search.solve(max_nodes=args.nodes, time_limit=args.time)
+    print(f"{search.attacker.name}: {result.status}"
+          + (f", play {result.move[0]},{result.move[1]}" if result.move else ""))
+    print(f"proof size {result.proof_size}, tree {result.tree_size} nodes, "
+          f"{result.iterations} iterations in {result.elapsed:.2f}s")
+    if args.save:
+        search.save(args.save)
+
+
+if __name__ == "__main__":
+    main()
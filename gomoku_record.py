@@ -0,0 +1,254 @@
+"""
+Gomoku Game Records
+Compact binary format for large game collections, read through mmap
+
+File layout (little endian):
+    header   32 bytes: magic "GMKR", version u16, board size u8,
+                       rule u8 (0 freestyle, 1 renju; index in gomoku_game.RULES),
+                       game count u64, index offset u64, reserved u64
+    moves    one byte per move (row * board_size + col), games back to back
+    index    12 bytes per game: moves offset u64, move count u16, winner u8, reserved u8
+
+Usage:
+    python gomoku_record.py import results.jsonl games.gmkr [--rule renju]
+    python gomoku_record.py info games.gmkr
+"""
+
+import argparse
+import json
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+
+import numpy as np
+
+from gomoku_game import RULES, GomokuGame, Player
+
+
+MAGIC = b"GMKR"
+VERSION = 1
+HEADER = struct.Struct("<4sHBBQQ8x")
+INDEX_DTYPE = np.dtype([('offset', '<u8'), ('length', '<u2'), ('winner', 'u1'), ('reserved', 'u1')])
+
+_WINNER_NAMES = {'black': Player.BLACK.value, 'white': Player.WHITE.value, 'draw': 0}
+
+
+class GameRecordWriter:
+    """
+    Streams games to a record file
+    - Moves go straight to disk; the index is spooled to a temporary file
+      and appended on close, so memory use does not grow with the number of games
+    """
+
+    def __init__(self, path, board_size=15, rule="freestyle"):
+        """
+        Create a record file
+
+        Args:
+            path: File to write (overwritten)
+            board_size: Board size of all games, at most 16 so a move fits in a byte
+            rule: Rule of all games, "freestyle" or "renju" (see gomoku_game.RULES)
+        """
+        if board_size * board_size > 256:
+            raise ValueError("Board size must be at most 16 for one-byte moves")
+        if rule not in RULES:
+            raise ValueError(f"Unknown rule: {rule!r} (expected one of {', '.join(RULES)})")
+        self.path = path
+        self.board_size = board_size
+        self.rule = rule
+        self.count = 0
+        self._file = open(path, 'wb')
+        self._file.write(HEADER.pack(MAGIC, VERSION, board_size, RULES.index(rule), 0, 0))
+        self._index = tempfile.TemporaryFile()
+
+    def write(self, moves, winner=0):
+        """
+        Append one game
+
+        Args:
+            moves: Sequence of (row, col)
+            winner: Player, Player value or None/0 for draws and unfinished games
+        """
+        if isinstance(winner, Player):
+            winner = winner.value
+        size = self.board_size
+        data = bytes(row * size + col for row, col in moves)
+        offset = self._file.tell()
+        self._file.write(data)
+        entry = np.array([(offset, len(data), winner or 0, 0)], dtype=INDEX_DTYPE)
+        self._index.write(entry.tobytes())
+        self.count += 1
+
+    def write_game(self, game):
+        """Append the moves and result of a GomokuGame"""
+        if game.board_size != self.board_size:
+            raise ValueError("Board size does not match the record file")
+        if game.rule != self.rule:
+            raise ValueError("Rule does not match the record file")
+        self.write(game.get_move_history(), game.winner)
+
+    def close(self):
+        """Write the index and the final header"""
+        if self._file.closed:
+            return
+        index_offset = self._file.tell()
+        self._index.seek(0)
+        shutil.copyfileobj(self._index, self._file)
+        self._index.close()
+        self._file.seek(0)
+        self._file.write(HEADER.pack(MAGIC, VERSION, self.board_size, RULES.index(self.rule),
+                                     self.count, index_offset))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class GameRecordReader:
+    """
+    Memory-mapped reader of a record file
+    - Games are decoded only when accessed
+    - Supports len(), indexing and iteration
+    """
+
+    def __init__(self, path):
+        """
+        Open a record file
+
+        Args:
+            path: File written by GameRecordWriter
+        """
+        self.path = path
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.board_size, rule, count, index_offset = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a game record file")
+        if version != VERSION:
+            raise ValueError(f"Unsupported record version: {version}")
+        if rule >= len(RULES):
+            raise ValueError(f"Unknown rule in record file: {rule}")
+        self.rule = RULES[rule]
+        self.index = np.frombuffer(self._map, dtype=INDEX_DTYPE, count=count, offset=index_offset)
+
+    def __len__(self):
+        return len(self.index)
+
+    def move_codes(self, i):
+        """Moves of game i as a uint8 array of row * board_size + col (no copy)"""
+        offset, length = int(self.index['offset'][i]), int(self.index['length'][i])
+        return np.frombuffer(self._map, dtype=np.uint8, count=length, offset=offset)
+
+    def __getitem__(self, i):
+        """Moves of game i as a list of (row, col)"""
+        if not -len(self) <= i < len(self):
+            raise IndexError("game index out of range")
+        size = self.board_size
+        return [divmod(code, size) for code in self.move_codes(i % len(self)).tolist()]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def winner(self, i):
+        """Winner of game i as a Player, or None"""
+        value = int(self.index['winner'][i])
+        return Player(value) if value else None
+
+    def replay(self, i, game=None, plies=None):
+        """
+        Play game i into a GomokuGame
+
+        Args:
+            i: Game number
+            game: GomokuGame to reset and use (a new one if None)
+            plies: Stop after this many moves (default: all)
+
+        Returns:
+            GomokuGame at the final (or requested) position
+        """
+        if game is None:
+            game = GomokuGame(board_size=self.board_size, backend="bitboard", rule=self.rule)
+        elif game.board_size != self.board_size:
+            raise ValueError("Board size does not match the record file")
+        elif game.rule != self.rule:
+            raise ValueError("Rule does not match the record file")
+        game.reset()
+        for row, col in self[i][:plies]:
+            success, result = game.make_move(row, col)
+            if not success:
+                raise ValueError(f"Game {i}: illegal move ({row}, {col}): {result}")
+        return game
+
+    def close(self):
+        """
+        Release the memory map
+
+        Arrays from move_codes() still in use keep the map alive; it is then
+        unmapped once the last of them is freed.
+        """
+        self.index = None
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                pass
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def import_jsonl(source, target, board_size=15, rule="freestyle"):
+    """
+    Convert gomoku_selfplay.py JSON Lines output to a record file
+
+    Returns:
+        int - Number of games written
+    """
+    with open(source, encoding='utf-8') as lines, GameRecordWriter(target, board_size, rule) as writer:
+        for line in lines:
+            if line.strip():
+                record = json.loads(line)
+                writer.write(record['moves'], _WINNER_NAMES.get(record.get('winner'), 0))
+        return writer.count
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Gomoku game record files")
+    commands = parser.add_subparsers(dest='command', required=True)
+    convert = commands.add_parser('import', help='Convert self-play JSON Lines to a record file')
+    convert.add_argument('source')
+    convert.add_argument('target')
+    convert.add_argument('--board-size', type=int, default=15)
+    convert.add_argument('--rule', choices=RULES, default="freestyle",
+                         help='Rule the games were played under (default freestyle)')
+    info = commands.add_parser('info', help='Summarize a record file')
+    info.add_argument('path')
+    args = parser.parse_args()
+
+    if args.command == 'import':
+        count = import_jsonl(args.source, args.target, args.board_size, args.rule)
+        print(f"Wrote {count} games to {args.target} ({os.path.getsize(args.target)} bytes)")
+    else:
+        with GameRecordReader(args.path) as reader:
+            winners = np.bincount(reader.index['winner'], minlength=3)
+            lengths = reader.index['length'].astype(np.int64)
+            print(f"{len(reader)} {reader.rule} games on {reader.board_size}x{reader.board_size}")
+            if len(reader):
+                print(f"Black {winners[1]}, white {winners[2]}, draw/unfinished {winners[0]}")
+                print(f"Moves per game: mean {lengths.mean():.1f}, max {lengths.max()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""
+Gomoku Renju Rules
+Forbidden moves of Black: overlines, double-fours and double-threes
+
+Every cell keeps one code per line direction describing the 11 cells
+centred on it (empty, black, or white/off the board), updated as stones are
+placed and removed. A table maps each line code to what a black stone in
+the middle makes along that line, so checking a move costs four lookups;
+only candidate double-threes need a deeper look.
+"""
+
+import numpy as np
+
+from gomoku_board import DIRECTIONS
+
+
+_SPAN = 5               # Cells on each side of the centre of a line
+_WIDTH = 2 * _SPAN + 1
+_CENTRE = 3 ** _SPAN    # Code weight of the centre cell
+_BLOCKED = 2            # Digit of white stones and cells off the board
+
+# What a black stone makes along one line
+NONE = 0
+FIVE = 1
+OVERLINE = 2
+
+_line_table = {}
+
+
+def _black_run(line, i):
+    """(start, end) of the run of black stones through line[i], end excluded"""
+    start = end = i
+    while start > 0 and line[start - 1] == 1:
+        start -= 1
+    while end < _WIDTH - 1 and line[end + 1] == 1:
+        end += 1
+    return start, end + 1
+
+
+def _five_points(line):
+    """Empty cells that complete exactly five with the centre stone"""
+    points = []
+    for p in range(_WIDTH):
+        if line[p]:
+            continue
+        line[p] = 1
+        start, end = _black_run(line, p)
+        if end - start == 5 and start <= _SPAN < end:
+            points.append(p)
+        line[p] = 0
+    return points
+
+
+def _count_fours(points):
+    """Fours given by five points; both ends of a straight four are one four"""
+    return len(points) - sum(1 for p in points if p + 5 in points)
+
+
+def _classify(code):
+    """
+    Analyse a line with a black stone in the centre
+
+    Returns:
+        tuple: (kind, fours, three_points)
+            - kind: FIVE, OVERLINE or NONE
+            - fours: Number of fours through the centre stone
+            - three_points: Offsets from the centre of the cells that would
+              turn the line into a straight four (an open three), only
+              given when the line holds no four
+    """
+    line = []
+    for _ in range(_WIDTH):
+        code, digit = divmod(code, 3)
+        line.append(digit)
+
+    start, end = _black_run(line, _SPAN)
+    if end - start == 5:
+        return FIVE, 0, ()
+    if end - start > 5:
+        return OVERLINE, 0, ()
+
+    fours = _count_fours(_five_points(line))
+    if fours:
+        return NONE, fours, ()
+
+    three_points = []
+    for q in range(1, _WIDTH - 1):
+        if line[q]:
+            continue
+        line[q] = 1
+        points = _five_points(line)
+        if any(p + 5 in points for p in points):
+            three_points.append(q - _SPAN)
+        line[q] = 0
+    return NONE, 0, tuple(three_points)
+
+
+def line_info(code):
+    """Cached _classify() of a line code; the table fills as codes are seen"""
+    info = _line_table.get(code)
+    if info is None:
+        info = _line_table[code] = _classify(code)
+    return info
+
+
+# Dense copy of the table for vectorized lookups, filled lazily like it:
+# (kind, fours, has_three) per code, kind -1 while not classified yet
+_dense_table = np.full((3 ** _WIDTH, 3), -1, dtype=np.int8)
+
+
+def line_info_array(codes):
+    """
+    line_info() of many codes at once
+
+    Args:
+        codes: Integer array of line codes (black centre)
+
+    Returns:
+        np.ndarray - codes.shape + (3,) of kind, fours and whether the line
+                     has three points
+    """
+    infos = _dense_table[codes]
+    missing = infos[..., 0] < 0
+    if missing.any():
+        for code in np.unique(codes[missing]).tolist():
+            kind, fours, points = line_info(code)
+            _dense_table[code] = (kind, fours, bool(points))
+        infos = _dense_table[codes]
+    return infos
+
+
+def _line_sums(boards, digits, weights):
+    """Weighted sums over the 11-cell lines of every cell: (N, 4, size, size)"""
+    n, size, _ = boards.shape
+    padded = np.full((n, size + 2 * _SPAN, size + 2 * _SPAN), _BLOCKED, dtype=np.int32)
+    padded[:, _SPAN:-_SPAN, _SPAN:-_SPAN] = boards
+    padded = digits(padded)
+    sums = np.zeros((n, 4, size, size), dtype=np.int32)
+    for d, (dr, dc) in enumerate(DIRECTIONS):
+        for k in range(_WIDTH):
+            r, c = _SPAN + (k - _SPAN) * dr, _SPAN + (k - _SPAN) * dc
+            sums[:, d] += padded[:, r:r + size, c:c + size] * weights[k]
+    return sums
+
+
+_CODE_WEIGHTS = [3 ** k for k in range(_WIDTH)]
+
+
+def line_codes(boards):
+    """
+    Line codes of whole boards at once, as kept by RenjuRules
+
+    Args:
+        boards: (N, size, size) array of Player values
+
+    Returns:
+        np.ndarray - (N, 4, size, size) int32; the centre digit is the
+                     cell's own value
+    """
+    return _line_sums(boards, lambda padded: padded, _CODE_WEIGHTS)
+
+
+def black_counts(boards):
+    """Black stones in the 11-cell lines of every cell: (N, 4, size, size)"""
+    return _line_sums(boards, lambda padded: padded == 1, [1] * _WIDTH)
+
+
+_layout_cache = {}
+
+
+def _line_layout(board_size):
+    """
+    Code tables of a board size
+
+    Returns:
+        tuple: (initial, updates, steps)
+            - initial: Codes of the empty board, slot direction * cells + cell
+            - updates: updates[idx] is a tuple of (slot, weight): placing a
+              stone of value v at idx adds v * weight to codes[slot]
+            - steps: Flat index step of each direction
+    """
+    if board_size not in _layout_cache:
+        cells = board_size * board_size
+        initial = [0] * (4 * cells)
+        updates = [[] for _ in range(cells)]
+        for d, (dr, dc) in enumerate(DIRECTIONS):
+            for row in range(board_size):
+                for col in range(board_size):
+                    slot = d * cells + row * board_size + col
+                    for k in range(_WIDTH):
+                        r, c = row + (k - _SPAN) * dr, col + (k - _SPAN) * dc
+                        if 0 <= r < board_size and 0 <= c < board_size:
+                            updates[r * board_size + c].append((slot, 3 ** k))
+                        else:
+                            initial[slot] += _BLOCKED * 3 ** k
+        steps = tuple(dr * board_size + dc for dr, dc in DIRECTIONS)
+        _layout_cache[board_size] = (initial, [tuple(u) for u in updates], steps)
+    return _layout_cache[board_size]
+
+
+class RenjuRules:
+    """
+    Incremental Renju rule checks for one board
+    - place()/remove() keep the line codes in step with the game
+    - forbidden() tells whether Black may play on an empty cell
+    - Exactly five wins for Black; a five takes precedence over any forbidden shape
+    """
+
+    def __init__(self, board_size):
+        """
+        Initialize for an empty board
+
+        Args:
+            board_size: Number of rows and columns
+        """
+        self.board_size = board_size
+        self._cells = board_size * board_size
+        self._initial, self._updates, self._steps = _line_layout(board_size)
+        self.codes = list(self._initial)
+
+    def place(self, idx, value):
+        """Record a stone of the given Player value at a flat cell index"""
+        codes = self.codes
+        for slot, weight in self._updates[idx]:
+            codes[slot] += value * weight
+
+    def remove(self, idx, value):
+        """Take back a stone recorded with place()"""
+        codes = self.codes
+        for slot, weight in self._updates[idx]:
+            codes[slot] -= value * weight
+
+    def clear(self):
+        """Forget all stones"""
+        self.codes = list(self._initial)
+
+    def load(self, board):
+        """
+        Set up the codes of a position
+
+        Args:
+            board: (size, size) array of Player values
+        """
+        self.codes = line_codes(board[None])[0].ravel().tolist()
+
+    def _lines(self, idx):
+        """Line infos of the four directions through a cell, as if Black stood on it"""
+        codes = self.codes
+        cells = self._cells
+        # An empty centre is scored as black; a black centre is already counted
+        centre = 0 if codes[idx] // _CENTRE % 3 == 1 else _CENTRE
+        return [line_info(codes[d * cells + idx] + centre) for d in range(4)]
+
+    def is_five(self, idx):
+        """True if the black stone at idx is part of exactly five in a row"""
+        return any(kind == FIVE for kind, _, _ in self._lines(idx))
+
+    def forbidden(self, idx):
+        """
+        Check a move of Black
+
+        Args:
+            idx: Flat index of an empty cell
+
+        Returns:
+            str - "overline", "double-four" or "double-three", or None if the
+                  move is allowed
+        """
+        lines = self._lines(idx)
+        kinds = [kind for kind, _, _ in lines]
+        if FIVE in kinds:
+            return None
+        if OVERLINE in kinds:
+            return "overline"
+        if sum(fours for _, fours, _ in lines) >= 2:
+            return "double-four"
+
+        threes = [(d, points) for d, (_, _, points) in enumerate(lines) if points]
+        if len(threes) < 2:
+            return None
+        # A three only counts if the cell that makes it a straight four is
+        # itself allowed, which depends on the rest of the board
+        self.place(idx, 1)
+        try:
+            real = 0
+            for d, points in threes:
+                step = self._steps[d]
+                if any(self.forbidden(idx + offset * step) is None for offset in points):
+                    real += 1
+                    if real == 2:
+                        return "double-three"
+        finally:
+            self.remove(idx, 1)
+        return None
@@ -0,0 +1,274 @@
+"""
+Gomoku Self-Play Runner
+Plays matches between two agents on all cores and reports the results
+
+Usage:
+    python gomoku_selfplay.py random ai:time=0.2 --games 100 --output results.jsonl
+    python gomoku_selfplay.py ai:depth=4 ai:time=1.0,moves=16 --games 400 --workers 8
+    python gomoku_selfplay.py mcts:time=1.0,batch=64 ai:time=1.0 --games 20
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from gomoku_ai import GomokuAI
+from gomoku_book import OpeningBook
+from gomoku_game import GomokuGame, Player
+from gomoku_mcts import MCTS
+
+
+class RandomAgent:
+    """Plays a random move near the existing stones"""
+
+    def __init__(self, game, rng):
+        self.game = game
+        self.rng = rng
+
+    def choose_move(self):
+        return self.rng.choice(self.game.candidate_moves(ordered=False))
+
+    def close(self):
+        pass
+
+
+class AIAgent:
+    """Plays the move chosen by GomokuAI"""
+
+    def __init__(self, game, time_limit=1.0, max_depth=20, max_moves=12, tt_size_mb=16,
+                 book_path=None):
+        self.book = OpeningBook(book_path) if book_path else None
+        self.ai = GomokuAI(game, time_limit=time_limit, max_depth=max_depth,
+                           max_moves=max_moves, tt_size_mb=tt_size_mb, book=self.book)
+
+    def choose_move(self):
+        return self.ai.get_best_move()
+
+    def close(self):
+        self.ai.close()
+        if self.book is not None:
+            self.book.close()
+
+
+class MCTSAgent:
+    """Plays the move chosen by MCTS"""
+
+    def __init__(self, game, seed=None, **options):
+        self.mcts = MCTS(game, seed=seed, **options)
+
+    def choose_move(self):
+        return self.mcts.get_best_move()
+
+    def close(self):
+        self.mcts.close()
+
+
+# Options accepted after "ai:" and the GomokuAI arguments they set
+_AI_OPTIONS = {
+    'time': ('time_limit', float),
+    'depth': ('max_depth', int),
+    'moves': ('max_moves', int),
+    'tt': ('tt_size_mb', float),
+    'book': ('book_path', str),
+}
+
+# Options accepted after "mcts:" and the MCTS arguments they set
+_MCTS_OPTIONS = {
+    'time': ('time_limit', float),
+    'batch': ('batch_size', int),
+    'nodes': ('max_nodes', int),
+    'playouts': ('playouts', int),
+    'c': ('exploration', float),
+}
+
+
+def parse_agent(spec):
+    """
+    Parse an agent description
+
+    Args:
+        spec: "random", or "ai" optionally followed by ":key=value,..." with
+            keys time (seconds per move), depth, moves (branching), tt (MB)
+            and book (opening book file), or "mcts" with keys time, batch
+            (playouts per round), nodes (tree size), playouts and c
+            (exploration constant)
+
+    Returns:
+        tuple: (kind, options)
+    """
+    kind, _, options = spec.partition(':')
+    if kind == 'random':
+        if options:
+            raise ValueError("The random agent takes no options")
+        return kind, {}
+    if kind not in ('ai', 'mcts'):
+        raise ValueError(f"Unknown agent: {spec!r}")
+
+    known = _AI_OPTIONS if kind == 'ai' else _MCTS_OPTIONS
+    parsed = {}
+    for option in filter(None, options.split(',')):
+        key, _, value = option.partition('=')
+        if key not in known:
+            raise ValueError(f"Unknown {kind.upper()} option: {key!r}")
+        name, convert = known[key]
+        parsed[name] = convert(value)
+    return kind, parsed
+
+
+def create_agent(agent, game, rng):
+    """Create an agent from a parsed description"""
+    kind, options = agent
+    if kind == 'random':
+        return RandomAgent(game, rng)
+    if kind == 'mcts':
+        return MCTSAgent(game, seed=rng.randrange(1 << 32), **options)
+    return AIAgent(game, **options)
+
+
+def play_game(game_id, black, white, board_size=15, seed=None):
+    """
+    Play one game between two agents
+
+    Args:
+        game_id: Number stored in the result
+        black: Parsed agent playing black
+        white: Parsed agent playing white
+        board_size: Board size
+        seed: Seed for random agents
+
+    Returns:
+        dict - winner ("black", "white" or "draw"), moves and per-move think times
+    """
+    rng = random.Random(seed)
+    game = GomokuGame(board_size=board_size, backend="bitboard")
+    agents = {Player.BLACK: create_agent(black, game, rng),
+              Player.WHITE: create_agent(white, game, rng)}
+    think_times = []
+
+    while not game.game_over and len(game.move_history) < board_size * board_size:
+        start = time.perf_counter()
+        move = agents[game.current_player].choose_move()
+        think_times.append(round(time.perf_counter() - start, 4))
+        game.make_move(*move)
+
+    for agent in agents.values():
+        agent.close()
+    return {
+        'game': game_id,
+        'winner': game.winner.name.lower() if game.winner else 'draw',
+        'moves': [list(move) for move in game.move_history],
+        'think_times': think_times,
+    }
+
+
+def wilson_interval(score, games, z=1.96):
+    """
+    Confidence interval of a win rate
+
+    Args:
+        score: Wins plus half the draws
+        games: Number of games
+        z: Normal quantile (1.96 for 95%)
+
+    Returns:
+        tuple: (low, high)
+    """
+    if not games:
+        return 0.0, 1.0
+    p = score / games
+    denominator = 1 + z * z / games
+    center = (p + z * z / (2 * games)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / games + z * z / (4 * games * games)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+def run_match(agent_a, agent_b, games, output=None, workers=None, board_size=15, seed=0):
+    """
+    Play a match, alternating colors, and stream the results
+
+    Args:
+        agent_a: Agent description (see parse_agent), black in even games
+        agent_b: Agent description, black in odd games
+        games: Number of games
+        output: Optional path of a JSON Lines file receiving each finished game
+        workers: Number of processes (default: all cores)
+        board_size: Board size
+        seed: Base seed for the random agents
+
+    Returns:
+        dict - Wins, losses and draws of agent A, with its score and 95% interval
+    """
+    parsed = {'A': parse_agent(agent_a), 'B': parse_agent(agent_b)}
+    totals = {'wins': 0, 'losses': 0, 'draws': 0}
+    out = open(output, 'a', encoding='utf-8') if output else None
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            futures = {}
+            for game_id in range(games):
+                black, white = ('A', 'B') if game_id % 2 == 0 else ('B', 'A')
+                future = pool.submit(play_game, game_id, parsed[black], parsed[white],
+                                     board_size, seed + game_id)
+                futures[future] = 'black' if black == 'A' else 'white'
+
+            for done, future in enumerate(as_completed(futures), 1):
+                record = future.result()
+                color_a = futures[future]
+                record['agent_a'], record['agent_b'] = agent_a, agent_b
+                record['agent_a_color'] = color_a
+                if record['winner'] == 'draw':
+                    totals['draws'] += 1
+                elif record['winner'] == color_a:
+                    totals['wins'] += 1
+                else:
+                    totals['losses'] += 1
+
+                if out:
+                    out.write(json.dumps(record) + '\n')
+                    out.flush()
+                print(f"[{done}/{games}] game {record['game']}: {record['winner']} "
+                      f"in {len(record['moves'])} moves "
+                      f"(A {totals['wins']}-{totals['losses']}-{totals['draws']})")
+    finally:
+        if out:
+            out.close()
+
+    score = totals['wins'] + totals['draws'] / 2
+    low, high = wilson_interval(score, games)
+    totals.update(games=games, score=score / games if games else 0.0, low=low, high=high)
+    return totals
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Play Gomoku matches between two agents")
+    parser.add_argument('agent_a',
+                        help='"random", "ai[:time=S,depth=D,moves=M,tt=MB,book=FILE]" or '
+                             '"mcts[:time=S,batch=B,nodes=N,playouts=P,c=C]"')
+    parser.add_argument('agent_b', help='Opponent, same format')
+    parser.add_argument('-n', '--games', type=int, default=10, help='Number of games')
+    parser.add_argument('-o', '--output', help='JSON Lines file for per-game results')
+    parser.add_argument('-w', '--workers', type=int, help='Processes (default: all cores)')
+    parser.add_argument('--board-size', type=int, default=15)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    try:
+        parse_agent(args.agent_a)
+        parse_agent(args.agent_b)
+    except ValueError as error:
+        parser.error(str(error))
+
+    totals = run_match(args.agent_a, args.agent_b, args.games, args.output,
+                       args.workers, args.board_size, args.seed)
+    print(f"\n{args.agent_a} vs {args.agent_b}: "
+          f"+{totals['wins']} -{totals['losses']} ={totals['draws']}")
+    print(f"Score {totals['score']:.1%} (95% CI {totals['low']:.1%} - {totals['high']:.1%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,621 @@
+"""
+Gomoku Game Server
+Headless asyncio server hosting many concurrent games over JSON lines on TCP
+
+Protocol: one JSON object per line in both directions.
+    Requests carry "op" and an optional "id" that is echoed in the response:
+        {"op": "new", "color": "black"|"white"|"both", "ai_time": 0.5, "board_size": 15}
+        {"op": "join", "game": 1}                (the free color, or as a spectator)
+        {"op": "move", "game": 1, "row": 7, "col": 7}
+        {"op": "state", "game": 1}               (full state, e.g. after reconnecting)
+        {"op": "leave", "game": 1}
+        {"op": "stats"}
+    Responses: {"id": ..., "ok": true, ...} or {"id": ..., "ok": false, "error": "..."}
+    Events sent to everybody in a game are diffs, never full boards:
+        {"event": "move", "game": 1, "row": 7, "col": 7, "player": "black",
+         "ply": 1, "next": "white", "winner": null}
+        {"event": "error", "game": 1, "error": "..."}   (the engine failed to move)
+
+Usage:
+    python gomoku_server.py serve [--port 8765] [--engine-workers 4]
+    python gomoku_server.py bench [--games 1000] [--concurrency 200] [--ai-games 4]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from gomoku_ai import GomokuAI
+from gomoku_engine import sync_game
+from gomoku_game import GomokuGame, Player
+
+
+DEFAULT_PORT = 8765
+LATENCY_SAMPLES = 10000  # Most recent samples kept per operation
+
+_PLAYER_NAMES = {Player.BLACK: 'black', Player.WHITE: 'white'}
+_NAMED_PLAYERS = {name: player for player, name in _PLAYER_NAMES.items()}
+
+
+def percentiles(samples, points=(50, 90, 99)):
+    """
+    Nearest-rank percentiles of a list of numbers
+
+    Returns:
+        dict - {"p50": ..., "p90": ..., "p99": ..., "max": ...}, empty for no samples
+    """
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    result = {f"p{p}": ordered[max(0, -(-p * len(ordered) // 100) - 1)] for p in points}
+    result['max'] = ordered[-1]
+    return result
+
+
+# Engine state of a pool worker process, kept between jobs
+_worker_engines = {}
+
+
+def engine_move(board_size, moves, time_limit):
+    """
+    Choose a move in a pool worker process
+
+    The worker keeps one game and AI per board size, so its transposition
+    table and evaluator carry over between the games it serves.
+
+    Returns:
+        tuple: (move, depth, nodes, reply) - reply is the answer the engine
+            expects (second move of its principal variation), or None
+    """
+    if board_size not in _worker_engines:
+        game = GomokuGame(board_size=board_size, backend="bitboard")
+        _worker_engines[board_size] = (game, GomokuAI(game))
+    game, ai = _worker_engines[board_size]
+    sync_game(game, moves)
+    ai.time_limit = time_limit
+    result = ai.search()
+    reply = result.pv[1] if len(result.pv) > 1 else None
+    return result.move, result.depth, result.nodes, reply
+
+
+class GameSession:
+    """One hosted game with its players and the connections receiving its events"""
+
+    def __init__(self, game_id, board_size, ai_player=None, ai_time=0.5):
+        self.id = game_id
+        self.game = GomokuGame(board_size=board_size, backend="bitboard")
+        self.players = {}           # Player -> connection
+        self.ai_player = ai_player
+        self.ai_time = ai_time
+        self.watchers = set()
+        # Task of the engine move being searched
+        self.engine = None
+        # (moves, task) of the engine move searched ahead for the expected reply
+        self.ponder = None
+
+    def state(self):
+        """Full state of the game as sent to clients"""
+        game = self.game
+        return {
+            'game': self.id,
+            'board_size': game.board_size,
+            'moves': game.get_move_history(),
+            'next': _PLAYER_NAMES[game.current_player],
+            'winner': _PLAYER_NAMES.get(game.winner),
+            'game_over': game.game_over,
+            'ai': _PLAYER_NAMES.get(self.ai_player),
+        }
+
+
+class Connection:
+    """A connected client"""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.sessions = set()
+
+    def send(self, message):
+        # No drain per message: a slow reader must not hold up a broadcast
+        self.writer.write(json.dumps(message, separators=(',', ':')).encode() + b"\n")
+
+
+class ServerError(Exception):
+    """A request that cannot be served; its message goes back to the client"""
+
+
+class GomokuServer:
+    """
+    Hosts games for any number of connections
+    - Moves are validated by GomokuGame and broadcast as diffs
+    - Engine moves run in a bounded process pool; the event loop only awaits them
+    - Pondering: while a client thinks, an idle pool worker searches the
+      engine's answer to the reply it expects; if that reply comes, the
+      answer is sent as soon as the search ends instead of starting then
+    - Keeps per-operation latency samples for percentile reports
+    """
+
+    def __init__(self, engine_workers=2, max_games=10000, max_ai_time=5.0, ponder=True):
+        """
+        Initialize the server
+
+        Args:
+            engine_workers: Processes searching engine moves
+            max_games: Maximum number of hosted games
+            max_ai_time: Upper limit of the engine time a client may ask for
+            ponder: Search ahead for the expected replies with idle workers
+        """
+        self.engine_workers = engine_workers
+        self.max_games = max_games
+        self.max_ai_time = max_ai_time
+        self.ponder = ponder
+        self.ponder_hits = 0
+        self.ponder_misses = 0
+        self._engine_jobs = 0
+        self.sessions = {}
+        self.connections = set()
+        self.latency = {}
+        self._handlers = set()
+        self._ids = itertools.count(1)
+        self._pool = None
+        self._engine_slots = None
+        self._server = None
+        self._ops = {
+            'new': self.op_new,
+            'join': self.op_join,
+            'move': self.op_move,
+            'state': self.op_state,
+            'leave': self.op_leave,
+            'stats': self.op_stats,
+        }
+
+    async def start(self, host='127.0.0.1', port=DEFAULT_PORT):
+        """Start listening"""
+        self._pool = ProcessPoolExecutor(self.engine_workers)
+        # Engine jobs beyond this wait in the event loop, not in the pool queue
+        self._engine_slots = asyncio.Semaphore(self.engine_workers * 2)
+        self._server = await asyncio.start_server(self.handle_connection, host, port,
+                                                  limit=1 << 16)
+        return self._server
+
+    async def close(self):
+        """Disconnect all clients, stop listening and shut down the engine pool"""
+        if self._server is not None:
+            self._server.close()
+            for connection in list(self.connections):
+                connection.writer.close()
+            if self._handlers:
+                await asyncio.wait(list(self._handlers), timeout=5)
+            await self._server.wait_closed()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+
+    def record_latency(self, op, seconds):
+        samples = self.latency.get(op)
+        if samples is None:
+            samples = self.latency[op] = deque(maxlen=LATENCY_SAMPLES)
+        samples.append(seconds)
+
+    def latency_report(self):
+        """Latency percentiles in milliseconds per operation"""
+        report = {}
+        for op, samples in sorted(self.latency.items()):
+            report[op] = {key: round(value * 1000, 3)
+                          for key, value in percentiles(list(samples)).items()}
+            report[op]['count'] = len(samples)
+        return report
+
+    async def handle_connection(self, reader, writer):
+        """Serve one client until it disconnects"""
+        connection = Connection(writer)
+        self.connections.add(connection)
+        handler_task = asyncio.current_task()
+        self._handlers.add(handler_task)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                start = time.perf_counter()
+                request = {}
+                try:
+                    request = json.loads(line)
+                    handler = self._ops.get(request.get('op'))
+                    if handler is None:
+                        raise ServerError(f"Unknown op: {request.get('op')!r}")
+                    response = handler(connection, request)
+                    response['ok'] = True
+                except (ServerError, ValueError, TypeError, KeyError, AttributeError) as error:
+                    response = {'ok': False, 'error': str(error) or type(error).__name__}
+                if isinstance(request, dict) and 'id' in request:
+                    response['id'] = request['id']
+                connection.send(response)
+                await writer.drain()
+                op = request.get('op') if isinstance(request, dict) else None
+                self.record_latency(op if op in self._ops else 'invalid',
+                                    time.perf_counter() - start)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.connections.discard(connection)
+            self._handlers.discard(handler_task)
+            for session in list(connection.sessions):
+                self._leave(connection, session)
+            writer.close()
+
+    def _session(self, request):
+        session = self.sessions.get(request.get('game'))
+        if session is None:
+            raise ServerError(f"No such game: {request.get('game')}")
+        return session
+
+    def broadcast(self, session, message):
+        for connection in session.watchers:
+            connection.send(message)
+
+    def op_new(self, connection, request):
+        """Create a game; with ai_time set, the engine plays the creator's opponent"""
+        if len(self.sessions) >= self.max_games:
+            raise ServerError("Server is full")
+        color = request.get('color', 'black')
+        if color not in ('black', 'white', 'both'):
+            raise ServerError(f"Unknown color: {color!r}")
+        board_size = int(request.get('board_size', 15))
+        if not 5 <= board_size <= 25:
+            raise ServerError("Board size must be between 5 and 25")
+        ai_time = request.get('ai_time')
+        ai_player = None
+        if ai_time is not None:
+            if color == 'both':
+                raise ServerError("No engine in a game where one client plays both colors")
+            ai_player = Player.WHITE if color == 'black' else Player.BLACK
+            ai_time = float(ai_time)
+            if not (math.isfinite(ai_time) and ai_time > 0):
+                raise ServerError("ai_time must be a positive number of seconds")
+            ai_time = min(ai_time, self.max_ai_time)
+
+        session = GameSession(next(self._ids), board_size, ai_player, ai_time)
+        self.sessions[session.id] = session
+        colors = (Player.BLACK, Player.WHITE) if color == 'both' else (_NAMED_PLAYERS[color],)
+        for player in colors:
+            session.players[player] = connection
+        session.watchers.add(connection)
+        connection.sessions.add(session)
+        self._schedule_engine(session)
+        return {'game': session.id, 'color': color}
+
+    def op_join(self, connection, request):
+        """Join a game as the missing player, or watch it"""
+        session = self._session(request)
+        role = 'spectator'
+        for player in (Player.BLACK, Player.WHITE):
+            if player not in session.players and player != session.ai_player:
+                session.players[player] = connection
+                role = _PLAYER_NAMES[player]
+                break
+        session.watchers.add(connection)
+        connection.sessions.add(session)
+        response = session.state()
+        response['role'] = role
+        return response
+
+    def op_move(self, connection, request):
+        """Play a move for the client's color"""
+        session = self._session(request)
+        game = session.game
+        if session.players.get(game.current_player) is not connection:
+            raise ServerError("Not your turn")
+        if game.game_over:
+            raise ServerError("Game is over")
+        success, result = game.make_move(int(request['row']), int(request['col']))
+        if not success:
+            raise ServerError(result)
+        self._announce_move(session)
+        self._schedule_engine(session)
+        return {'ply': len(game.move_history)}
+
+    def op_state(self, connection, request):
+        """Full state of a game"""
+        return self._session(request).state()
+
+    def op_leave(self, connection, request):
+        """Stop playing or watching a game"""
+        self._leave(connection, self._session(request))
+        return {}
+
+    def op_stats(self, connection, request):
+        """Server load and latency percentiles"""
+        ponders = self.ponder_hits + self.ponder_misses
+        return {
+            'games': len(self.sessions),
+            'connections': len(self.connections),
+            'latency_ms': self.latency_report(),
+            'ponder': {'hits': self.ponder_hits, 'misses': self.ponder_misses,
+                       'hit_rate': self.ponder_hits / ponders if ponders else 0.0},
+        }
+
+    def _leave(self, connection, session):
+        session.watchers.discard(connection)
+        connection.sessions.discard(session)
+        for player, owner in list(session.players.items()):
+            if owner is connection:
+                del session.players[player]
+        if not session.watchers:
+            self.sessions.pop(session.id, None)
+            self._drop_ponder(session)
+
+    def _announce_move(self, session):
+        game = session.game
+        row, col = game.move_history[-1]
+        mover = Player.BLACK if len(game.move_history) % 2 else Player.WHITE
+        self.broadcast(session, {
+            'event': 'move', 'game': session.id, 'row': row, 'col': col,
+            'player': _PLAYER_NAMES[mover], 'ply': len(game.move_history),
+            'next': None if game.game_over else _PLAYER_NAMES[game.current_player],
+            'winner': _PLAYER_NAMES.get(game.winner),
+        })
+
+    def _schedule_engine(self, session):
+        game = session.game
+        if session.ai_player is not None and not game.game_over \
+                and game.current_player == session.ai_player:
+            session.engine = asyncio.ensure_future(self._engine_move(session))
+            session.engine.add_done_callback(lambda task: self._engine_done(session, task))
+
+    def _engine_done(self, session, task):
+        """Done callback of an engine move: report a failure to the loop and the players"""
+        if session.engine is task:
+            session.engine = None
+        if task.cancelled() or task.exception() is None:
+            return
+        error = task.exception()
+        task.get_loop().call_exception_handler({
+            'message': 'Engine move failed', 'exception': error, 'future': task})
+        self.broadcast(session, {'event': 'error', 'game': session.id,
+                                 'error': f"Engine failed: {error}"})
+
+    async def _run_engine(self, board_size, moves, time_limit):
+        """Search a position in the pool"""
+        async with self._engine_slots:
+            self._engine_jobs += 1
+            try:
+                loop = asyncio.get_event_loop()
+                return await loop.run_in_executor(
+                    self._pool, engine_move, board_size, moves, time_limit)
+            finally:
+                self._engine_jobs -= 1
+
+    async def _engine_move(self, session):
+        """Let the engine play in the pool, then apply and broadcast its move"""
+        game = session.game
+        checkpoint = game.snapshot()
+        moves = game.get_move_history()
+        start = time.perf_counter()
+        ponder, session.ponder = session.ponder, None
+        if ponder is not None and ponder[0] == moves:
+            self.ponder_hits += 1
+            search = ponder[1]
+        else:
+            if ponder is not None:
+                self.ponder_misses += 1
+                self._drop_ponder(session, ponder)
+            search = self._run_engine(game.board_size, moves, session.ai_time)
+        move, depth, nodes, reply = await search
+        self.record_latency('engine', time.perf_counter() - start)
+
+        # The game may have been abandoned while the engine was thinking
+        if (self.sessions.get(session.id) is not session
+                or game.position_hash != checkpoint.position_hash):
+            return
+        if move is not None:
+            success, result = game.make_move(*move)
+            if not success:
+                raise ServerError(f"Illegal engine move {tuple(move)}: {result}")
+            self._announce_move(session)
+            self._schedule_ponder(session, reply)
+
+    def _schedule_ponder(self, session, reply):
+        """Start searching the engine's answer to the expected reply if a worker is idle"""
+        game = session.game
+        if (not self.ponder or reply is None or game.game_over
+                or self._engine_jobs >= self.engine_workers):
+            return
+        moves = game.get_move_history() + [tuple(reply)]
+        task = asyncio.ensure_future(self._run_engine(game.board_size, moves, session.ai_time))
+        session.ponder = (moves, task)
+
+    def _drop_ponder(self, session, ponder=None):
+        """
+        Give up a speculative search
+
+        Its pool job cannot be interrupted, so the task is left to finish; an
+        error it ends with is reported instead of never being retrieved.
+
+        Args:
+            session: Game session the search was started for
+            ponder: (moves, task) already taken from the session, None for session.ponder
+        """
+        if ponder is None:
+            ponder, session.ponder = session.ponder, None
+            if ponder is None:
+                return
+        ponder[1].add_done_callback(_report_dropped)
+
+
+def _report_dropped(task):
+    """Done callback of a dropped ponder task: hand its error to the loop's handler"""
+    if not task.cancelled() and task.exception() is not None:
+        task.get_loop().call_exception_handler({
+            'message': 'Dropped ponder search failed',
+            'exception': task.exception(), 'future': task})
+
+
+async def _client_game(host, port, rng, latencies, vs_ai, max_moves):
+    """Play one random game through the server and record round-trip times"""
+    reader, writer = await asyncio.open_connection(host, port)
+    pending = {}
+    events = asyncio.Queue()
+    ids = itertools.count(1)
+
+    async def read_loop():
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            message = json.loads(line)
+            if 'id' in message:
+                pending.pop(message['id']).set_result(message)
+            else:
+                events.put_nowait(message)
+
+    async def request(**fields):
+        fields['id'] = next(ids)
+        future = asyncio.get_event_loop().create_future()
+        pending[fields['id']] = future
+        start = time.perf_counter()
+        writer.write(json.dumps(fields).encode() + b"\n")
+        response = await future
+        latencies.setdefault(fields['op'], []).append(time.perf_counter() - start)
+        return response
+
+    reader_task = asyncio.ensure_future(read_loop())
+    try:
+        response = await request(op='new', color='black' if vs_ai else 'both',
+                                 ai_time=0.1 if vs_ai else None)
+        game_id = response['game']
+        size = 15
+        free = [(row, col) for row in range(size) for col in range(size)]
+        rng.shuffle(free)
+        played = set()
+        for _ in range(max_moves):
+            while free and free[-1] in played:
+                free.pop()
+            if not free:
+                break
+            row, col = free.pop()
+            response = await request(op='move', game=game_id, row=row, col=col)
+            if not response['ok']:
+                break
+            # Follow the diffs up to (and including) the engine's reply
+            while True:
+                event = await events.get()
+                if event['event'] == 'error':
+                    break
+                played.add((event['row'], event['col']))
+                if event['next'] is None or event['next'] == 'black' or not vs_ai:
+                    break
+            if event['event'] == 'error' or event['next'] is None:
+                break
+        await request(op='leave', game=game_id)
+    finally:
+        reader_task.cancel()
+        writer.close()
+        await writer.wait_closed()
+
+
+async def run_bench(host, port, games, concurrency, ai_games, max_moves, seed=0):
+    """
+    Load test: play many random games concurrently and report latencies
+
+    Returns:
+        dict - Client-side latency percentiles and the server's own report
+    """
+    rng = random.Random(seed)
+    latencies = {}
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(index):
+        async with slots:
+            await _client_game(host, port, random.Random(rng.random()), latencies,
+                               index < ai_games, max_moves)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(games)))
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(b'{"op": "stats"}\n')
+    server_stats = json.loads(await reader.readline())
+    writer.close()
+    await writer.wait_closed()
+
+    client = {op: {key: round(value * 1000, 3) for key, value in percentiles(samples).items()}
+              for op, samples in sorted(latencies.items())}
+    requests = sum(len(samples) for samples in latencies.values())
+    return {'games': games, 'elapsed': elapsed, 'requests_per_second': requests / elapsed,
+            'client_ms': client, 'server_ms': server_stats['latency_ms'],
+            'ponder': server_stats.get('ponder')}
+
+
+async def _serve(args):
+    server = GomokuServer(args.engine_workers, args.max_games, ponder=not args.no_ponder)
+    await server.start(args.host, args.port)
+    print(f"Serving on {args.host}:{args.port} ({args.engine_workers} engine workers)")
+    try:
+        while True:
+            await asyncio.sleep(args.report or 3600)
+            if args.report:
+                print(json.dumps(server.op_stats(None, {})))
+    finally:
+        await server.close()
+
+
+async def _bench(args):
+    server = None
+    if not args.connect:
+        server = GomokuServer(args.engine_workers, max(args.games, 1),
+                              ponder=not args.no_ponder)
+        await server.start(args.host, args.port)
+    try:
+        return await run_bench(args.host, args.port, args.games, args.concurrency,
+                               args.ai_games, args.max_moves)
+    finally:
+        if server is not None:
+            await server.close()
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Gomoku game server")
+    parser.add_argument('command', choices=('serve', 'bench'))
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--engine-workers', type=int, default=2)
+    parser.add_argument('--max-games', type=int, default=10000)
+    parser.add_argument('--report', type=float, help='serve: print latencies every N seconds')
+    parser.add_argument('--no-ponder', action='store_true',
+                        help='Do not search ahead for the expected replies')
+    parser.add_argument('--games', type=int, default=1000, help='bench: games to play')
+    parser.add_argument('--concurrency', type=int, default=200, help='bench: games at once')
+    parser.add_argument('--ai-games', type=int, default=4, help='bench: games against the engine')
+    parser.add_argument('--max-moves', type=int, default=30, help='bench: client moves per game')
+    parser.add_argument('--connect', action='store_true',
+                        help='bench: use a running server instead of starting one')
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        try:
+            asyncio.run(_serve(args))
+        except KeyboardInterrupt:
+            pass
+    else:
+        result = asyncio.run(_bench(args))
+        print(f"{result['games']} games in {result['elapsed']:.2f}s, "
+              f"{result['requests_per_second']:,.0f} requests/s")
+        for side in ('client_ms', 'server_ms'):
+            print(f"{side[:-3]} latency (ms):")
+            for op, stats in result[side].items():
+                print(f"  {op:8s} " + "  ".join(f"{key}={value}" for key, value in stats.items()))
+        ponder = result['ponder']
+        if ponder and ponder['hits'] + ponder['misses']:
+            print(f"ponder: {ponder['hits']} hits, {ponder['misses']} misses "
+                  f"({ponder['hit_rate']:.0%})")
+
+
+if __name__ == "__main__":
+    main()
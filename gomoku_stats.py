@@ -0,0 +1,379 @@
+"""
+Gomoku Search Instrumentation
+Optional counters and profiling for GomokuAI, switched on without code changes
+
+Environment variables (read when a GomokuAI is created):
+    GOMOKU_STATS=1              print a report to stderr after every search
+    GOMOKU_STATS=stats.jsonl    append one JSON report per search to a file
+    GOMOKU_PROFILE=search.prof  cProfile of all searches (snakeviz, pstats, gprof2dot)
+    GOMOKU_PROFILE=search.folded
+                                sampled stacks in collapsed format (flamegraph.pl, speedscope)
+
+The same is available as GomokuAI(stats=True, profile="search.prof").
+When disabled nothing is wrapped, so the search runs at full speed.
+
+Usage:
+    python gomoku_stats.py 7,7 8,8 7,8 --time 2 [--profile search.folded]
+"""
+
+import argparse
+import cProfile
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+
+
+STATS_ENV = "GOMOKU_STATS"
+PROFILE_ENV = "GOMOKU_PROFILE"
+
+_OFF_VALUES = ('', '0', 'false', 'no', 'off')
+_STDERR_VALUES = ('1', 'true', 'yes', 'on', 'stderr')
+
+
+def env_setting(name):
+    """Value of an instrumentation variable, or None when it is unset or off"""
+    value = os.environ.get(name, '').strip()
+    return None if value.lower() in _OFF_VALUES else value
+
+
+class SearchStats:
+    """
+    Counters of one search, collected by wrapping the methods of a GomokuAI instance
+
+    - nodes, per-ply node counts and the resulting branching factors
+    - fail-high cutoffs, evaluation calls, transposition table hits
+    - time spent in move generation, make/undo and the VCF check
+    - nodes and time of every iterative deepening iteration
+    """
+
+    def __init__(self, output=None):
+        """
+        Args:
+            output: None to only collect, "1"/"stderr" to print every report,
+                or a file path to append JSON reports to
+        """
+        self.output = output
+        self.reports = []
+        self.reset()
+
+    def reset(self):
+        """Zero all counters"""
+        self.nodes = 0
+        self.ply_nodes = []
+        self.cutoffs = 0
+        self.evals = 0
+        self.movegen_calls = 0
+        self.movegen_time = 0.0
+        self.moves_generated = 0
+        self.make_undo_time = 0.0
+        self.vcf_nodes = 0
+        self.vcf_time = 0.0
+        self.iterations = []
+        self._tt_start = (0, 0, 0)
+        self._start = time.perf_counter()
+
+    def instrument(self, ai):
+        """Wrap the search methods of one GomokuAI instance"""
+        stats = self
+
+        inner_negamax = ai._negamax
+
+        def negamax(depth, alpha, beta, ply):
+            stats.nodes += 1
+            ply_nodes = stats.ply_nodes
+            if ply >= len(ply_nodes):
+                ply_nodes.extend([0] * (ply + 1 - len(ply_nodes)))
+            ply_nodes[ply] += 1
+            score, pv = inner_negamax(depth, alpha, beta, ply)
+            if score >= beta:
+                stats.cutoffs += 1
+            return score, pv
+
+        inner_search_root = ai._search_root
+
+        def search_root(moves, depth):
+            nodes, start = stats.nodes, time.perf_counter()
+            complete = False
+            try:
+                result = inner_search_root(moves, depth)
+                complete = True
+                return result
+            finally:
+                stats.iterations.append({
+                    'depth': depth, 'nodes': stats.nodes - nodes,
+                    'ms': round((time.perf_counter() - start) * 1000, 3), 'complete': complete})
+
+        inner_ordered_moves = ai._ordered_moves
+
+        def ordered_moves(ply=0, tt_move=None):
+            start = time.perf_counter()
+            moves = inner_ordered_moves(ply, tt_move)
+            stats.movegen_time += time.perf_counter() - start
+            stats.movegen_calls += 1
+            stats.moves_generated += len(moves)
+            return moves
+
+        inner_evaluate = ai._evaluate
+
+        def evaluate():
+            stats.evals += 1
+            return inner_evaluate()
+
+        inner_play, inner_unplay = ai._play, ai._unplay
+
+        def play(idx):
+            start = time.perf_counter()
+            won = inner_play(idx)
+            stats.make_undo_time += time.perf_counter() - start
+            return won
+
+        def unplay(idx):
+            start = time.perf_counter()
+            inner_unplay(idx)
+            stats.make_undo_time += time.perf_counter() - start
+
+        ai._negamax = negamax
+        ai._search_root = search_root
+        ai._ordered_moves = ordered_moves
+        ai._evaluate = evaluate
+        ai._play, ai._unplay = play, unplay
+
+        if ai.vcf_solver is not None:
+            inner_solve = ai.vcf_solver.solve
+
+            def solve(game):
+                result = inner_solve(game)
+                stats.vcf_nodes += result.nodes
+                stats.vcf_time += result.elapsed
+                return result
+
+            ai.vcf_solver.solve = solve
+
+    def begin(self, ai):
+        """Start counting a search"""
+        self.reset()
+        tt = ai.tt
+        self._tt_start = (tt.hits, tt.misses, tt.stores)
+
+    def end(self, ai, result):
+        """
+        Finish a search and emit its report
+
+        Returns:
+            dict - The report (also kept in self.reports)
+        """
+        elapsed = time.perf_counter() - self._start
+        tt = ai.tt
+        hits = tt.hits - self._tt_start[0]
+        probes = hits + tt.misses - self._tt_start[1]
+        report = {
+            'ply': len(ai.game.move_history),
+            'move': result.move,
+            'score': result.score,
+            'depth': result.depth,
+            'elapsed': round(elapsed, 4),
+            'nodes': self.nodes,
+            'nps': round(self.nodes / elapsed) if elapsed else 0,
+            'evals': self.evals,
+            'cutoffs': self.cutoffs,
+            'cutoff_rate': round(self.cutoffs / self.nodes, 4) if self.nodes else 0.0,
+            'tt_probes': probes,
+            'tt_hits': hits,
+            'tt_hit_rate': round(hits / probes, 4) if probes else 0.0,
+            'tt_stores': tt.stores - self._tt_start[2],
+            'movegen_calls': self.movegen_calls,
+            'movegen_ms': round(self.movegen_time * 1000, 3),
+            'moves_per_node': (round(self.moves_generated / self.movegen_calls, 2)
+                               if self.movegen_calls else 0.0),
+            'make_undo_ms': round(self.make_undo_time * 1000, 3),
+            'vcf_nodes': self.vcf_nodes,
+            'vcf_ms': round(self.vcf_time * 1000, 3),
+            'iterations': self._iteration_report(),
+            'branching_by_ply': [round(after / before, 2) for before, after
+                                 in zip(self.ply_nodes[1:], self.ply_nodes[2:]) if before],
+        }
+        self.reports.append(report)
+        self._emit(report)
+        return report
+
+    def _iteration_report(self):
+        iterations = []
+        previous = None
+        for iteration in self.iterations:
+            entry = dict(iteration)
+            # Effective branching factor: growth of the tree from one depth to the next
+            if previous and previous['nodes'] and iteration['complete']:
+                entry['ebf'] = round(iteration['nodes'] / previous['nodes'], 2)
+            iterations.append(entry)
+            previous = iteration
+        return iterations
+
+    def _emit(self, report):
+        if self.output is None:
+            return
+        if self.output.lower() in _STDERR_VALUES:
+            print(format_report(report), file=sys.stderr)
+        else:
+            with open(self.output, 'a', encoding='utf-8') as file:
+                file.write(json.dumps(report) + "\n")
+
+
+def format_report(report):
+    """Human readable form of a SearchStats report"""
+    lines = [
+        f"[search] ply {report['ply']}: move {report['move']} score {report['score']} "
+        f"depth {report['depth']} in {report['elapsed'] * 1000:.0f} ms",
+        f"  nodes {report['nodes']:,} ({report['nps']:,}/s), evals {report['evals']:,}, "
+        f"cutoffs {report['cutoffs']:,} ({report['cutoff_rate']:.0%})",
+        f"  tt {report['tt_hits']:,}/{report['tt_probes']:,} hits ({report['tt_hit_rate']:.0%}), "
+        f"{report['tt_stores']:,} stores",
+        f"  movegen {report['movegen_ms']:.1f} ms in {report['movegen_calls']:,} calls "
+        f"({report['moves_per_node']} moves each), make/undo {report['make_undo_ms']:.1f} ms, "
+        f"vcf {report['vcf_nodes']:,} nodes {report['vcf_ms']:.1f} ms",
+    ]
+    for iteration in report['iterations']:
+        ebf = f" ebf {iteration['ebf']}" if 'ebf' in iteration else ""
+        partial = "" if iteration['complete'] else " (stopped)"
+        lines.append(f"  depth {iteration['depth']:2d}: {iteration['nodes']:>9,} nodes "
+                     f"{iteration['ms']:9.1f} ms{ebf}{partial}")
+    if report['branching_by_ply']:
+        lines.append("  branching by ply: " + " ".join(str(b) for b in report['branching_by_ply']))
+    return "\n".join(lines)
+
+
+class StackSampler:
+    """
+    Sampling profiler writing collapsed stacks ("a;b;c count" lines)
+    - Samples the main thread on a CPU-time timer (Unix only)
+    - The output can be fed to flamegraph.pl or loaded into speedscope
+    """
+
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self.samples = Counter()
+        self._previous = None
+
+    def _sample(self, signum, frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        self.samples[";".join(reversed(stack))] += 1
+
+    def start(self):
+        if threading.current_thread() is not threading.main_thread():
+            raise RuntimeError("StackSampler must run in the main thread")
+        self._previous = signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self):
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, self._previous or signal.SIG_DFL)
+
+    def dump(self, path):
+        with open(path, 'w', encoding='utf-8') as file:
+            for stack, count in self.samples.most_common():
+                file.write(f"{stack} {count}\n")
+
+
+class SearchProfiler:
+    """
+    Profiles every search of an AI into one file, rewritten after each search
+    - *.folded / *.collapsed: StackSampler output
+    - anything else: cProfile statistics (pstats format)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if path.endswith(('.folded', '.collapsed')):
+            self._profiler = StackSampler()
+            self._start, self._stop = self._profiler.start, self._profiler.stop
+        else:
+            self._profiler = cProfile.Profile()
+            self._start, self._stop = self._profiler.enable, self._profiler.disable
+
+    def run(self, func):
+        self._start()
+        try:
+            return func()
+        finally:
+            self._stop()
+            if isinstance(self._profiler, StackSampler):
+                self._profiler.dump(self.path)
+            else:
+                self._profiler.dump_stats(self.path)
+
+
+def instrument_ai(ai, stats=None, profile=None):
+    """
+    Switch on instrumentation of a GomokuAI (called from its constructor)
+
+    Args:
+        ai: GomokuAI instance
+        stats: True, an output setting for SearchStats, or None to use GOMOKU_STATS
+        profile: Output path, or None to use GOMOKU_PROFILE
+
+    Returns:
+        SearchStats or None when statistics are disabled
+    """
+    if stats is None:
+        stats = env_setting(STATS_ENV)
+    if profile is None:
+        profile = env_setting(PROFILE_ENV)
+    if not stats and not profile:
+        return None
+
+    search_stats = None
+    if stats:
+        search_stats = SearchStats(None if stats is True else str(stats))
+        search_stats.instrument(ai)
+    profiler = SearchProfiler(profile) if profile else None
+
+    inner_search = ai.search
+
+    def search():
+        if search_stats is not None:
+            search_stats.begin(ai)
+        result = profiler.run(inner_search) if profiler is not None else inner_search()
+        if search_stats is not None:
+            search_stats.end(ai, result)
+        return result
+
+    ai.search = search
+    return search_stats
+
+
+def main():
+    """Search one position with statistics"""
+    from gomoku_ai import GomokuAI
+    from gomoku_game import GomokuGame
+
+    parser = argparse.ArgumentParser(description="Search a position and report statistics")
+    parser.add_argument('moves', nargs='*', help='Moves played so far as row,col')
+    parser.add_argument('--time', type=float, default=2.0)
+    parser.add_argument('--depth', type=int, default=20)
+    parser.add_argument('--profile', help='Also profile into this file (.prof or .folded)')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args()
+
+    game = GomokuGame(backend="bitboard")
+    for move in args.moves:
+        row, col = (int(x) for x in move.split(','))
+        success, result = game.make_move(row, col)
+        if not success:
+            parser.error(f"Move {move}: {result}")
+
+    ai = GomokuAI(game, time_limit=args.time, max_depth=args.depth, stats=True,
+                  profile=args.profile)
+    ai.search()
+    report = ai.stats.reports[-1]
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Gomoku Transposition Table
+Fixed-size hash table of search results keyed by GomokuGame.canonical(), so
+the 8 symmetric forms of a position share one entry
+"""
+
+from array import array
+
+
+# Bound types of a stored score
+EXACT = 1
+LOWER = 2   # Score is at least the stored value (fail high)
+UPPER = 3   # Score is at most the stored value (fail low)
+
+# Depth of results proven by a solver; deeper than any search iteration
+SOLVED_DEPTH = 0xFF
+
+_SCORE_OFFSET = 1 << 31
+_MASK_16 = (1 << 16) - 1
+_MASK_32 = (1 << 32) - 1
+
+
+class TranspositionTable:
+    """
+    Bounded transposition table
+    - Buckets of two slots: a depth-preferred slot and an always-replace slot
+    - Entries are packed into two 64-bit words, so memory never grows
+      beyond the size given at construction
+    - The key word is stored XOR-ed with the data word, so an entry torn by
+      a concurrent writer fails verification instead of returning wrong data
+      (lockless sharing between processes, see gomoku_parallel)
+    - Counts probe hits and misses
+    """
+
+    ENTRY_BYTES = 16
+    SLOTS_PER_BUCKET = 2
+
+    def __init__(self, size_mb=16, buffer=None):
+        """
+        Initialize the table
+
+        Args:
+            size_mb: Memory budget in megabytes (rounded down to a power of two buckets)
+            buffer: Optional writable buffer of at least size_bytes to keep the
+                entries in, e.g. a multiprocessing.shared_memory block; its
+                contents are used as they are, so tables of several
+                processes can share it
+        """
+        self.buckets = self._buckets(size_mb)
+        self._mask = self.buckets - 1
+        self.generation = 0
+        self._buffer = None
+        if buffer is None:
+            self.clear()
+            return
+        if len(buffer) < self.size_bytes:
+            raise ValueError(f"Buffer too small: {len(buffer)} < {self.size_bytes} bytes")
+        words = self.size_bytes // 2
+        self._buffer = memoryview(buffer)[:self.size_bytes]
+        self._keys = self._buffer[:words].cast('Q')
+        self._data = self._buffer[words:].cast('Q')
+        self._reset_counters()
+
+    @classmethod
+    def _buckets(cls, size_mb):
+        """Number of buckets of a table of the given memory budget"""
+        buckets = max(1, int(size_mb * 1024 * 1024) // (cls.ENTRY_BYTES * cls.SLOTS_PER_BUCKET))
+        return 1 << (buckets.bit_length() - 1)
+
+    @classmethod
+    def bytes_for(cls, size_mb):
+        """size_bytes of a table of the given memory budget, without creating it"""
+        return cls._buckets(size_mb) * cls.SLOTS_PER_BUCKET * cls.ENTRY_BYTES
+
+    @property
+    def size_bytes(self):
+        """Memory used by the entries"""
+        return self.buckets * self.SLOTS_PER_BUCKET * self.ENTRY_BYTES
+
+    def clear(self):
+        """Remove all entries and reset the counters"""
+        if self._buffer is not None:
+            self._buffer[:] = bytes(self.size_bytes)
+        else:
+            slots = self.buckets * self.SLOTS_PER_BUCKET
+            self._keys = array('Q', bytes(8 * slots))
+            self._data = array('Q', bytes(8 * slots))
+        self._reset_counters()
+
+    def release(self):
+        """Let go of a buffer given at construction; the table is unusable afterwards"""
+        if self._buffer is not None:
+            self._keys.release()
+            self._data.release()
+            self._buffer.release()
+            self._buffer = None
+
+    def _reset_counters(self):
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def new_search(self):
+        """Start a new search: entries of older searches lose their depth priority"""
+        self.generation = (self.generation + 1) & 63
+
+    def probe(self, key):
+        """
+        Look up a position
+
+        Args:
+            key: 64-bit position hash
+
+        Returns:
+            tuple: (depth, flag, score, move) or None if the position is not stored
+        """
+        slot = (key & self._mask) << 1
+        keys, stored = self._keys, self._data
+        data = stored[slot]
+        if keys[slot] ^ data != key:
+            slot += 1
+            data = stored[slot]
+            if keys[slot] ^ data != key:
+                self.misses += 1
+                return None
+        if not data:
+            self.misses += 1
+            return None
+        self.hits += 1
+        move = (data >> 32) & _MASK_16
+        return ((data >> 48) & 0xFF, (data >> 56) & 3,
+                (data & _MASK_32) - _SCORE_OFFSET, move - 1 if move else None)
+
+    def store(self, key, depth, flag, score, move):
+        """
+        Store a search result
+
+        Args:
+            key: 64-bit position hash
+            depth: Remaining depth the score was searched to
+            flag: EXACT, LOWER or UPPER
+            score: Score for the player to move
+            move: Best move as a flat cell index, or None
+        """
+        data = ((score + _SCORE_OFFSET) & _MASK_32
+                | (0 if move is None else move + 1) << 32
+                | min(depth, SOLVED_DEPTH) << 48
+                | flag << 56
+                | self.generation << 58)
+        slot = (key & self._mask) << 1
+        keys, stored = self._keys, self._data
+
+        # The depth-preferred slot keeps the deepest result of the current
+        # search (or a solved result of any search); everything else goes
+        # to the always-replace slot
+        old = stored[slot]
+        old_depth = (old >> 48) & 0xFF
+        if (not old or keys[slot] ^ old == key or old_depth <= depth
+                or (old >> 58 != self.generation and old_depth != SOLVED_DEPTH)):
+            stored[slot] = data
+            keys[slot] = key ^ data
+        else:
+            stored[slot + 1] = data
+            keys[slot + 1] = key ^ data
+        self.stores += 1
+
+    def stats(self):
+        """Get usage counters"""
+        probes = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'stores': self.stores,
+            'hit_rate': self.hits / probes if probes else 0.0,
+            'size_bytes': self.size_bytes,
+        }
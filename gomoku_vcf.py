@@ -0,0 +1,261 @@
+"""
+Gomoku Threat-Space Search
+Finds forced wins by continuous fours (VCF), optionally with threes (VCT)
+
+Usage:
+    python gomoku_vcf.py 7,7 7,8 8,8 6,6 9,9 ... [--threes] [--nodes N]
+"""
+
+import argparse
+import time
+
+from gomoku_board import BitBoard
+from gomoku_game import GomokuGame
+
+
+class ThreatResult:
+    """Outcome of a threat-space search"""
+
+    def __init__(self, found, moves, nodes, complete, elapsed):
+        self.found = found          # A forced win was found
+        self.moves = moves          # Winning line as (row, col), attacker and defender alternating
+        self.nodes = nodes
+        self.complete = complete    # Search finished: found=False proves there is no such win
+        self.elapsed = elapsed
+
+    def __repr__(self):
+        return (f"ThreatResult(found={self.found}, moves={self.moves}, nodes={self.nodes}, "
+                f"complete={self.complete})")
+
+
+class _NodeLimit(Exception):
+    """Raised when the search runs out of nodes"""
+
+
+class ThreatSolver:
+    """
+    Threat-space search for the player to move
+    - VCF: every attacking move makes a four, so the defender's reply is forced
+    - VCT (use_threes): attacking moves may also make a three; all relevant
+      defences, including counter-fours, are then searched
+    - Works on bitboards copied from the game, so the game is never changed
+    """
+
+    def __init__(self, board_size=15, max_nodes=20000, use_threes=False):
+        """
+        Initialize the solver
+
+        Args:
+            board_size: Board size of the games to solve
+            max_nodes: Node budget of one solve() call
+            use_threes: Also search threats by threes (VCT), much slower
+        """
+        self.board_size = board_size
+        self.max_nodes = max_nodes
+        self.use_threes = use_threes
+        self._board = BitBoard(board_size)
+
+    def solve(self, game):
+        """
+        Search for a forced win of the player to move
+
+        Args:
+            game: GomokuGame position to analyse
+
+        Returns:
+            ThreatResult
+        """
+        board = self._board
+        stride = board.stride
+        bits = [0, 0, 0]
+        for i, (row, col) in enumerate(game.move_history):
+            bits[1 + i % 2] |= 1 << (row * stride + col)
+        attacker = game.current_player.value
+
+        start = time.perf_counter()
+        self.nodes = 0
+        self._failed = set()
+        line = None
+        complete = True
+        if not game.game_over:
+            try:
+                line = self._attack(bits[attacker], bits[3 - attacker])
+            except _NodeLimit:
+                complete = False
+
+        moves = [divmod(idx, stride) for idx in line] if line else []
+        if moves and game.rule != "freestyle" and not self._playable(game, moves):
+            # The search knows freestyle only; a line using a forbidden move proves nothing
+            line, moves, complete = None, [], False
+        return ThreatResult(line is not None, moves, self.nodes, complete,
+                            time.perf_counter() - start)
+
+    @staticmethod
+    def _playable(game, moves):
+        """Check a winning line against the rules of the game by replaying it"""
+        check = GomokuGame(game.board_size, backend="bitboard", rule=game.rule)
+        for move in game.move_history:
+            check.make_move(*move)
+        for i, move in enumerate(moves):
+            success, _ = check.make_move(*move)
+            if not success:
+                # A defender barred from the forced block loses all the same
+                return i % 2 == 1
+        return check.winner is game.current_player
+
+    def _count_node(self):
+        self.nodes += 1
+        if self.nodes > self.max_nodes:
+            raise _NodeLimit()
+
+    def _open_four_points(self, own, empty):
+        """Cells where the player would make an open four (two five points)"""
+        board = self._board
+        points = 0
+        for idx in board.bit_indices(board.four_points(own, empty)):
+            bit = 1 << idx
+            fives = board.five_points(own | bit, empty & ~bit)
+            if fives & (fives - 1):
+                points |= bit
+        return points
+
+    def _attack(self, own, other):
+        """
+        Attacker to move
+
+        Returns:
+            list - Winning line of bit indices, or None
+        """
+        self._count_node()
+        key = (own, other)
+        if key in self._failed:
+            return None
+
+        board = self._board
+        empty = board.full_mask & ~(own | other)
+        wins = board.five_points(own, empty)
+        if wins:
+            return [(wins & -wins).bit_length() - 1]
+
+        # A defender five point must be blocked, and two cannot be
+        threats = board.five_points(other, empty)
+        if threats & (threats - 1):
+            self._failed.add(key)
+            return None
+
+        fours = board.four_points(own, empty)
+        if threats:
+            fours &= threats
+
+        # Fours that leave two five points win at once
+        replies = []
+        for idx in board.bit_indices(fours):
+            bit = 1 << idx
+            fives = board.five_points(own | bit, empty & ~bit)
+            if fives & (fives - 1):
+                return [idx, (fives & -fives).bit_length() - 1,
+                        (fives ^ (fives & -fives)).bit_length() - 1]
+            replies.append((idx, fives.bit_length() - 1))
+
+        for idx, reply in replies:
+            line = self._attack(own | 1 << idx, other | 1 << reply)
+            if line is not None:
+                return [idx, reply] + line
+
+        if self.use_threes and not threats:
+            for idx in board.bit_indices(board.window_points(own, empty, 2)):
+                bit = 1 << idx
+                if not self._open_four_points(own | bit, empty & ~bit):
+                    continue
+                line = self._defend(own | bit, other)
+                if line is not None:
+                    return [idx] + line
+
+        self._failed.add(key)
+        return None
+
+    def _defend(self, own, other):
+        """
+        Defender to move against a three of the attacker
+
+        Returns:
+            list - Winning line against the defender's most stubborn reply, or None
+        """
+        self._count_node()
+        board = self._board
+        empty = board.full_mask & ~(own | other)
+        if board.five_points(other, empty):
+            return None
+
+        # A four of the attacker (made while blocking a counter-four) comes first
+        fives = board.five_points(own, empty)
+        if fives & (fives - 1):
+            return []
+        if fives:
+            block = fives.bit_length() - 1
+            line = self._attack(own, other | 1 << block)
+            return None if line is None else [block] + line
+
+        # The three was already neutralised: the defender is free to play anywhere
+        if not self._open_four_points(own, empty):
+            return None
+
+        longest = None
+        # Blocks: cells after which the attacker has no open four left
+        for idx in board.bit_indices(board.four_points(own, empty)):
+            bit = 1 << idx
+            if self._open_four_points(own, empty & ~bit):
+                continue
+            line = self._attack(own, other | bit)
+            if line is None:
+                return None
+            if longest is None or len(line) + 1 > len(longest):
+                longest = [idx] + line
+
+        # Counter-fours: the attacker must block them before going on
+        for idx in board.bit_indices(board.four_points(other, empty)):
+            bit = 1 << idx
+            fives = board.five_points(other | bit, empty & ~bit)
+            if fives & (fives - 1):
+                return None
+            block = fives.bit_length() - 1
+            line = self._defend(own | 1 << block, other | bit)
+            if line is None:
+                return None
+            if longest is None or len(line) + 2 > len(longest):
+                longest = [idx, block] + line
+
+        # No relevant defence: any reply loses to the open four
+        return longest if longest is not None else []
+
+
+def main():
+    """Solve a position given as a list of moves"""
+    parser = argparse.ArgumentParser(description="Find a forced win by threats")
+    parser.add_argument('moves', nargs='*', help='Moves played so far as row,col')
+    parser.add_argument('--threes', action='store_true', help='Also use threes (VCT)')
+    parser.add_argument('--nodes', type=int, default=100000, help='Node limit')
+    parser.add_argument('--board-size', type=int, default=15)
+    args = parser.parse_args()
+
+    game = GomokuGame(board_size=args.board_size, backend="bitboard")
+    for move in args.moves:
+        row, col = (int(x) for x in move.split(','))
+        success, result = game.make_move(row, col)
+        if not success:
+            parser.error(f"Move {move}: {result}")
+
+    solver = ThreatSolver(args.board_size, max_nodes=args.nodes, use_threes=args.threes)
+    result = solver.solve(game)
+    rate = result.nodes / result.elapsed if result.elapsed else 0
+    if result.found:
+        print(f"{game.current_player.name} wins: {' '.join(f'{r},{c}' for r, c in result.moves)}")
+    elif result.complete:
+        print(f"No forced win for {game.current_player.name}")
+    else:
+        print("Unknown: node limit reached")
+    print(f"{result.nodes} nodes in {result.elapsed:.3f}s ({rate:,.0f} nodes/s)")
+
+
+if __name__ == "__main__":
+    main()